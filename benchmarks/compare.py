@@ -0,0 +1,67 @@
+import argparse
+import json
+import sys
+
+"""
+Compares two JSON files written by benchmarks.run, typically from runs against two commits, listing the change in
+the fastest timing of each benchmark run by both, which is least affected by whatever else the machine was doing.
+For example:
+
+    python -m benchmarks.compare before.json after.json --threshold 0.1
+
+exits with status 1 if any benchmark is more than 10% slower in the second file than the first.
+"""
+
+
+def _key(result):
+    return result["name"], result["size"], json.dumps(result["params"], sort_keys=True)
+
+
+def compare(base, head, threshold):
+    """
+    Compares the results of two runs of the benchmarks
+    :param base: Results of the earlier run, as loaded from its JSON file
+    :param head: Results of the later run, as loaded from its JSON file
+    :param threshold: Proportion by which a benchmark must be slower to be counted as a regression
+    :returns: List of tuples of the key of each benchmark run by both (name, size and parameters as JSON), the fastest
+    timings of each run, the ratio of the later to the earlier, and whether that is a regression
+    """
+    earlier = {_key(result): result for result in base["results"]}
+    rows = []
+    for result in head["results"]:
+        key = _key(result)
+        if key in earlier:
+            before, after = earlier[key]["min"], result["min"]
+            ratio = after / before if before else float("inf")
+            rows.append((key, before, after, ratio, ratio > 1.0 + threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compares two runs of the pydictsql benchmarks"
+    )
+    parser.add_argument("base", help="JSON file of the earlier run")
+    parser.add_argument("head", help="JSON file of the later run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Proportion slower counted as a regression (default 0.1)",
+    )
+    args = parser.parse_args(argv)
+    with open(args.base) as file:
+        base = json.load(file)
+    with open(args.head) as file:
+        head = json.load(file)
+    rows = compare(base, head, args.threshold)
+    for (name, size, params), before, after, ratio, regressed in rows:
+        print(
+            f"{name:<10} {size or '':>10} {params:<50} {before:.6f}s -> {after:.6f}s "
+            f"x{ratio:.2f}{'  REGRESSION' if regressed else ''}"
+        )
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import random
+import string
+
+"""
+Synthetic datasets for the benchmarks. Records are generated from a seeded random number generator, so the same
+parameters always produce the same records, wherever and whenever they are generated. Fields are chosen so that
+queries of a known selectivity can be written: {value} is uniform in [0, 1), so {value} < 0.1 matches about a tenth
+of the records, and {category} takes one of a number of equally likely values
+"""
+
+# Named sizes which may be given in place of a number of records
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+
+def size_of(name):
+    """
+    Returns the number of records for a named size, such as "1m", or a number of records given as a string
+    :param name: Named size, or number of records
+    :returns: Number of records
+    :raises ValueError: Raised if the name isn't a named size or a positive number
+    """
+    size = SIZES.get(name.lower()) if isinstance(name, str) else name
+    if size is None:
+        size = int(name)
+    if size < 1:
+        raise ValueError("Size must be at least one record")
+    return size
+
+
+def records(size, extra_fields=0, categories=10, seed=0):
+    """
+    Generates synthetic records, each with the fields id (the position of the record), value (a float uniform in
+    [0, 1)), category (one of "category0" and so on), amount (an int in [0, 1000)) and name (a string of eight
+    letters), followed by any extra fields, named field0 and so on, holding ints
+    :param size: Number of records
+    :param extra_fields: Number of further fields in each record, making records wider
+    :param categories: Number of distinct values of the category field
+    :param seed: Seed of the random number generator
+    :yields: Each record in turn
+    """
+    rng = random.Random(seed)
+    names = [f"category{number}" for number in range(categories)]
+    extras = [f"field{number}" for number in range(extra_fields)]
+    for position in range(size):
+        record = {
+            "id": position,
+            "value": rng.random(),
+            "category": rng.choice(names),
+            "amount": rng.randrange(1000),
+            "name": "".join(rng.choices(string.ascii_lowercase, k=8)),
+        }
+        for field in extras:
+            record[field] = rng.randrange(1000)
+        yield record
+
+
+def dataset(size, extra_fields=0, categories=10, seed=0):
+    # Returns the records as a list, see records
+    return list(records(size, extra_fields, categories, seed))
+
+
+def selecting(selectivity):
+    """
+    Returns a WHERE clause condition which matches about the given proportion of records
+    :param selectivity: Proportion of records to match, from 0 to 1
+    :returns: Condition on the value field
+    """
+    return f"{{value}} < {selectivity}"
@@ -0,0 +1,204 @@
+import argparse
+from collections import deque
+import datetime
+import json
+import platform
+from statistics import median
+import subprocess
+import sys
+from time import perf_counter
+
+import pydictsql
+from pydictsql.parser import _Parser
+from pydictsql.tokeniser import _Tokeniser
+
+from .datasets import dataset, selecting, size_of
+
+"""
+Runs the benchmarks, writing the timings to a JSON file so that runs against different commits can be compared with
+benchmarks.compare. For example, from the root of the repository:
+
+    python -m benchmarks.run --sizes 10k 1m --output before.json
+
+Construction of the tokeniser and parser is timed on its own, as are filter, filtergen, evaluating the WHERE clause
+alone and projecting the matching records, each for several selectivities. Each benchmark is run repeat times, and
+both the fastest and median timings are recorded, the fastest being least affected by whatever else the machine is
+doing. Datasets are generated in memory before timing, which for 10 million records needs several gigabytes.
+"""
+
+# Statements parsed when timing construction, from the simplest to one using most of the grammar
+STATEMENTS = {
+    "simple": "SELECT * FROM {source} WHERE {value} < 0.5",
+    "complex": (
+        "SELECT {category}, COUNT(*), AVG({amount}) FROM {source} WHERE ({value} < 0.5 OR {name} LIKE 'a%') AND "
+        "NOT {category} IN ('category1', 'category2') AND {amount} BETWEEN 10 AND 900 GROUP BY {category} "
+        "ORDER BY {COUNT(*)} DESC LIMIT 5"
+    ),
+}
+
+DEFAULT_SELECTIVITIES = [0.01, 0.1, 0.5]
+ROW_TYPES = ["dict", "view", "tuple"]
+
+
+def _timings(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        timings.append(perf_counter() - start)
+    return timings
+
+
+def _result(name, size, params, timings):
+    return {
+        "name": name,
+        "size": size,
+        "params": params,
+        "min": min(timings),
+        "median": median(timings),
+        "timings": timings,
+    }
+
+
+def _consume(iterable):
+    deque(iterable, maxlen=0)
+
+
+def parsing(repeat, number=1000):
+    """
+    Times constructing the tokeniser, and the parser (which tokenises, parses and plans), for each statement
+    :param repeat: Number of times each benchmark is run
+    :param number: Number of times each statement is parsed in a run
+    :returns: List of results
+    """
+    results = []
+    for label, sql in STATEMENTS.items():
+        for name, construct in [("tokenise", _Tokeniser), ("parse", _Parser)]:
+            timings = _timings(lambda: [construct(sql) for _ in range(number)], repeat)
+            results.append(
+                _result(name, None, {"statement": label, "number": number}, timings)
+            )
+    return results
+
+
+def filtering(records, selectivities, repeat):
+    """
+    Times filter and filtergen over the records, and separately the evaluation of the WHERE clause and the projection
+    of the matches into each type of row, for each selectivity
+    :param records: List of records
+    :param selectivities: Proportions of the records to be matched
+    :param repeat: Number of times each benchmark is run
+    :returns: List of results
+    """
+    results = []
+    size = len(records)
+    for selectivity in selectivities:
+        sql = (
+            f"SELECT {{id}}, {{amount}} FROM {{source}} WHERE {selecting(selectivity)}"
+        )
+        params = {"selectivity": selectivity}
+        filter = pydictsql.DictFilter(sql)
+        for name, function in [
+            ("filter", lambda: filter.filter(source=records)),
+            ("filtergen", lambda: _consume(filter.filtergen(source=records))),
+        ]:
+            results.append(_result(name, size, params, _timings(function, repeat)))
+
+        parser = _Parser(sql)
+        predicate = parser.predicate
+        timings = _timings(
+            lambda: [record for record in records if predicate(record)], repeat
+        )
+        results.append(_result("where", size, params, timings))
+
+        matches = [record for record in records if predicate(record)]
+        for row_type in ROW_TYPES:
+            project_batch = parser.projectors(row_type)[1]
+            timings = _timings(lambda: project_batch(matches), repeat)
+            results.append(
+                _result("project", size, {**params, "row_type": row_type}, timings)
+            )
+    return results
+
+
+def _commit():
+    # Returns the commit benchmarked, if run from a git repository
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def _metadata(args):
+    return {
+        "commit": _commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "optional": {module: _installed(module) for module in ["numpy", "orjson"]},
+        "arguments": vars(args),
+    }
+
+
+def _installed(module):
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+def _arguments(argv):
+    parser = argparse.ArgumentParser(description="Runs the pydictsql benchmarks")
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=["10k"],
+        help="Numbers of records, or named sizes 10k, 1m or 10m (default 10k)",
+    )
+    parser.add_argument(
+        "--selectivities",
+        nargs="+",
+        type=float,
+        default=DEFAULT_SELECTIVITIES,
+        help="Proportions of records matched by the queries",
+    )
+    parser.add_argument(
+        "--extra-fields", type=int, default=0, help="Further fields in each record"
+    )
+    parser.add_argument(
+        "--categories", type=int, default=10, help="Distinct values of {category}"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Seed used to generate the records"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Number of times each benchmark is run"
+    )
+    parser.add_argument(
+        "--output", default="benchmark.json", help="Path of the JSON file written"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _arguments(argv)
+    results = parsing(args.repeat)
+    for name in args.sizes:
+        records = dataset(size_of(name), args.extra_fields, args.categories, args.seed)
+        results.extend(filtering(records, args.selectivities, args.repeat))
+        del records
+    with open(args.output, "w") as file:
+        json.dump({"metadata": _metadata(args), "results": results}, file, indent=2)
+    for result in results:
+        print(
+            f"{result['name']:<10} {result['size'] or '':>10} {json.dumps(result['params']):<50} "
+            f"min {result['min']:.6f}s median {result['median']:.6f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
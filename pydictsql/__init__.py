@@ -1 +1,7 @@
+from .cache import cache_info, clear_cache, set_cache_size
+from .continuous import ContinuousQuery
 from .dictfilter import DictFilter
+from .index import IndexedCollection
+from .parallel import ParallelDictFilter
+from .sources import CsvSource, MmapNdjsonSource, NdjsonSource, Source
+from .stats import ConditionStats, QueryStats
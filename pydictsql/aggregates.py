@@ -0,0 +1,173 @@
+from numbers import Number
+from operator import itemgetter
+
+from .exceptions import UnrecognisedReferenceError
+from .rows import _tuple_getter
+from .tokeniser import _TokenType
+
+"""
+Aggregate queries are executed by hash aggregation in a single pass over the matching records. Each group holds one
+accumulated value per aggregate function, so memory grows with the number of groups rather than the number of records.
+As with NULL in SQL, values of None are ignored by every function other than COUNT(*).
+"""
+
+
+def _no_value(record):
+    # COUNT(*) counts records regardless of their fields
+    return None
+
+
+def _count_all(total, value):
+    return total + 1
+
+
+def _count(total, value):
+    return total if value is None else total + 1
+
+
+def _number(value):
+    # Strings would otherwise be concatenated by SUM, as strings read from a CSV file without declared types would be
+    if not isinstance(value, Number):
+        raise TypeError(
+            f"SUM and AVG require numeric values, found {value!r} of type {type(value).__name__}"
+        )
+    return value
+
+
+def _sum(total, value):
+    if value is None:
+        return total
+    return _number(value) if total is None else total + _number(value)
+
+
+def _min(least, value):
+    if value is None:
+        return least
+    return value if least is None or value < least else least
+
+
+def _max(greatest, value):
+    if value is None:
+        return greatest
+    return value if greatest is None or value > greatest else greatest
+
+
+def _avg(state, value):
+    # The running total and count, from which the average is found once every record has been read
+    return state if value is None else (state[0] + _number(value), state[1] + 1)
+
+
+def _average(state):
+    total, count = state
+    return total / count if count else None
+
+
+# For each function: the initial accumulated value, the step adding a value to it and the final conversion, if any
+_FUNCTIONS = {
+    _TokenType.COUNT: (0, _count, None),
+    _TokenType.SUM: (None, _sum, None),
+    _TokenType.MIN: (None, _min, None),
+    _TokenType.MAX: (None, _max, None),
+    _TokenType.AVG: ((0, 0), _avg, _average),
+}
+
+
+class _Aggregate:
+    """
+    Constructs an aggregate function from the SELECT list
+    :param function: Token type of the function, one of COUNT, SUM, MIN, MAX or AVG
+    :param key: Name of the field aggregated, or None for COUNT(*)
+    """
+
+    def __init__(self, function, key):
+        self.function = function
+        self.key = key
+        # Named as written in the SQL, without the braces around the field, for example "COUNT(*)" or "SUM(sales)"
+        self.name = f"{function.name}({'*' if key is None else key})"
+        self.initial, self.step, self.finish = _FUNCTIONS[function]
+        if key is None:
+            self.step = _count_all
+
+    def __repr__(self):
+        return self.name
+
+
+class _Grouping:
+    """
+    Constructs the grouping of matching records by the GROUP BY fields, accumulating the aggregate functions of each
+    group as records are read. Without GROUP BY fields, all records are aggregated as a single group
+    :param group_keys: Names of the GROUP BY fields
+    :param columns: For each column of the SELECT list in turn, either the name of a GROUP BY field or an _Aggregate
+    """
+
+    def __init__(self, group_keys, columns):
+        self.group_keys = group_keys
+        self.columns = columns
+        self.aggregates = [
+            column for column in columns if isinstance(column, _Aggregate)
+        ]
+
+    def __repr__(self):
+        aggregates = ", ".join(aggregate.name for aggregate in self.aggregates)
+        if not self.group_keys:
+            return aggregates
+        return f"{aggregates} GROUP BY {', '.join(f'{{{key}}}' for key in self.group_keys)}"
+
+    def fields(self):
+        # Returns the names of the fields read from each record
+        return set(self.group_keys) | set(
+            aggregate.key for aggregate in self.aggregates if aggregate.key is not None
+        )
+
+    def start(self):
+        # Returns the empty groups, into which records are accumulated by update
+        return {}
+
+    def update(self, groups, records):
+        # Accumulates the records into the groups, holding a list of accumulated values for each group
+        group_of = (
+            _tuple_getter(self.group_keys) if self.group_keys else lambda record: ()
+        )
+        steps = [
+            (
+                aggregate.step,
+                _no_value if aggregate.key is None else itemgetter(aggregate.key),
+            )
+            for aggregate in self.aggregates
+        ]
+        initial = [aggregate.initial for aggregate in self.aggregates]
+        try:
+            for record in records:
+                group = group_of(record)
+                accumulated = groups.get(group)
+                if accumulated is None:
+                    accumulated = groups[group] = initial.copy()
+                for pos, (step, value_of) in enumerate(steps):
+                    accumulated[pos] = step(accumulated[pos], value_of(record))
+        except KeyError as exc:
+            raise UnrecognisedReferenceError(f"{{{exc.args[0]}}}") from None
+        return groups
+
+    def results(self, groups):
+        # Returns a row for each group, holding the selected columns. Aggregating no records without GROUP BY fields
+        # still produces a single row, as in SQL
+        if not groups and not self.group_keys:
+            groups = {(): [aggregate.initial for aggregate in self.aggregates]}
+        positions = {key: pos for pos, key in enumerate(self.group_keys)}
+        rows = []
+        for group, accumulated in groups.items():
+            finished = iter(
+                aggregate.finish(value) if aggregate.finish else value
+                for aggregate, value in zip(self.aggregates, accumulated)
+            )
+            row = {}
+            for column in self.columns:
+                if isinstance(column, _Aggregate):
+                    row[column.name] = next(finished)
+                else:
+                    row[column] = group[positions[column]]
+            rows.append(row)
+        return rows
+
+    def aggregate(self, records):
+        return self.results(self.update(self.start(), records))
@@ -0,0 +1,105 @@
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+from .parser import _Parser
+
+DEFAULT_CACHE_SIZE = 256
+
+CacheInfo = namedtuple(
+    "CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"]
+)
+
+
+class _QueryCache:
+    """
+    Constructs a least recently used cache of parsed SQL statements, keyed on the SQL text. Parsed statements hold
+    no state specific to the data being filtered, so may be shared between filters
+    :param maxsize: Maximum number of parsed statements to hold, zero disables caching
+    :raises ValueError: Raised if maxsize is negative
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self._lock = Lock()
+        self._parsers = OrderedDict()
+        self._maxsize = 0
+        self.resize(maxsize)
+        self.clear()
+
+    def get(self, sql: str) -> _Parser:
+        with self._lock:
+            parser = self._parsers.get(sql)
+            if parser is not None:
+                self._parsers.move_to_end(sql)
+                self._hits += 1
+                return parser
+            self._misses += 1
+
+        # Parse outside of the lock, so that other threads are not held up. Errors are raised before anything
+        # is stored, so invalid SQL is never cached
+        parser = _Parser(sql)
+        with self._lock:
+            if self._maxsize:
+                self._parsers[sql] = parser
+                self._evict()
+        return parser
+
+    def clear(self):
+        with self._lock:
+            self._parsers.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                self._hits,
+                self._misses,
+                self._evictions,
+                self._maxsize,
+                len(self._parsers),
+            )
+
+    def resize(self, maxsize: int):
+        if maxsize < 0:
+            raise ValueError("Cache size must not be negative")
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    def _evict(self):
+        while len(self._parsers) > self._maxsize:
+            self._parsers.popitem(last=False)
+            self._evictions += 1
+
+
+_cache = _QueryCache()
+
+"""
+Clears the cache of parsed SQL statements, resetting the cache statistics
+"""
+
+
+def clear_cache():
+    _cache.clear()
+
+
+"""
+Returns statistics on the cache of parsed SQL statements
+:returns: CacheInfo named tuple of hits, misses, evictions, maxsize and currsize
+"""
+
+
+def cache_info() -> CacheInfo:
+    return _cache.info()
+
+
+"""
+Sets the maximum number of parsed SQL statements held in the cache, evicting the least recently used if necessary
+:param maxsize: Maximum number of statements to hold, zero disables caching
+:raises ValueError: Raised if maxsize is negative
+"""
+
+
+def set_cache_size(maxsize: int):
+    _cache.resize(maxsize)
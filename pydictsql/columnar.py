@@ -0,0 +1,170 @@
+from itertools import compress
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class _ListMasks:
+    """
+    Evaluates conditions over columns held as plain Python sequences, producing masks as lists of booleans.
+    Used when numpy is not installed
+    """
+
+    @staticmethod
+    def column(values):
+        return values
+
+    @staticmethod
+    def full(length, value):
+        return [value] * length
+
+    @staticmethod
+    def compare(op, lcolumn, literal):
+        # Literals are converted once for each type of value found in the column
+        converted = {str: literal}
+        result = []
+        for lvalue in lcolumn:
+            ltype = type(lvalue)
+            if ltype not in converted:
+                converted[ltype] = (
+                    literal if isinstance(lvalue, str) else ltype(literal)
+                )
+            result.append(op(lvalue, converted[ltype]))
+        return result
+
+    @staticmethod
+    def isin(lcolumn, literals):
+        # As with compare, literals are converted once for each type of value found in the column
+        converted = {str: frozenset(literals)}
+        result = []
+        for lvalue in lcolumn:
+            ltype = type(lvalue)
+            if ltype not in converted:
+                converted[ltype] = frozenset(
+                    literals if isinstance(lvalue, str) else map(ltype, literals)
+                )
+            result.append(lvalue in converted[ltype])
+        return result
+
+    @staticmethod
+    def apply(column, test):
+        return [test(value) for value in column]
+
+    @staticmethod
+    def compare_columns(op, lcolumn, rcolumn):
+        return [
+            op(lvalue, rvalue if isinstance(lvalue, str) else type(lvalue)(rvalue))
+            for lvalue, rvalue in zip(lcolumn, rcolumn)
+        ]
+
+    @staticmethod
+    def and_(lmask, rmask):
+        return [lvalue and rvalue for lvalue, rvalue in zip(lmask, rmask)]
+
+    @staticmethod
+    def or_(lmask, rmask):
+        return [lvalue or rvalue for lvalue, rvalue in zip(lmask, rmask)]
+
+    @staticmethod
+    def not_(mask):
+        return [not value for value in mask]
+
+    @staticmethod
+    def select(column, mask):
+        return list(compress(column, mask))
+
+    @staticmethod
+    def positions(mask):
+        return [pos for pos, selected in enumerate(mask) if selected]
+
+    @staticmethod
+    def take(column, positions):
+        return [column[pos] for pos in positions]
+
+    @staticmethod
+    def values(column):
+        return list(column)
+
+
+class _NumpyMasks:
+    """
+    Evaluates conditions over columns held as numpy arrays, producing boolean arrays as masks
+    """
+
+    @staticmethod
+    def column(values):
+        return numpy.asarray(values)
+
+    @staticmethod
+    def full(length, value):
+        return numpy.full(length, value, dtype=bool)
+
+    @staticmethod
+    def compare(op, lcolumn, literal):
+        if lcolumn.dtype.kind == "O":
+            # Mixed or arbitrary python objects, so apply the same per value rules as for lists
+            return numpy.array(_ListMasks.compare(op, lcolumn, literal), dtype=bool)
+        if lcolumn.dtype.kind not in "US":
+            literal = lcolumn.dtype.type(literal)
+        return numpy.asarray(op(lcolumn, literal), dtype=bool)
+
+    @staticmethod
+    def isin(lcolumn, literals):
+        if lcolumn.dtype.kind == "O":
+            return numpy.array(_ListMasks.isin(lcolumn, literals), dtype=bool)
+        if lcolumn.dtype.kind not in "US":
+            literals = [lcolumn.dtype.type(literal) for literal in literals]
+        return numpy.isin(lcolumn, literals)
+
+    @staticmethod
+    def apply(column, test):
+        # Tests each value in turn, for conditions which can't be vectorised
+        return numpy.fromiter(map(test, column), dtype=bool, count=len(column))
+
+    @staticmethod
+    def compare_columns(op, lcolumn, rcolumn):
+        if lcolumn.dtype.kind == "O" or rcolumn.dtype.kind == "O":
+            return numpy.array(
+                _ListMasks.compare_columns(op, lcolumn, rcolumn), dtype=bool
+            )
+        if lcolumn.dtype.kind in "US":
+            rcolumn = rcolumn.astype(str)
+        elif rcolumn.dtype != lcolumn.dtype:
+            rcolumn = rcolumn.astype(lcolumn.dtype)
+        return numpy.asarray(op(lcolumn, rcolumn), dtype=bool)
+
+    @staticmethod
+    def and_(lmask, rmask):
+        return lmask & rmask
+
+    @staticmethod
+    def or_(lmask, rmask):
+        return lmask | rmask
+
+    @staticmethod
+    def not_(mask):
+        return ~mask
+
+    @staticmethod
+    def select(column, mask):
+        return column[mask]
+
+    @staticmethod
+    def positions(mask):
+        return numpy.flatnonzero(mask).tolist()
+
+    @staticmethod
+    def take(column, positions):
+        return column[numpy.asarray(positions, dtype=numpy.intp)]
+
+    @staticmethod
+    def values(column):
+        # Converts numpy scalars back to their python equivalents
+        return column.tolist()
+
+
+def _masks():
+    # Use numpy when it is available, falling back on pure python otherwise
+    return _ListMasks if numpy is None else _NumpyMasks
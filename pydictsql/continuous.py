@@ -0,0 +1,132 @@
+from collections.abc import Sequence
+from itertools import count
+from typing import Callable, Iterable, Optional
+
+from .dictfilter import DictFilter
+
+"""
+A continuous query reads a list which only grows by appending, such as a buffer of log records, a little at a time.
+The query remembers how many records it has read, its high-water mark, so each update only reads the records appended
+since the last one. When aggregating, the accumulated value of each function for each group is held between updates,
+so that the results can be brought up to date from the new records alone. A LIMIT and OFFSET apply to the matches
+across every update, so once the LIMIT is reached later records are not read at all.
+"""
+
+
+class ContinuousQuery(DictFilter):
+    """
+    Constructs a ContinuousQuery, which behaves as a DictFilter but also applies the SQL to a list that is appended to
+    between calls of update(), reading only the records appended since the last update. ORDER BY is only supported when
+    aggregating, as rows that have already been returned can't be reordered
+    :param sql: SQL Select statement which is used to filter data
+    :param callbacks: Callables each passed the rows returned by an update, whenever newly appended records match
+    :param kwargs: Further parameters of DictFilter, such as row_type or schema
+    :raises InvalidTokenError: Raised when tokenising and an invalid value is read
+    :raises UnexpectedTokenError: Raised when an unexpected token is encountered parsing the SQL
+    :raises ValueError: Raised if the SQL joins several sources, or orders records without aggregating them, or if a
+    parameter of DictFilter is invalid
+    """
+
+    def __init__(
+        self,
+        sql: str,
+        callbacks: Optional[Iterable[Callable[[list], None]]] = None,
+        **kwargs,
+    ):
+        super().__init__(sql, **kwargs)
+        if len(self._parser.sources()) > 1:
+            raise ValueError("A continuous query can't join several sources")
+        if self._parser.ordered() and self._parser.grouping() is None:
+            raise ValueError("A continuous query can only ORDER BY when aggregating")
+        self._callbacks = list(callbacks or [])
+        self.reset()
+
+    """
+    Adds a callable to those passed the rows returned by an update, whenever newly appended records match
+    :param callback: Callable taking a list of rows
+    """
+
+    def add_callback(self, callback: Callable[[list], None]):
+        self._callbacks.append(callback)
+
+    """
+    Forgets the records read and any aggregated results, so that the next update reads the data from the start, as is
+    needed if records are removed from the data, or an update raised an error part way through the new records
+    """
+
+    def reset(self):
+        self._position = 0
+        self._skip, self._remaining = self._parser.window()
+        grouping = self._parser.grouping()
+        self._groups = None if grouping is None else grouping.start()
+
+    def position(self) -> int:
+        # Returns the number of records read so far, the high-water mark
+        return self._position
+
+    """
+    Applies the SQL to the records appended to the data since the last update, or to all of the data on the first
+    update, and passes the rows returned to each callback if any of the records matched
+    :param kwargs: Single named argument providing the list or tuple of records. The name of the argument must match the FROM reference in the SQL
+    :returns: When aggregating, the aggregated rows of all the records read so far, otherwise the rows of the newly read records matching the SQL criteria
+    :raises: ValueError if parameters are invalid, or the data holds fewer records than have already been read
+    :raises: UnrecognisedReferenceError if a reference is made to a field not in the data
+    """
+
+    def update(self, **kwargs) -> list:
+        self._validate_name(**kwargs)
+        records = next(iter(kwargs.values()))
+        if not isinstance(records, Sequence) or isinstance(
+            records, (str, bytes, bytearray, memoryview)
+        ):
+            raise ValueError(
+                "Data to be queried continuously must be a list or tuple of records"
+            )
+        end = len(records)
+        if end < self._position:
+            raise ValueError(
+                "Data holds fewer records than have already been read, so must be reset"
+            )
+        with self._query():
+            rows, matched = self._update(records, end)
+        self._position = end
+        if matched:
+            for callback in self._callbacks:
+                callback(rows)
+        return rows
+
+    def _update(self, records, end):
+        # Returns the rows of an update, and whether any of the new records matched. Only records up to end are read,
+        # so any appended while they are filtered are left for the next update
+        grouping = self._parser.grouping()
+        if end == self._position or (grouping is None and self._remaining == 0):
+            return self._results(), False
+        new, satisfied = self._prepare(records[self._position : end])
+        matches = (record for record in new if satisfied(record))
+        if grouping is not None:
+            # The counter is only advanced for each match zip takes, so ends at the number of matches
+            counter = count()
+            grouping.update(
+                self._groups, (record for record, _ in zip(matches, counter))
+            )
+            return self._results(), next(counter) > 0
+        rows = []
+        for record in matches:
+            if self._skip:
+                self._skip -= 1
+                continue
+            rows.append(record)
+            if self._remaining is not None:
+                self._remaining -= 1
+                if not self._remaining:
+                    # No later record can be returned, so there is no need to read the rest
+                    break
+        return self._project_batch(rows), bool(rows)
+
+    def _results(self):
+        # Returns the aggregated rows of all the records read so far, or no rows when not aggregating
+        grouping = self._parser.grouping()
+        if grouping is None:
+            return []
+        rows = self._parser.arrange(grouping.results(self._groups), self._sort_buffer)
+        return self._project_batch(list(rows))
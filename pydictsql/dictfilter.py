@@ -1,20 +1,147 @@
-from .parser import _Parser
-from typing import Union, Generator
+import asyncio
+from collections.abc import AsyncIterable, Iterable, Set
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from itertools import chain, islice
+from time import perf_counter
+
+from .cache import _cache
+from .columnar import _masks
+from .rows import ROW_TYPES
+from .sorting import DEFAULT_SORT_BUFFER
+from .sources import Source
+from .stats import ConditionStats, QueryStats
+from typing import Callable, Iterable as IterableType, Optional, Union, Mapping
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _filter_chunk(sql, options, chunk):
+    # Run within a worker process, so the filter is rebuilt from the SQL and its options rather than the parser being
+    # pickled. Matches are returned unprojected, to be projected by the filter in the parent process
+    return DictFilter(sql, **options)._filter_batch(chunk)
 
 
 class DictFilter:
     """
     Constructs a DictFilter object, taking the SQL which will be applied to filter data
     :param sql: SQL Select statement which is used to filter data
+    :param sample_size: Number of records at the start of the data used to measure the selectivity of each condition,
+    so that conditions are evaluated in the most efficient order. By default static estimates are used instead
+    :param row_type: Type of the rows returned for matching records. "dict" (the default) returns a new dict of the
+    selected fields, "view" returns a read only mapping of the selected fields which references the record rather than
+    copying it, and "tuple" returns a named tuple of the selected fields
+    :param sort_buffer: Number of records sorted in memory when applying an ORDER BY without a LIMIT. Beyond this, sorted
+    runs of records are written to temporary files and merged
+    :param schema: Optional mapping of field name to the type of its value in every record (or None if the type varies),
+    binding the filter to records of that shape, as bind does
+    :param strict: When bound to a schema, check every strict'th record against it. By default records aren't checked
+    :param stats: Collect statistics of the queries run, available as the stats attribute, see QueryStats
+    :param hooks: Callables each passed the QueryStats of a single query once it finishes. Statistics are collected if
+    any hooks are given
     :raises InvalidTokenError: Raised when tokenising and an invalid value is read
     :raises UnexpectedTokenError: Raised when an unexpected token is encountered parsing the SQL
+    :raises UnrecognisedReferenceError: Raised if the schema is missing a field referenced by the SQL
+    :raises ValueError: Raised if sample_size or strict is negative, sort_buffer is less than one, row_type is invalid,
+    or a schema is given for SQL joining several sources
+    """
+
+    def __init__(
+        self,
+        sql: str,
+        sample_size: int = 0,
+        row_type: str = "dict",
+        sort_buffer: int = DEFAULT_SORT_BUFFER,
+        schema: Optional[Mapping[str, Optional[type]]] = None,
+        strict: int = 0,
+        stats: bool = False,
+        hooks: Optional[IterableType[Callable[[QueryStats], None]]] = None,
+    ):
+        if sample_size < 0:
+            raise ValueError("Sample size must not be negative")
+        if strict < 0:
+            raise ValueError("Strict must not be negative")
+        if sort_buffer < 1:
+            raise ValueError("Sort buffer must be at least one")
+        if row_type not in ROW_TYPES:
+            raise ValueError(f"Row type must be one of {', '.join(ROW_TYPES)}")
+        self._sql = sql
+        self._sample_size = sample_size
+        self._sort_buffer = sort_buffer
+        self._row_type = row_type
+        # Parsed statements are cached, so constructing a filter for previously seen SQL does not reparse it
+        start = perf_counter()
+        self._parser = _cache.get(sql)
+        parse_time = perf_counter() - start
+        if row_type == "tuple" and self._parser.referenced_fields() is None:
+            raise ValueError("Tuple rows require the selected fields to be listed")
+        self._project, self._project_batch = self._parser.projectors(row_type)
+        self._strict = strict
+        self._schema = None
+        self._hooks = list(hooks or [])
+        self.stats = QueryStats(sql) if stats or self._hooks else None
+        if self.stats is None:
+            self._predicate = self._parser.predicate
+        else:
+            # The cached parser is shared, so the filter compiles its own plan to count the evaluation of conditions
+            self.stats.parse_time = parse_time
+            self._predicate = self._parser.compile(
+                self._parser.plan(), stats=self.stats
+            )
+            self._project = self.stats.timed_projection(self._project)
+            self._project_batch = self.stats.timed_batch_projection(self._project_batch)
+        if schema is not None:
+            self._bind(schema)
+
+    """
+    Binds the filter to records of the same shape as the given record, that is having the same fields with values of
+    the same types. References are then checked once, here, and literals converted once to the type of the field they
+    are compared against, rather than for each record. Fields whose value is None in the record may be of any type. If
+    strict was given when constructing the filter, every strict'th record is checked to be of the same shape
+    :param record: Record typical of those to be filtered
+    :returns: The filter itself
+    :raises: UnrecognisedReferenceError if a reference is made to a field not in the record
+    :raises: ValueError if the SQL joins several sources
+    """
+
+    def bind(self, record: Mapping) -> "DictFilter":
+        self._bind(
+            {
+                key: None if value is None else type(value)
+                for key, value in record.items()
+            }
+        )
+        return self
+
+    """
+    Describes the plan used to apply the SQL, one step per line: how each source is read, the conditions of the WHERE
+    clause as simplified and planned, in the order they are evaluated along with their estimated relative cost and
+    selectivity (the proportion of records expected to satisfy them), then any aggregation, ordering and limit, and the
+    fields projected. Given the data, also describes how it is read, such as through an index. If analyze is set, the
+    query is run over the data, and each condition shown with the number of records it was evaluated for, the number
+    satisfying it and the time taken, followed by the totals for the query
+    :param analyze: Run the query, showing the actual numbers of records and times
+    :param kwargs: Optionally, the data to be filtered, named as for filter(). Required if analyze is set
+    :returns: String describing the plan, one step per line
+    :raises: ValueError if parameters are invalid, or analyze is set without the data
+    :raises: UnrecognisedReferenceError if analyzing and a reference is made to a field not in the data
     """
 
-    def __init__(self, sql: str):
-        self._parser = _Parser(sql)
+    def explain(self, analyze: bool = False, **kwargs) -> str:
+        if not kwargs:
+            if analyze:
+                raise ValueError(
+                    "The data to be filtered must be given to analyze the query"
+                )
+            return self._parser.explain(row_type=self._row_type)
+        self._validate(**kwargs)
+        if analyze:
+            return self._analyze(kwargs)
+        return self._parser.explain(self._source(kwargs), self._row_type)
 
     """
-    Applies the SQL provided when instantiated to a list, tuple of records or generator, returning those that match the criteria
+    Applies the SQL provided when instantiated to a list, tuple of records, generator or source (such as an IndexedCollection or NdjsonSource), returning those that match the criteria
     :param kwargs: Single named argument providing the collection to be filtered. The name of the argument must match the FROM reference in the SQL
     :returns: Collection of the same type provided, containing only the records in the source data that match the SQL criteria
     :raises: ValueError if parameters are invalid
@@ -23,15 +150,16 @@ class DictFilter:
 
     def filter(self, **kwargs) -> Union[list, tuple]:
         self._validate(**kwargs)
-        coll_name = next(iter(kwargs.keys()))
-        return (
-            tuple(self._filter(kwargs[coll_name]))
-            if isinstance(kwargs[coll_name], tuple)
-            else self._filter(kwargs[coll_name])
-        )
+        source = self._source(kwargs)
+        with self._query():
+            return (
+                tuple(self._filter(source))
+                if isinstance(source, tuple)
+                else self._filter(source)
+            )
 
     """
-    Applies the SQL provided when instantiated to a list, tuple of records or generator, yielding each machine record in turn
+    Applies the SQL provided when instantiated to a list, tuple of records, generator or source (such as an IndexedCollection or NdjsonSource), yielding each machine record in turn
     :param kwargs: Single named argument providing the collection to be filtered. The name of the argument must match the FROM reference in the SQL
     :yields: Each record matching the SQL criteria
     :raises: ValueError if parameters are invalid
@@ -40,12 +168,187 @@ class DictFilter:
 
     def filtergen(self, **kwargs):
         self._validate(**kwargs)
+        project = self._project
+        with self._query():
+            for record in self._matches(self._source(kwargs)):
+                yield project(record)
+
+    """
+    Applies the SQL provided when instantiated to a list, tuple of records, generator or source, yielding lists of
+    matching records. Records are read and filtered a batch at a time, with the selected fields of each batch of matches
+    projected together, so this is more efficient than filtergen when the records are to be processed in batches anyway
+    :param batch_size: Number of records read at a time, and the number of matching records in each list yielded
+    (other than the last, which may be shorter)
+    :param kwargs: Single named argument providing the collection to be filtered. The name of the argument must match the FROM reference in the SQL
+    :yields: Lists of records matching the SQL criteria
+    :raises: ValueError if parameters are invalid
+    :raises: UnrecognisedReferenceError if a reference is made to a field not in the data
+    """
+
+    def filter_batches(self, batch_size: int = DEFAULT_BATCH_SIZE, **kwargs):
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least one")
+        self._validate(**kwargs)
+        records, satisfied = self._prepare(self._source(kwargs))
+        records = iter(records)
+
+        def chunks():
+            while chunk := list(islice(records, batch_size)):
+                yield [record for record in chunk if satisfied(record)]
+
+        project_batch = self._project_batch
+        with self._query():
+            matches = self._arrange(chain.from_iterable(chunks()))
+            while batch := list(islice(matches, batch_size)):
+                yield project_batch(batch)
+
+    """
+    Applies the SQL provided when instantiated to an asynchronous iterable (or any source accepted by filter), returning
+    those records that match the criteria. Records are filtered in batches, so the event loop is not held up for each record
+    :param batch_size: Number of records filtered at a time
+    :param executor: Optional executor (thread or process pool) in which to filter each batch, rather than the event loop
+    :param kwargs: Single named argument providing the collection to be filtered. The name of the argument must match the FROM reference in the SQL
+    :returns: List containing only the records in the source data that match the SQL criteria
+    :raises: ValueError if parameters are invalid
+    :raises: UnrecognisedReferenceError if a reference is made to a field not in the data
+    """
+
+    async def afilter(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        executor: Optional[Executor] = None,
+        **kwargs,
+    ) -> list:
+        return [
+            record
+            async for record in self.afiltergen(
+                batch_size=batch_size, executor=executor, **kwargs
+            )
+        ]
+
+    """
+    Applies the SQL provided when instantiated to an asynchronous iterable (or any source accepted by filter), yielding
+    each matching record in turn. Records are filtered in batches, so the event loop is not held up for each record
+    :param batch_size: Number of records filtered at a time
+    :param executor: Optional executor (thread or process pool) in which to filter each batch, rather than the event loop
+    :param kwargs: Single named argument providing the collection to be filtered. The name of the argument must match the FROM reference in the SQL
+    :yields: Each record matching the SQL criteria
+    :raises: ValueError if parameters are invalid
+    :raises: UnrecognisedReferenceError if a reference is made to a field not in the data
+    """
+
+    async def afiltergen(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        executor: Optional[Executor] = None,
+        **kwargs,
+    ):
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least one")
+        self._validate_name(**kwargs)
+        source = self._source(kwargs)
+        if not isinstance(source, AsyncIterable):
+            self._validate(**kwargs)
+
+        # The parser can't be pickled, so worker processes are sent the SQL to rebuild it from
+        filter_batch = (
+            partial(_filter_chunk, self._sql, self._worker_options())
+            if isinstance(executor, ProcessPoolExecutor)
+            else self._filter_batch
+        )
+        loop = asyncio.get_running_loop()
+
+        async def batch_matches():
+            async for batch in self._abatches(source, batch_size):
+                if executor is None:
+                    matches = filter_batch(batch)
+                    # Give other tasks the chance to run between batches
+                    await asyncio.sleep(0)
+                else:
+                    matches = await loop.run_in_executor(executor, filter_batch, batch)
+                yield matches
+
+        with self._query():
+            if self._parser.blocking():
+                grouping = self._parser.grouping()
+                if grouping is None:
+                    # Every match is needed before the first row can be yielded
+                    rows = [
+                        record async for batch in batch_matches() for record in batch
+                    ]
+                else:
+                    # Matches are aggregated as each batch is filtered, so only the groups are held
+                    groups = grouping.start()
+                    async for batch in batch_matches():
+                        grouping.update(groups, batch)
+                    rows = grouping.results(groups)
+                rows = self._parser.arrange(rows, self._sort_buffer)
+                for row in self._project_batch(list(rows)):
+                    yield row
+                return
+
+            skip, remaining = self._parser.window()
+            if remaining == 0:
+                return
+            project = self._project
+            async for matches in batch_matches():
+                for record in matches:
+                    if skip:
+                        skip -= 1
+                        continue
+                    yield project(record)
+                    if remaining is not None:
+                        remaining -= 1
+                        if not remaining:
+                            # Stop once the limit is reached, without reading any more of the source
+                            return
+
+    """
+    Applies the SQL provided when instantiated to data held as columns rather than records, evaluating the conditions
+    over whole columns at once. Columns are handled as numpy arrays when numpy is installed, otherwise as lists
+    :param kwargs: Single named argument providing a mapping of field name to a sequence of values for that field. The name of the argument must match the FROM reference in the SQL
+    :returns: Dict mapping each selected field name to the values of that field in the records matching the SQL criteria
+    :raises: ValueError if parameters are invalid, or the columns are not all of the same length
+    :raises: UnrecognisedReferenceError if a reference is made to a field not in the data
+    """
+
+    def filter_columns(self, **kwargs) -> dict:
+        self._validate_name(**kwargs)
+        if len(kwargs) > 1:
+            raise ValueError("Columns can't be filtered by SQL joining several sources")
         coll_name = next(iter(kwargs.keys()))
-        for record in kwargs[coll_name]:
-            if self._parser.satisfied(record):
-                yield (self._parser.filter_fields(record))
+        if not isinstance(kwargs[coll_name], Mapping):
+            raise ValueError(
+                "Columns to be filtered must be a mapping of field name to values"
+            )
+        with self._query():
+            return self._parser.filter_columns(kwargs[coll_name], _masks())
 
-    def _validate(self, **kwargs):
+    async def _abatches(self, source, batch_size):
+        if self._parser.impossible():
+            return
+        if isinstance(source, AsyncIterable):
+            batch = []
+            async for record in source:
+                batch.append(record)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        else:
+            records = iter(self._scan(source))
+            while batch := list(islice(records, batch_size)):
+                yield batch
+
+    def _validate_name(self, **kwargs):
+        sources = self._parser.sources()
+        if len(sources) > 1:
+            if set(kwargs.keys()) != set(sources):
+                raise ValueError(
+                    "Method takes one named parameter for each source, matching the FROM and JOIN references"
+                )
+            return
         if len(kwargs) != 1:
             raise ValueError(
                 "Method takes one named parameter, denoting the data source"
@@ -53,14 +356,138 @@ class DictFilter:
         coll_name = next(iter(kwargs.keys()))
         if coll_name != self._parser.from_ref():
             raise ValueError("Collection name does not match FROM reference in SQL")
-        if not (
-            isinstance(kwargs[coll_name], list) or isinstance(kwargs[coll_name], tuple) or isinstance(kwargs[coll_name], Generator)
+
+    def _validate(self, **kwargs):
+        self._validate_name(**kwargs)
+        for source in kwargs.values():
+            if isinstance(source, Source):
+                continue
+            # Any iterable of records is accepted, but not those whose iteration produces something else, nor sets,
+            # whose order is arbitrary
+            if not isinstance(source, Iterable) or isinstance(
+                source, (str, bytes, bytearray, memoryview, Mapping, Set)
+            ):
+                raise ValueError(
+                    "Collection to be filtered must be an iterable of records, such as a list, tuple or generator, or a source"
+                )
+
+    def _bind(self, schema):
+        if len(self._parser.sources()) > 1:
+            raise ValueError("A schema can't be bound to SQL joining several sources")
+        if not all(
+            value is None or isinstance(value, type) for value in schema.values()
         ):
-            raise ValueError("Collection to be filtered must be a list, tuple or a generator")
+            raise ValueError("Schema must map each field name to a type, or None")
+        self._schema = dict(schema)
+        self._predicate = self._parser.bind(
+            self._schema, self._strict, stats=self.stats
+        )
+
+    def _source(self, kwargs):
+        # Returns the source named by the FROM reference, or when joining, the source of the joined records
+        if len(kwargs) > 1:
+            return self._parser.joined(kwargs)
+        return next(iter(kwargs.values()))
 
     def _filter(self, source):
-        return [
-            self._parser.filter_fields(record)
-            for record in source
-            if self._parser.satisfied(record)
-        ]
+        return self._project_batch(list(self._matches(source)))
+
+    def _filter_batch(self, records):
+        # Filters a batch of records, without applying any aggregation, ORDER BY, LIMIT or OFFSET, which apply across
+        # batches. Matches are left to be projected by the caller, once arranged if ordering or aggregating
+        records, satisfied = self._prepare(records)
+        return [record for record in records if satisfied(record)]
+
+    def _worker_options(self):
+        # Returns the options a worker process rebuilds the filter with, so that it filters as this filter does
+        return {
+            "sample_size": self._sample_size,
+            "schema": self._schema,
+            "strict": self._strict,
+        }
+
+    def _matches(self, source):
+        # Returns the rows satisfying the SQL, aggregated, ordered and limited as the SQL requires. Without an ORDER BY
+        # or aggregation this is lazy, so no more of the source is read than is needed
+        records, satisfied = self._prepare(source)
+        return self._arrange(record for record in records if satisfied(record))
+
+    def _arrange(self, matches):
+        # Applies any aggregation, then ORDER BY, LIMIT and OFFSET to the matching records
+        return self._parser.arrange(self._parser.aggregate(matches), self._sort_buffer)
+
+    def _prepare(self, source):
+        # Returns the records to be scanned, along with the predicate to apply to them
+        records, sample = self._sampled(source)
+        if self._schema is not None and (sample is not None or self._strict):
+            # Bound afresh, so that the records checked against the schema are counted from the start of the source
+            predicate = self._parser.bind(
+                self._schema, self._strict, sample, self.stats
+            )
+        elif sample is not None:
+            predicate = self._parser.compile(
+                self._parser.plan(sample), stats=self.stats
+            )
+        else:
+            predicate = self._predicate
+        return records, predicate if self.stats is None else self.stats.timed(predicate)
+
+    def _sampled(self, source):
+        # Returns the records to be scanned, and if sampling, the first of them from which the predicate is planned,
+        # having put them back in front of the rest
+        records = self._scan(source)
+        if not self._sample_size:
+            return records, None
+        records = iter(records)
+        sample = list(islice(records, self._sample_size))
+        return chain(sample, records), sample
+
+    def _analyze(self, kwargs):
+        # Runs the query with each condition counted and timed on its own, separately from any stats of the filter, and
+        # returns the plan explained with the results. Conditions pushed down to joined sources are counted too
+        stats = QueryStats(self._sql)
+        start = perf_counter()
+        if len(kwargs) > 1:
+            source = self._parser.joined(kwargs, ConditionStats)
+        else:
+            source = self._source(kwargs)
+        records, sample = self._sampled(source)
+        plan = self._parser.plan(sample)
+        if plan is not None:
+            plan = plan.counted(ConditionStats)
+        satisfied = stats.timed(self._parser.compile(plan, self._schema))
+        project_batch = stats.timed_batch_projection(
+            self._parser.projectors(self._row_type)[1]
+        )
+        project_batch(
+            list(self._arrange(record for record in records if satisfied(record)))
+        )
+        stats.queries, stats.elapsed = 1, perf_counter() - start
+        return self._parser.explain(source, self._row_type, plan, stats)
+
+    @contextmanager
+    def _query(self):
+        # Records the elapsed time of a query run by the filter, passing the statistics of that query alone to each hook
+        stats = self.stats
+        if stats is None:
+            yield
+            return
+        before = stats.copy()
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            stats.queries += 1
+            stats.elapsed += perf_counter() - start
+            query = stats.since(before)
+            for hook in self._hooks:
+                hook(query)
+
+    def _scan(self, source):
+        # Sources such as indexed collections may only produce the records which can satisfy the SQL, while no
+        # records at all can satisfy a where clause which is always false
+        if self._parser.impossible():
+            return ()
+        if isinstance(source, Source):
+            return source.records(self._parser)
+        return source
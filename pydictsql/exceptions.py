@@ -25,3 +25,14 @@ class UnrecognisedReferenceError(Exception):
 
     def __init__(self, reference):
         super().__init__(f"Unrecognised reference {reference}, not present in data.")
+
+
+class SchemaMismatchError(Exception):
+    """
+    Raised when a record checked against the schema a filter is bound to has a field of a different type
+    """
+
+    def __init__(self, reference, expected, found):
+        super().__init__(
+            f"Reference {reference} is of type {found.__name__}, expected {expected.__name__} as bound."
+        )
@@ -0,0 +1,159 @@
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+import operator
+from typing import Iterable, Union
+
+from .sources import Source
+
+
+class _FieldIndex:
+    """
+    Constructs the indexes for a single field: a hash index of value to positions for equality lookups, and where the
+    values can be ordered, a sorted index for range lookups. Positions of records without the field are kept, so that
+    they are always scanned and raise the appropriate error
+    :param records: Records to be indexed
+    :param field: Name of the field to index
+    """
+
+    def __init__(self, records, field: str):
+        self.hashed = {}
+        self.missing = []
+        self.types = set()
+        values = []
+        for pos, record in enumerate(records):
+            if field not in record:
+                self.missing.append(pos)
+                continue
+            value = record[field]
+            self.types.add(type(value))
+            if value == value:
+                values.append((value, pos))
+            # Otherwise the value is NaN, which no range comparison is true of, and which would disorder the index
+            if self.hashed is not None:
+                try:
+                    self.hashed.setdefault(value, []).append(pos)
+                except TypeError:
+                    # Unhashable values, so equality lookups are not possible on this field
+                    self.hashed = None
+        try:
+            values.sort(key=lambda item: item[0])
+            self.sorted_values = [value for value, _ in values]
+            self.sorted_positions = [pos for _, pos in values]
+        except TypeError:
+            # Values which can not be ordered against each other, so range lookups are not possible on this field
+            self.sorted_values = None
+            self.sorted_positions = None
+
+    def lookup(self, op, literal):
+        if op is operator.eq:
+            if self.hashed is None:
+                return None
+            search = lambda value: self.hashed.get(value, ())
+        elif op in _RANGES:
+            if self.sorted_values is None:
+                return None
+            search = lambda value: (
+                _RANGES[op](self.sorted_values, self.sorted_positions, value)
+                if value == value
+                else ()
+            )
+        else:
+            return None
+
+        # Literals are compared as the type of the value they are compared against, so search for the literal as
+        # converted to each type of value held. If it can't be converted, leave it to a scan to report the error
+        positions = set(self.missing)
+        for vtype in self.types:
+            try:
+                value = literal if issubclass(vtype, str) else vtype(literal)
+                positions.update(search(value))
+            except (TypeError, ValueError):
+                return None
+        return positions
+
+
+_RANGES = {
+    operator.lt: lambda values, positions, value: positions[
+        : bisect_left(values, value)
+    ],
+    operator.le: lambda values, positions, value: positions[
+        : bisect_right(values, value)
+    ],
+    operator.gt: lambda values, positions, value: positions[
+        bisect_right(values, value) :
+    ],
+    operator.ge: lambda values, positions, value: positions[
+        bisect_left(values, value) :
+    ],
+}
+
+
+class _Lookups:
+    """
+    Constructs a stand in for an IndexedCollection when finding the candidate records, recording the fields whose
+    indexes answer a lookup
+    :param indexed: IndexedCollection whose indexes are used
+    """
+
+    def __init__(self, indexed):
+        self.indexed = indexed
+        self.fields = set()
+
+    def lookup(self, field, op, literal):
+        positions = self.indexed.lookup(field, op, literal)
+        if positions is not None:
+            self.fields.add(field)
+        return positions
+
+
+class IndexedCollection(Sequence, Source):
+    """
+    Constructs an IndexedCollection, holding records along with indexes on the given fields. When passed to a
+    DictFilter, conditions comparing an indexed field to a literal are answered from the indexes, so that only the
+    records which may match are scanned. The records should not be modified once indexed
+    :param records: List, tuple or other iterable of records to be held
+    :param fields: Name or names of the fields to be indexed
+    """
+
+    def __init__(self, records: Iterable[dict], fields: Union[str, Iterable[str]]):
+        self._records = tuple(records)
+        self._indexes = {}
+        for field in [fields] if isinstance(fields, str) else fields:
+            self.add_index(field)
+
+    """
+    Builds an index on the given field, in addition to any already built
+    :param field: Name of the field to be indexed
+    """
+
+    def add_index(self, field: str):
+        self._indexes[field] = _FieldIndex(self._records, field)
+
+    def indexed_fields(self):
+        return set(self._indexes.keys())
+
+    def lookup(self, field, op, literal):
+        # Returns the set of positions of records which may satisfy the comparison, or None if it can't be answered
+        # from the indexes
+        index = self._indexes.get(field)
+        return index.lookup(op, literal) if index else None
+
+    def records(self, parser):
+        positions = parser.candidates(self)
+        if positions is None:
+            return iter(self._records)
+        return (self._records[pos] for pos in sorted(positions))
+
+    def access(self, parser):
+        lookups = _Lookups(self)
+        positions = parser.candidates(lookups)
+        if positions is None or not lookups.fields:
+            return None
+        fields = ", ".join(f"{{{field}}}" for field in sorted(lookups.fields))
+        return f"INDEX ON {fields} ({len(positions)} of {len(self)} records)"
+
+    def __getitem__(self, pos):
+        return self._records[pos]
+
+    def __len__(self):
+        return len(self._records)
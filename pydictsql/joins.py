@@ -0,0 +1,187 @@
+from collections.abc import Sized
+
+from .exceptions import UnrecognisedReferenceError
+from .planner import _And, _plan, _required_literals
+from .rows import _tuple_getter
+from .sources import Source
+
+"""
+Joins are executed as hash joins. The records of one source are read into a hash table keyed on the fields joined on,
+then the records of the other are streamed through, each looking up the records it joins with. Records are read from
+each source already filtered by the conditions of the WHERE clause which only reference that source, so that only the
+records which may be joined are held or looked up. The fields of joined records are named by their source, for example
+"a.id", so records are only copied into the joined records once they are known to join.
+"""
+
+
+class _Join:
+    """
+    Constructs a join of a source to those before it in the SQL, matching records with equal values of pairs of fields
+    :param name: Name of the source joined
+    :param left_keys: Names of the fields of the earlier sources, qualified by source, for example "a.id"
+    :param right_keys: Names of the fields of the source joined, each compared with the left key in the same position
+    :param conditions: Text of each comparison, as written in the SQL
+    """
+
+    def __init__(self, name, left_keys, right_keys, conditions):
+        self.name = name
+        self.left_keys = left_keys
+        self.right_keys = right_keys
+        self.conditions = conditions
+
+    def __repr__(self):
+        return f"{{{self.name}}} ON {' AND '.join(self.conditions)}"
+
+
+def _push_down(node, names):
+    """
+    Splits the top level conditions of a WHERE clause between those which only reference a single source, and so can be
+    applied to its records before they are joined, and the rest, which are applied to the joined records
+    :param node: Root plan node of the lowered WHERE clause
+    :param names: Names of the sources joined
+    :returns: Dict of source name to the plan node of the conditions pushed down to it, with its fields unqualified, and
+    the plan node of the remaining conditions, or None if there are none
+    """
+    pushed = {}
+    remaining = []
+    for operand in node.operands if isinstance(node, _And) else [node]:
+        references = operand.references()
+        for name in names:
+            prefix = name + "."
+            if references and all(key.startswith(prefix) for key in references):
+                pushed.setdefault(name, []).append(operand.unqualified(prefix))
+                break
+        else:
+            remaining.append(operand)
+    return (
+        {name: _plan(_And.of(operands)) for name, operands in pushed.items()},
+        _And.of(remaining) if remaining else None,
+    )
+
+
+class _JoinSide:
+    """
+    Constructs one of the sources of a join, along with the conditions pushed down to it. Sources are given the side
+    in place of the parser, so that sources such as an IndexedCollection can use the conditions pushed down to them,
+    in terms of the names of their own fields
+    :param name: Name of the source
+    :param source: Records of the source, or a source object
+    :param plan: Plan node of the conditions pushed down to the source, or None
+    :param fields: Names of the fields of the source needed by the SQL, or None if all fields are selected
+    """
+
+    def __init__(self, name, source, plan, fields):
+        self.name = name
+        self.source = source
+        self.plan = plan
+        self.fields = fields
+        self.prefix = name + "."
+
+    def candidates(self, indexed):
+        return None if self.plan is None else self.plan.candidates(indexed)
+
+    def referenced_fields(self):
+        return self.fields
+
+    def required_literals(self, fields):
+        return _required_literals(self.plan, fields)
+
+    def size(self):
+        # Returns the number of records before filtering, or None if it isn't known without reading them
+        return len(self.source) if isinstance(self.source, Sized) else None
+
+    def records(self):
+        records = (
+            self.source.records(self)
+            if isinstance(self.source, Source)
+            else self.source
+        )
+        if self.plan is None:
+            return iter(records)
+        return filter(self.plan.compile(), records)
+
+    def qualifier(self):
+        # Returns a function copying a record with its fields named by the source
+        prefix = self.prefix
+        if self.fields is None:
+            return lambda record: {prefix + key: value for key, value in record.items()}
+        fields = [(prefix + key, key) for key in sorted(self.fields)]
+
+        def qualify(record):
+            try:
+                return {qualified: record[key] for qualified, key in fields}
+            except KeyError as exc:
+                raise self.unrecognised(exc.args[0]) from None
+
+        return qualify
+
+    def unrecognised(self, key):
+        return UnrecognisedReferenceError(f"{{{self.prefix}{key}}}")
+
+
+def _hash_join(rows, side, join, build_left):
+    # Joins rows of the earlier sources, already qualified, with the records of the side. The hash table is built
+    # from the rows if build_left is set, otherwise from the side's records
+    left_key = _tuple_getter(join.left_keys)
+    right_key = _tuple_getter(join.right_keys)
+    qualify = side.qualifier()
+    table = {}
+    if build_left:
+        try:
+            for row in rows:
+                key = left_key(row)
+                if None not in key:
+                    table.setdefault(key, []).append(row)
+        except KeyError as exc:
+            raise UnrecognisedReferenceError(f"{{{exc.args[0]}}}") from None
+        try:
+            for record in side.records():
+                matches = table.get(right_key(record))
+                if matches:
+                    joined = qualify(record)
+                    for row in matches:
+                        yield {**row, **joined}
+        except KeyError as exc:
+            raise side.unrecognised(exc.args[0]) from None
+    else:
+        try:
+            for record in side.records():
+                key = right_key(record)
+                if None not in key:
+                    table.setdefault(key, []).append(qualify(record))
+        except KeyError as exc:
+            raise side.unrecognised(exc.args[0]) from None
+        try:
+            for row in rows:
+                for joined in table.get(left_key(row), ()):
+                    yield {**row, **joined}
+        except KeyError as exc:
+            raise UnrecognisedReferenceError(f"{{{exc.args[0]}}}") from None
+
+
+class _Joined(Source):
+    """
+    Constructs the source of a query joining several sources, producing the joined records of each combination of
+    records satisfying the join conditions. Sources are joined in the order they appear in the SQL
+    :param sides: _JoinSide for each source
+    :param joins: _Join for each source after the first
+    """
+
+    def __init__(self, sides, joins):
+        self._sides = sides
+        self._joins = joins
+
+    def sides(self):
+        return self._sides
+
+    def records(self, parser):
+        first = self._sides[0]
+        rows = map(first.qualifier(), first.records())
+        # Build the hash table from the smaller of the first two sources, if their sizes are known. Otherwise, and for
+        # the sources joined after, the rows joined so far are streamed through a table of the source joined
+        left, right = (side.size() for side in self._sides[:2])
+        build_left = left is not None and (right is None or left < right)
+        for side, join in zip(self._sides[1:], self._joins):
+            rows = _hash_join(rows, side, join, build_left)
+            build_left = False
+        return rows
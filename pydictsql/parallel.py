@@ -0,0 +1,70 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Optional
+
+from .dictfilter import DictFilter, _filter_chunk
+
+
+class ParallelDictFilter(DictFilter):
+    """
+    Constructs a ParallelDictFilter object, which behaves as a DictFilter but splits lists and tuples into chunks which
+    are filtered across a pool of worker processes
+    :param sql: SQL Select statement which is used to filter data
+    :param workers: Number of worker processes to use, defaults to the number of processors on the machine
+    :param chunksize: Number of records passed to a worker process at a time
+    :param kwargs: Further parameters of DictFilter, such as row_type, schema or stats. Worker processes filter with the
+    same schema, strict and sample_size. Statistics count the records each worker scanned and matched, but not the time
+    workers spend evaluating the WHERE clause, nor the evaluations of each condition
+    :raises InvalidTokenError: Raised when tokenising and an invalid value is read
+    :raises UnexpectedTokenError: Raised when an unexpected token is encountered parsing the SQL
+    :raises ValueError: Raised if workers or chunksize is not a positive number, or if a parameter of DictFilter is
+    invalid
+    """
+
+    def __init__(
+        self,
+        sql: str,
+        workers: Optional[int] = None,
+        chunksize: int = 10000,
+        **kwargs,
+    ):
+        super().__init__(sql, **kwargs)
+        if workers is not None and workers < 1:
+            raise ValueError("Number of workers must be at least one")
+        if chunksize < 1:
+            raise ValueError("Chunk size must be at least one")
+        self._workers = workers
+        self._chunksize = chunksize
+
+    def _filter(self, source):
+        # Generators are consumed serially, as are collections too small to be worth distributing, and sources which
+        # can't match at all
+        if (
+            not isinstance(source, (list, tuple))
+            or len(source) <= self._chunksize
+            or self._parser.impossible()
+        ):
+            return super()._filter(source)
+        chunks = (
+            source[pos : pos + self._chunksize]
+            for pos in range(0, len(source), self._chunksize)
+        )
+        result = []
+        # When ordering or aggregating, every match is needed regardless of any LIMIT
+        wanted = None if self._parser.blocking() else self._parser.wanted()
+        with ProcessPoolExecutor(max_workers=self._workers) as executor:
+            # map returns results in the order of the chunks, so the original order is retained
+            results = executor.map(
+                _filter_chunk, repeat(self._sql), repeat(self._worker_options()), chunks
+            )
+            for pos, matches in zip(range(0, len(source), self._chunksize), results):
+                if self.stats is not None:
+                    self.stats.rows_scanned += min(self._chunksize, len(source) - pos)
+                    self.stats.rows_matched += len(matches)
+                result.extend(matches)
+                if wanted is not None and len(result) >= wanted:
+                    # Enough records to satisfy the LIMIT, so abandon the chunks not yet filtered
+                    executor.shutdown(cancel_futures=True)
+                    break
+        # Matches are returned unprojected, so are projected here once arranged
+        return self._project_batch(list(self._arrange(result)))
@@ -1,17 +1,61 @@
-from .exceptions import UnexpectedTokenError, UnrecognisedReferenceError
-from .tokeniser import _Tokeniser, _TokenType
+from copy import copy
+from functools import reduce
+from itertools import count, islice
+import operator
+from operator import itemgetter
+import re
+
+from .aggregates import _Aggregate, _Grouping
+from .exceptions import (
+    SchemaMismatchError,
+    UnexpectedTokenError,
+    UnrecognisedReferenceError,
+)
+from .joins import _Join, _Joined, _JoinSide, _push_down
+from .planner import (
+    _JSON_SAFE,
+    _LOOKUP_COST,
+    _PATTERN_COST,
+    _REFERENCE_COST,
+    _SELECTIVITY,
+    _STRING_COST,
+    _And,
+    _Constant,
+    _Leaf,
+    _Not,
+    _Or,
+    _plan,
+    _required_literals,
+    _simplify,
+)
+from .rows import _tuple_class, _tuple_getter, _view_class
+from .sorting import DEFAULT_SORT_BUFFER, _Ordering
+from .sources import Source
+from .tokeniser import _SYMBOL_TYPES, _Token, _Tokeniser, _TokenType
 
 """
 Supported grammar:
-Statement ::= SELECT <References> FROM REFERENCE [WHERE <Where_Clause>]
+Statement ::= SELECT <References> FROM REFERENCE {JOIN REFERENCE ON <Join_Condition>} [WHERE <Where_Clause>]
+              [GROUP BY <Group_List>] [ORDER BY <Order_List>] [LIMIT NUMBER [OFFSET NUMBER]]
 References ::= ASTERISK | ReferenceList
-ReferenceList ::= REFERENCE | REFERENCE COMMA ReferenceList
+ReferenceList ::= <Column> | <Column> COMMA ReferenceList
+Column ::= REFERENCE | COUNT LPAREN ASTERISK RPAREN | AGGREGATE LPAREN REFERENCE RPAREN
 Where_Clause ::= <Where_Term> [OR Where_Clause]
 Where_Term ::= <Where_Factor> [AND <Where_Term>]
 Where_Factor ::= <Where_Primary> | NOT <Where_Primary>
 Where_Primary ::= LPAREN Where_Clause RPAREN | Condition
-Condition ::= REFERENCE COMPARATOR <RValue>
+Condition ::= REFERENCE COMPARATOR <RValue> | REFERENCE [NOT] IN LPAREN <Literal_List> RPAREN
+              | REFERENCE [NOT] BETWEEN <Literal> AND <Literal> | REFERENCE [NOT] LIKE STRING
 RValue ::= REFERENCE | NUMBER | STRING
+Literal ::= NUMBER | STRING
+Literal_List ::= <Literal> | <Literal> COMMA Literal_List
+Join_Condition ::= REFERENCE EQUALS REFERENCE [AND Join_Condition]
+Group_List ::= REFERENCE | REFERENCE COMMA Group_List
+Order_List ::= REFERENCE [ASC | DESC] | REFERENCE [ASC | DESC] COMMA Order_List
+AGGREGATE is any of COUNT, SUM, MIN, MAX or AVG. When the SELECT list includes an aggregate, or there is a GROUP BY,
+every REFERENCE selected must be in the Group_List, and ORDER BY refers to the selected columns by name, for example
+{COUNT(*)} or {SUM(sales)}. When sources are joined, every REFERENCE names a field qualified by its source, such as
+{a.id}, and each comparison of a Join_Condition compares a field of the source joined with one of an earlier source
 """
 
 
@@ -24,24 +68,168 @@ class _References:
     def __init__(self):
         self.all_references = False
         self.references = []
+        # For each column, the name of the field selected or the aggregate function applied
+        self.columns = []
+        self.keys = []
 
     def parse(self, tokeniser):
         if tokeniser.next_is(_TokenType.ASTERISK):
             tokeniser.consume(_TokenType.ASTERISK)
             self.all_references = True
         else:
-            self.references.append(tokeniser.consume(_TokenType.REFERENCE).value)
+            self._parse_column(tokeniser)
             while tokeniser.next_is(_TokenType.COMMA):
                 tokeniser.consume(_TokenType.COMMA)
-                self.references.append(tokeniser.consume(_TokenType.REFERENCE).value)
+                self._parse_column(tokeniser)
+        self.keys = [
+            column.name if isinstance(column, _Aggregate) else column
+            for column in self.columns
+        ]
+
+    def _parse_column(self, tokeniser):
+        token = tokeniser.consume(_TokenType.aggregates() | {_TokenType.REFERENCE})
+        if token.ttype == _TokenType.REFERENCE:
+            self.references.append(token.value)
+            self.columns.append(clean_outers(token.value))
+            return
+        tokeniser.consume(_TokenType.LPAREN)
+        argument = tokeniser.consume(
+            {_TokenType.ASTERISK, _TokenType.REFERENCE}
+            if token.ttype == _TokenType.COUNT
+            else _TokenType.REFERENCE
+        )
+        tokeniser.consume(_TokenType.RPAREN)
+        aggregate = _Aggregate(
+            token.ttype,
+            (
+                None
+                if argument.ttype == _TokenType.ASTERISK
+                else clean_outers(argument.value)
+            ),
+        )
+        self.references.append(aggregate.name)
+        self.columns.append(aggregate)
+
+    def aggregated(self):
+        return any(isinstance(column, _Aggregate) for column in self.columns)
 
     def filter_fields(self, record):
         if self.all_references:
             return record
-        return {key: record[key] for key in map(clean_outers, self.references)}
+        return {key: record[key] for key in self.keys}
+
+    def filter_batch(self, records):
+        # Projects a list of records at once, fetching the selected values of each with a single call
+        if self.all_references:
+            return records
+        keys = self.keys
+        if len(keys) == 1:
+            key = keys[0]
+            return [{key: record[key]} for record in records]
+        getter = itemgetter(*keys)
+        return [dict(zip(keys, getter(record))) for record in records]
+
+    def projectors(self, row_type):
+        # Returns functions projecting a single record, and a list of records, to rows of the given type
+        match row_type:
+            case "view":
+                if self.all_references:
+                    # The record itself is already a view of all of its fields
+                    return (lambda record: record), (lambda records: records)
+                view = _view_class(self.keys)
+                return view, lambda records: list(map(view, records))
+            case "tuple":
+                row = _tuple_class(self.keys)
+                getter = _tuple_getter(self.keys)
+                project = lambda record: row._make(getter(record))
+                return project, lambda records: list(map(project, records))
+            case _:
+                return self.filter_fields, self.filter_batch
+
+
+_OPERATORS = {
+    _TokenType.LT: operator.lt,
+    _TokenType.LTE: operator.le,
+    _TokenType.GT: operator.gt,
+    _TokenType.GTE: operator.ge,
+    _TokenType.EQUALS: operator.eq,
+    _TokenType.NE: operator.ne,
+}
+
+
+# The comparison true whenever each comparison is false, and the symbol of each comparison
+_NEGATIONS = {
+    _TokenType.LT: _TokenType.GTE,
+    _TokenType.LTE: _TokenType.GT,
+    _TokenType.GT: _TokenType.LTE,
+    _TokenType.GTE: _TokenType.LT,
+    _TokenType.EQUALS: _TokenType.NE,
+    _TokenType.NE: _TokenType.EQUALS,
+}
+_SYMBOLS = {ttype: symbol for symbol, ttype in _SYMBOL_TYPES.items()}
+
+
+def _convert(literal, lvalue):
+    # Literals are compared as the type of the value they are compared against
+    return literal if isinstance(lvalue, str) else type(lvalue)(literal)
+
 
+def _convert_to(literal, value_type):
+    return literal if issubclass(value_type, str) else value_type(literal)
 
-class _Condition:
+
+def _membership(literals, value_type):
+    # Returns a test of whether a value of the given type equals one of the literals, converted to that type. If any
+    # literal can't be converted, the literals are compared in turn as equalities combined with OR would be, so that
+    # the error is only raised once a value reaches that literal without having matched another
+    try:
+        return frozenset(
+            _convert_to(literal, value_type) for literal in literals
+        ).__contains__
+    except (TypeError, ValueError):
+        return lambda value: any(
+            value == _convert_to(literal, value_type) for literal in literals
+        )
+
+
+class _Simplifiable:
+    """
+    Base class for conditions, providing what simplifying the where clause needs of them. By default a condition can't
+    be negated or merged with others, and its result depends on the record
+    """
+
+    def negation(self):
+        # Returns a condition true whenever this one is false, or None if there is none
+        return None
+
+    def constant(self):
+        # Returns the result of the condition if it is the same for every record, otherwise None
+        return None
+
+    def bounds(self):
+        # Returns the comparisons with literals, as pairs of operator token type and literal token, which together
+        # are equivalent to the condition, or None if it can't be merged into an interval
+        return None
+
+    def alternatives(self):
+        # Returns the literal tokens which the field must equal one of for the condition to be true, or None if it
+        # can't be merged into an IN
+        return None
+
+    def intersection(self, bounds):
+        return _RangeCondition(self.reference, self.key, bounds)
+
+    def union(self, values):
+        return _InCondition.of(self.reference, self.key, values)
+
+    def typed(self, types):
+        # Returns a copy of the condition for records whose fields have the given types (None where the type isn't
+        # known), converting literals once rather than for each type of value met. The condition itself is returned
+        # if it has no faster form for the types
+        return self
+
+
+class _Condition(_Simplifiable):
     """
     Constructs a condition container as per the grammar above
     """
@@ -50,43 +238,195 @@ class _Condition:
         self.reference = None
         self.operator = None
         self.rvalue = None
+        # Resolved when parsing, so that the tokens need not be interpreted for each record
+        self.key = None
+        self.rkey = None
+        self.literal = None
+        self.op = None
+        # Type of the values of the field, if bound to a schema
+        self.value_type = None
 
     def parse(self, tokeniser):
         self.reference = tokeniser.consume(_TokenType.REFERENCE).value
         self.operator = tokeniser.consume(_TokenType.comparators())
         self.rvalue = tokeniser.consume(_TokenType.rvalues())
+        self.key = clean_outers(self.reference)
+        self.op = _OPERATORS[self.operator.ttype]
+        match self.rvalue.ttype:
+            case _TokenType.REFERENCE:
+                self.rkey = clean_outers(self.rvalue.value)
+            case _TokenType.STRING:
+                self.literal = clean_outers(self.rvalue.value)
+            case _:
+                self.literal = self.rvalue.value
 
     def __repr__(self):
         return " ".join([self.reference, self.operator.value, self.rvalue.value])
 
     def satisfied(self, record):
         _Condition._validate_reference(self.reference, record)
-        if self.rvalue.ttype == _TokenType.REFERENCE:
+        lvalue = record[self.key]
+        if self.rkey is not None:
             _Condition._validate_reference(self.rvalue.value, record)
-        lvalue = record[clean_outers(self.reference)]
-        match self.rvalue.ttype:
-            case _TokenType.REFERENCE:
-                rvalue = record[clean_outers(self.rvalue.value)]
-            case _TokenType.STRING:
-                rvalue = clean_outers(self.rvalue.value)
-            case _:
-                rvalue = self.rvalue.value
-        if not isinstance(lvalue, str):
-            rvalue = type(lvalue)(rvalue)
-
-        match self.operator.ttype:
-            case _TokenType.LT:
-                return lvalue < rvalue
-            case _TokenType.LTE:
-                return lvalue <= rvalue
-            case _TokenType.GT:
-                return lvalue > rvalue
-            case _TokenType.GTE:
-                return lvalue >= rvalue
-            case _TokenType.EQUALS:
-                return lvalue == rvalue
-            case _TokenType.NE:
-                return lvalue != rvalue
+            rvalue = _convert(record[self.rkey], lvalue)
+        else:
+            rvalue = _convert(self.literal, lvalue)
+        return self.op(lvalue, rvalue)
+
+    def compile(self):
+        key, reference, op = self.key, self.reference, self.op
+        if self.value_type is not None:
+            return self._compile_typed()
+
+        if self.rkey is not None:
+            rkey, rreference = self.rkey, self.rvalue.value
+
+            def predicate(record):
+                try:
+                    lvalue = record[key]
+                except KeyError:
+                    raise UnrecognisedReferenceError(reference) from None
+                try:
+                    rvalue = record[rkey]
+                except KeyError:
+                    raise UnrecognisedReferenceError(rreference) from None
+                if not isinstance(lvalue, str):
+                    rvalue = type(lvalue)(rvalue)
+                return op(lvalue, rvalue)
+
+            return predicate
+
+        # The literal is converted once for each type of value it is compared against
+        literal = self.literal
+        converted = {str: literal}
+
+        def predicate(record):
+            try:
+                lvalue = record[key]
+            except KeyError:
+                raise UnrecognisedReferenceError(reference) from None
+            try:
+                rvalue = converted[type(lvalue)]
+            except KeyError:
+                rvalue = converted[type(lvalue)] = _convert(literal, lvalue)
+            return op(lvalue, rvalue)
+
+        return predicate
+
+    def _compile_typed(self):
+        # Values of the field are all of one type, so the literal is converted up front, and references compared
+        # without conversion
+        key, reference, op = self.key, self.reference, self.op
+
+        if self.rkey is not None:
+            rkey, rreference = self.rkey, self.rvalue.value
+
+            def predicate(record):
+                try:
+                    lvalue = record[key]
+                except KeyError:
+                    raise UnrecognisedReferenceError(reference) from None
+                try:
+                    return op(lvalue, record[rkey])
+                except KeyError:
+                    raise UnrecognisedReferenceError(rreference) from None
+
+            return predicate
+
+        rvalue = _convert_to(self.literal, self.value_type)
+
+        def predicate(record):
+            try:
+                return op(record[key], rvalue)
+            except KeyError:
+                raise UnrecognisedReferenceError(reference) from None
+
+        return predicate
+
+    def mask(self, columns, masks):
+        _Condition._validate_reference(self.reference, columns)
+        if self.rkey is not None:
+            _Condition._validate_reference(self.rvalue.value, columns)
+            return masks.compare_columns(self.op, columns[self.key], columns[self.rkey])
+        return masks.compare(self.op, columns[self.key], self.literal)
+
+    def references(self):
+        return {self.key} if self.rkey is None else {self.key, self.rkey}
+
+    def candidates(self, indexed):
+        if self.rkey is not None:
+            return None
+        return indexed.lookup(self.key, self.op, self.literal)
+
+    def estimate(self):
+        # Returns static estimates of the relative cost of evaluating the condition, and of its selectivity
+        cost = _LOOKUP_COST
+        if self.rkey is not None:
+            cost += _REFERENCE_COST
+        elif self.rvalue.ttype == _TokenType.STRING:
+            cost += _STRING_COST
+        return cost, _SELECTIVITY[self.operator.ttype]
+
+    def required(self):
+        # Returns pairs of field name and string literal, where the text of a record must contain the literal for it to
+        # satisfy the condition if that field holds a string. Values of other types are compared with the literal
+        # converted to their type, so needn't contain its text
+        if (
+            self.operator.ttype == _TokenType.EQUALS
+            and self.rvalue.ttype == _TokenType.STRING
+            and set(self.literal) <= _JSON_SAFE
+        ):
+            return {(self.key, self.literal)}
+        return set()
+
+    def unqualified(self, prefix):
+        # Returns a copy of the condition for records of a single source of a join, whose fields are named without the
+        # source's prefix. The references are left as written, so that errors name the field as written
+        condition = copy(self)
+        condition.key = self.key[len(prefix) :]
+        if self.rkey is not None:
+            condition.rkey = self.rkey[len(prefix) :]
+        return condition
+
+    def negation(self):
+        # Values are taken to be ordered, so that NOT {a} < 1 is {a} >= 1, which doesn't hold for a value of NaN
+        condition = copy(self)
+        ttype = _NEGATIONS[self.operator.ttype]
+        condition.operator = _Token(ttype, _SYMBOLS[ttype])
+        condition.op = _OPERATORS[ttype]
+        return condition
+
+    def constant(self):
+        # A field compared with itself has the result of comparing any value with itself
+        return self.op(0, 0) if self.rkey == self.key else None
+
+    def bounds(self):
+        if self.rkey is not None or self.operator.ttype == _TokenType.NE:
+            return None
+        return [(self.operator.ttype, self.rvalue)]
+
+    def alternatives(self):
+        if self.rkey is not None or self.operator.ttype != _TokenType.EQUALS:
+            return None
+        return [self.rvalue]
+
+    def typed(self, types):
+        value_type = types[self.key]
+        if value_type is None:
+            return self
+        if self.rkey is not None:
+            # A referenced field of another type still needs converting for each record
+            if not (issubclass(value_type, str) or types[self.rkey] is value_type):
+                return self
+        else:
+            try:
+                _convert_to(self.literal, value_type)
+            except (TypeError, ValueError):
+                # Leave the error to be raised for the records compared, as without a schema
+                return self
+        condition = copy(self)
+        condition.value_type = value_type
+        return condition
 
     @staticmethod
     def _validate_reference(reference, record):
@@ -94,6 +434,527 @@ class _Condition:
             raise UnrecognisedReferenceError(reference)
 
 
+class _FieldCondition(_Simplifiable):
+    """
+    Base class for conditions testing the value of a field against one or more literals with a keyword operator, such
+    as IN, which may be negated with NOT. Literals are converted to the type of the value they are compared against,
+    as for comparisons
+    """
+
+    keyword = None
+
+    def __init__(self):
+        self.reference = None
+        self.key = None
+        self.negated = False
+        self.value_type = None
+
+    def parse(self, tokeniser):
+        self.reference = tokeniser.consume(_TokenType.REFERENCE).value
+        self.key = clean_outers(self.reference)
+        if tokeniser.next_is(_TokenType.NOT):
+            tokeniser.consume(_TokenType.NOT)
+            self.negated = True
+        tokeniser.consume(self.keyword)
+        self._parse_operands(tokeniser)
+
+    def __repr__(self):
+        operator = f"NOT {self.keyword.name}" if self.negated else self.keyword.name
+        return f"{self.reference} {operator} {self._operands()}"
+
+    def satisfied(self, record):
+        return self.compile()(record)
+
+    def compile(self):
+        key, reference, test = self.key, self.reference, self._test()
+
+        if self.negated:
+
+            def predicate(record):
+                try:
+                    lvalue = record[key]
+                except KeyError:
+                    raise UnrecognisedReferenceError(reference) from None
+                return not test(lvalue)
+
+            return predicate
+
+        def predicate(record):
+            try:
+                lvalue = record[key]
+            except KeyError:
+                raise UnrecognisedReferenceError(reference) from None
+            return test(lvalue)
+
+        return predicate
+
+    def mask(self, columns, masks):
+        _Condition._validate_reference(self.reference, columns)
+        mask = self._mask(columns[self.key], masks)
+        return masks.not_(mask) if self.negated else mask
+
+    def references(self):
+        return {self.key}
+
+    def candidates(self, indexed):
+        return None if self.negated else self._candidates(indexed)
+
+    def estimate(self):
+        cost, selectivity = self._estimate()
+        return cost, 1.0 - selectivity if self.negated else selectivity
+
+    def required(self):
+        return set() if self.negated else self._required()
+
+    def unqualified(self, prefix):
+        condition = copy(self)
+        condition.key = self.key[len(prefix) :]
+        return condition
+
+    def negation(self):
+        condition = copy(self)
+        condition.negated = not self.negated
+        return condition
+
+    def typed(self, types):
+        value_type = types[self.key]
+        if value_type is None:
+            return self
+        condition = copy(self)
+        condition.value_type = value_type
+        try:
+            condition._test()
+        except (TypeError, ValueError):
+            return self
+        return condition
+
+    def _required(self):
+        return set()
+
+    @staticmethod
+    def _literal(token):
+        return (
+            clean_outers(token.value)
+            if token.ttype == _TokenType.STRING
+            else token.value
+        )
+
+
+class _InCondition(_FieldCondition):
+    """
+    Constructs a condition testing whether the value of a field is one of a list of literals, evaluated as a lookup in
+    a set of the literals
+    """
+
+    keyword = _TokenType.IN
+
+    @classmethod
+    def of(cls, reference, key, values):
+        # Constructs the condition from equalities merged when simplifying the where clause
+        condition = cls()
+        condition.reference = reference
+        condition.key = key
+        condition.values = list(dict.fromkeys(values))
+        condition.literals = [cls._literal(token) for token in condition.values]
+        return condition
+
+    def _parse_operands(self, tokeniser):
+        tokeniser.consume(_TokenType.LPAREN)
+        self.values = [tokeniser.consume(_TokenType.literals())]
+        while tokeniser.next_is(_TokenType.COMMA):
+            tokeniser.consume(_TokenType.COMMA)
+            self.values.append(tokeniser.consume(_TokenType.literals()))
+        tokeniser.consume(_TokenType.RPAREN)
+        self.literals = [self._literal(token) for token in self.values]
+
+    def _operands(self):
+        return "( " + ", ".join(token.value for token in self.values) + " )"
+
+    def _test(self):
+        # The literals are converted into a set once for each type of value they are compared against
+        literals = self.literals
+        if self.value_type is not None:
+            return _membership(literals, self.value_type)
+        tests = {str: frozenset(literals).__contains__}
+
+        def test(lvalue):
+            try:
+                member = tests[type(lvalue)]
+            except KeyError:
+                member = tests[type(lvalue)] = _membership(literals, type(lvalue))
+            return member(lvalue)
+
+        return test
+
+    def _mask(self, column, masks):
+        return masks.isin(column, self.literals)
+
+    def alternatives(self):
+        return None if self.negated else self.values
+
+    def _candidates(self, indexed):
+        result = set()
+        for literal in set(self.literals):
+            positions = indexed.lookup(self.key, operator.eq, literal)
+            if positions is None:
+                return None
+            result |= positions
+        return result
+
+    def _estimate(self):
+        strings = any(token.ttype == _TokenType.STRING for token in self.values)
+        return (
+            _LOOKUP_COST + (_STRING_COST if strings else 0.0),
+            min(1.0, _SELECTIVITY[_TokenType.IN] * len(set(self.literals))),
+        )
+
+    def _required(self):
+        # A record can only be certain to contain a literal if it is the only one
+        if len(set(self.literals)) == 1 and self.values[0].ttype == _TokenType.STRING:
+            literal = self.literals[0]
+            if set(literal) <= _JSON_SAFE:
+                return {(self.key, literal)}
+        return set()
+
+
+class _BetweenCondition(_FieldCondition):
+    """
+    Constructs a condition testing whether the value of a field lies between two literals, inclusively, evaluated as a
+    single chained comparison
+    """
+
+    keyword = _TokenType.BETWEEN
+
+    def _parse_operands(self, tokeniser):
+        self.low = tokeniser.consume(_TokenType.literals())
+        tokeniser.consume(_TokenType.AND)
+        self.high = tokeniser.consume(_TokenType.literals())
+        self.literals = [self._literal(self.low), self._literal(self.high)]
+
+    def _operands(self):
+        return f"{self.low.value} AND {self.high.value}"
+
+    def bounds(self):
+        if self.negated:
+            return None
+        return [(_TokenType.GTE, self.low), (_TokenType.LTE, self.high)]
+
+    def _test(self):
+        low, high = self.literals
+        if self.value_type is not None:
+            lower, upper = (
+                _convert_to(literal, self.value_type) for literal in self.literals
+            )
+            return lambda lvalue: lower <= lvalue <= upper
+        converted = {str: (low, high)}
+
+        def test(lvalue):
+            try:
+                lower, upper = converted[type(lvalue)]
+            except KeyError:
+                lower, upper = converted[type(lvalue)] = (
+                    _convert(low, lvalue),
+                    _convert(high, lvalue),
+                )
+            return lower <= lvalue <= upper
+
+        return test
+
+    def _mask(self, column, masks):
+        low, high = self.literals
+        return masks.and_(
+            masks.compare(operator.ge, column, low),
+            masks.compare(operator.le, column, high),
+        )
+
+    def candidates(self, indexed):
+        # Values not between the literals are those either side of them, so both forms can be looked up
+        low, high = self.literals
+        if self.negated:
+            lookups, combine = [(operator.lt, low), (operator.gt, high)], set.union
+        else:
+            lookups, combine = [
+                (operator.ge, low),
+                (operator.le, high),
+            ], set.intersection
+        positions = [indexed.lookup(self.key, op, literal) for op, literal in lookups]
+        if None in positions:
+            return None
+        return combine(*positions)
+
+    def _estimate(self):
+        strings = _TokenType.STRING in (self.low.ttype, self.high.ttype)
+        return (
+            _LOOKUP_COST + (_STRING_COST if strings else 0.0),
+            _SELECTIVITY[_TokenType.BETWEEN],
+        )
+
+
+def _like_pattern(pattern):
+    # Translates a LIKE pattern into a regular expression matching the whole of a value. % matches any run of
+    # characters and _ any single character, while every other character matches itself
+    return re.compile(
+        "".join(
+            ".*" if char == "%" else "." if char == "_" else re.escape(char)
+            for char in pattern
+        ),
+        re.DOTALL,
+    )
+
+
+class _LikeCondition(_FieldCondition):
+    """
+    Constructs a condition testing whether the value of a field matches a pattern, where % matches any run of
+    characters and _ any single character. The pattern is compiled once into a regular expression. Only string values
+    can match
+    """
+
+    keyword = _TokenType.LIKE
+
+    def _parse_operands(self, tokeniser):
+        self.pattern = tokeniser.consume(_TokenType.STRING)
+        self.literal = clean_outers(self.pattern.value)
+
+    def _operands(self):
+        return self.pattern.value
+
+    def _test(self):
+        match = _like_pattern(self.literal).fullmatch
+        return lambda lvalue: isinstance(lvalue, str) and match(lvalue) is not None
+
+    def _mask(self, column, masks):
+        return masks.apply(column, self._test())
+
+    def _candidates(self, indexed):
+        # Values matching the pattern all start with the characters before the first wildcard, so lie in a range
+        prefix = re.split("[%_]", self.literal, 1)[0]
+        if prefix == self.literal:
+            return indexed.lookup(self.key, operator.eq, prefix)
+        if not prefix or ord(prefix[-1]) == 0x10FFFF:
+            return None
+        following = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        positions = [
+            indexed.lookup(self.key, operator.ge, prefix),
+            indexed.lookup(self.key, operator.lt, following),
+        ]
+        if None in positions:
+            return None
+        return positions[0] & positions[1]
+
+    def _estimate(self):
+        exact = not re.search("[%_]", self.literal)
+        return (
+            _LOOKUP_COST + _PATTERN_COST,
+            _SELECTIVITY[_TokenType.EQUALS if exact else _TokenType.LIKE],
+        )
+
+    def _required(self):
+        # Every run of characters between wildcards must appear in the text of a matching value
+        return set(
+            (self.key, run)
+            for run in re.split("[%_]", self.literal)
+            if run and set(run) <= _JSON_SAFE
+        )
+
+
+# Comparisons bounding an interval from below, and from above
+_LOWER_BOUNDS = {_TokenType.GT, _TokenType.GTE, _TokenType.EQUALS}
+_UPPER_BOUNDS = {_TokenType.LT, _TokenType.LTE, _TokenType.EQUALS}
+
+
+class _RangeCondition(_Simplifiable):
+    """
+    Constructs a condition testing whether the value of a field lies in the interval bounded by several comparisons
+    with literals, merged from conditions on the field combined with AND. Which literals bound the interval most
+    tightly depends on the type they are converted to, for example '9' is above '10' as a string but not as a number,
+    so the interval is found once for each type of value compared
+    :param reference: Reference to the field, as written in the SQL
+    :param key: Name of the field
+    :param comparisons: List of the operator token type and literal token of each comparison
+    """
+
+    def __init__(self, reference, key, comparisons):
+        self.reference = reference
+        self.key = key
+        self.comparisons = comparisons
+        self.literals = [_FieldCondition._literal(token) for _, token in comparisons]
+        self.value_type = None
+
+    def __repr__(self):
+        return " AND ".join(
+            f"{self.reference} {_SYMBOLS[ttype]} {token.value}"
+            for ttype, token in self.comparisons
+        )
+
+    def satisfied(self, record):
+        return self.compile()(record)
+
+    def compile(self):
+        key, reference, interval = self.key, self.reference, self._interval
+
+        if self.value_type is not None:
+            test = interval(self.value_type)
+
+            def predicate(record):
+                try:
+                    lvalue = record[key]
+                except KeyError:
+                    raise UnrecognisedReferenceError(reference) from None
+                return test(lvalue)
+
+            return predicate
+
+        tests = {}
+
+        def predicate(record):
+            try:
+                lvalue = record[key]
+            except KeyError:
+                raise UnrecognisedReferenceError(reference) from None
+            try:
+                test = tests[type(lvalue)]
+            except KeyError:
+                test = tests[type(lvalue)] = interval(type(lvalue))
+            return test(lvalue)
+
+        return predicate
+
+    def mask(self, columns, masks):
+        _Condition._validate_reference(self.reference, columns)
+        column = columns[self.key]
+        return reduce(
+            masks.and_,
+            (
+                masks.compare(_OPERATORS[ttype], column, literal)
+                for (ttype, _), literal in zip(self.comparisons, self.literals)
+            ),
+        )
+
+    def references(self):
+        return {self.key}
+
+    def candidates(self, indexed):
+        result = None
+        for (ttype, _), literal in zip(self.comparisons, self.literals):
+            positions = indexed.lookup(self.key, _OPERATORS[ttype], literal)
+            if positions is not None:
+                result = positions if result is None else result & positions
+        return result
+
+    def estimate(self):
+        strings = any(token.ttype == _TokenType.STRING for _, token in self.comparisons)
+        selectivity = 1.0
+        for ttype, _ in self.comparisons:
+            selectivity *= _SELECTIVITY[ttype]
+        return _LOOKUP_COST + (_STRING_COST if strings else 0.0), selectivity
+
+    def required(self):
+        return set(
+            (self.key, literal)
+            for (ttype, token), literal in zip(self.comparisons, self.literals)
+            if ttype == _TokenType.EQUALS
+            and token.ttype == _TokenType.STRING
+            and set(literal) <= _JSON_SAFE
+        )
+
+    def unqualified(self, prefix):
+        condition = copy(self)
+        condition.key = self.key[len(prefix) :]
+        return condition
+
+    def constant(self):
+        # Bounded above and below by the same literal, with either bound excluded, the interval is empty whatever the
+        # type of value, as the literal converts to the same value for both
+        lower = {}
+        for ttype, token in self.comparisons:
+            if ttype in _LOWER_BOUNDS:
+                lower.setdefault(token, set()).add(ttype)
+        for ttype, token in self.comparisons:
+            if ttype in _UPPER_BOUNDS and token in lower:
+                if ttype == _TokenType.LT or _TokenType.GT in lower[token]:
+                    return False
+        return None
+
+    def bounds(self):
+        return self.comparisons
+
+    def typed(self, types):
+        value_type = types[self.key]
+        if value_type is None:
+            return self
+        try:
+            self._interval(value_type)
+        except (TypeError, ValueError):
+            return self
+        condition = copy(self)
+        condition.value_type = value_type
+        return condition
+
+    def _interval(self, value_type):
+        # Returns a test of whether values of the given type lie in the interval, with the literals converted to that
+        # type. Each bound is held as its value and whether the value itself is in the interval
+        try:
+            values = [_convert_to(literal, value_type) for literal in self.literals]
+        except (TypeError, ValueError):
+            # Compare in turn as comparisons combined with AND would be, raising the error for a literal which can't be
+            # converted only once a value reaches it having satisfied the comparisons before it
+            comparisons = [
+                (_OPERATORS[ttype], literal)
+                for (ttype, _), literal in zip(self.comparisons, self.literals)
+            ]
+            return lambda value: all(
+                op(value, _convert_to(literal, value_type))
+                for op, literal in comparisons
+            )
+        lower = upper = None
+        for (ttype, _), value in zip(self.comparisons, values):
+            if ttype in _LOWER_BOUNDS:
+                inclusive = ttype != _TokenType.GT
+                if (
+                    lower is None
+                    or value > lower[0]
+                    or (value == lower[0] and not inclusive)
+                ):
+                    lower = (value, inclusive)
+            if ttype in _UPPER_BOUNDS:
+                inclusive = ttype != _TokenType.LT
+                if (
+                    upper is None
+                    or value < upper[0]
+                    or (value == upper[0] and not inclusive)
+                ):
+                    upper = (value, inclusive)
+        checks = []
+        if lower is not None:
+            checks.append((operator.ge if lower[1] else operator.gt, lower[0]))
+        if upper is not None:
+            checks.append((operator.le if upper[1] else operator.lt, upper[0]))
+        if len(checks) == 1:
+            ((op, bound),) = checks
+            return lambda value: op(value, bound)
+        (low_op, low), (high_op, high) = checks
+        if low > high or (low == high and not (lower[1] and upper[1])):
+            return lambda value: False
+        if low == high:
+            return lambda value: value == low
+        return lambda value: low_op(value, low) and high_op(value, high)
+
+
+# Conditions other than comparisons, by the keyword following the reference, or following NOT
+_CONDITIONS = {
+    _TokenType.IN: _InCondition,
+    _TokenType.BETWEEN: _BetweenCondition,
+    _TokenType.LIKE: _LikeCondition,
+}
+
+
+def _condition(tokeniser):
+    following = tokeniser.peek_next(1)
+    if following and following.ttype == _TokenType.NOT:
+        following = tokeniser.peek_next(2)
+    return _CONDITIONS.get(following.ttype if following else None, _Condition)()
+
+
 class _WherePrimary:
     """
     Constructs a where primary container as per the grammar above
@@ -110,7 +971,7 @@ class _WherePrimary:
             self.where_clause.parse(tokeniser)
             tokeniser.consume(_TokenType.RPAREN)
         else:
-            self.condition = _Condition()
+            self.condition = _condition(tokeniser)
             self.condition.parse(tokeniser)
 
     def __repr__(self):
@@ -125,6 +986,12 @@ class _WherePrimary:
         else:
             return self.condition.satisfied(record)
 
+    def lower(self):
+        if self.where_clause:
+            return self.where_clause.lower()
+        else:
+            return _Leaf(self.condition)
+
 
 class _WhereFactor:
     """
@@ -147,6 +1014,10 @@ class _WhereFactor:
     def satisfied(self, record):
         return self.where_primary.satisfied(record) ^ self.bool_not
 
+    def lower(self):
+        primary = self.where_primary.lower()
+        return _Not(primary) if self.bool_not else primary
+
 
 class _WhereTerm:
     """
@@ -158,21 +1029,30 @@ class _WhereTerm:
         self.where_term = None
 
     def parse(self, tokeniser):
-        self.where_factor.parse(tokeniser)
-        if tokeniser.next_is(_TokenType.AND):
+        # The chain of ANDs is built iteratively, so that long chains do not hit the recursion limit
+        term = self
+        term.where_factor.parse(tokeniser)
+        while tokeniser.next_is(_TokenType.AND):
             tokeniser.consume(_TokenType.AND)
-            self.where_term = _WhereTerm()
-            self.where_term.parse(tokeniser)
+            term.where_term = _WhereTerm()
+            term = term.where_term
+            term.where_factor.parse(tokeniser)
+
+    def factors(self):
+        term = self
+        while term:
+            yield term.where_factor
+            term = term.where_term
 
     def __repr__(self):
-        return repr(self.where_factor) + (
-            " AND " + repr(self.where_term) if self.where_term else ""
-        )
+        return " AND ".join(repr(factor) for factor in self.factors())
 
     def satisfied(self, record):
-        return self.where_factor.satisfied(record) and (
-            self.where_term is None or self.where_term.satisfied(record)
-        )
+        return all(factor.satisfied(record) for factor in self.factors())
+
+    def lower(self):
+        # Flatten the right recursive chain of ANDs into a single node
+        return _And.of([factor.lower() for factor in self.factors()])
 
 
 class _WhereClause:
@@ -185,21 +1065,55 @@ class _WhereClause:
         self.where_clause = None
 
     def parse(self, tokeniser):
-        self.where_term.parse(tokeniser)
-        if tokeniser.next_is(_TokenType.OR):
+        # The chain of ORs is built iteratively, so that long chains do not hit the recursion limit
+        clause = self
+        clause.where_term.parse(tokeniser)
+        while tokeniser.next_is(_TokenType.OR):
             tokeniser.consume(_TokenType.OR)
-            self.where_clause = _WhereClause()
-            self.where_clause.parse(tokeniser)
+            clause.where_clause = _WhereClause()
+            clause = clause.where_clause
+            clause.where_term.parse(tokeniser)
+
+    def terms(self):
+        clause = self
+        while clause:
+            yield clause.where_term
+            clause = clause.where_clause
 
     def __repr__(self):
-        return repr(self.where_term) + (
-            " OR " + repr(self.where_clause) if self.where_clause else ""
-        )
+        return " OR ".join(repr(term) for term in self.terms())
 
     def satisfied(self, record):
-        return self.where_term.satisfied(record) or (
-            self.where_clause is not None and self.where_clause.satisfied(record)
-        )
+        return any(term.satisfied(record) for term in self.terms())
+
+    def lower(self):
+        # Flatten the right recursive chain of ORs into a single node
+        return _Or.of([term.lower() for term in self.terms()])
+
+
+def _checked(predicate, checks, every):
+    # Wraps the predicate so that every Nth record is checked to have each field, of the type given, before it is
+    # tested. A type of None only requires the field to be present
+    records = count()
+
+    def checked_predicate(record):
+        if not next(records) % every:
+            for key, value_type in checks:
+                try:
+                    value = record[key]
+                except KeyError:
+                    raise UnrecognisedReferenceError(f"{{{key}}}") from None
+                if value_type is not None and type(value) is not value_type:
+                    raise SchemaMismatchError(f"{{{key}}}", value_type, type(value))
+        return predicate(record)
+
+    return checked_predicate
+
+
+def _access(source, parser):
+    # Describes how a source's records are read, if it is a source object which says
+    access = source.access(parser) if isinstance(source, Source) else None
+    return "" if access is None else f" USING {access}"
 
 
 class _Parser:
@@ -216,31 +1130,419 @@ class _Parser:
         # where clause hierarchy is more complex, that is stored in child objects
         self._references = _References()
         self._fromref = ""
+        self._joins = []
         self._where_clause = None
+        self._grouping = None
+        self._ordering = None
+        self._limit = None
+        self._offset = 0
         self._parse()
+        # Lower the where clause hierarchy once into a plan, then into a single callable, so that applying the
+        # SQL to each record is one call rather than a walk of the tree
+        self._plan = self.plan()
+        self.predicate = self.compile(self._plan)
+        # Conditions only referencing a single source of a join are applied to its records before they are joined
+        self._pushed = {}
+        if self._joins and self._where_clause is not None:
+            self._pushed = _push_down(self._lower(), self.sources())[0]
 
     def satisfied(self, record):
-        return (
-            True if self._where_clause is None else self._where_clause.satisfied(record)
-        )
+        return self.predicate(record)
 
     def filter_fields(self, record):
         return self._references.filter_fields(record)
 
+    def filter_batch(self, records):
+        return self._references.filter_batch(records)
+
+    def projectors(self, row_type):
+        if self._grouping is not None and row_type == "dict":
+            # Aggregated rows are built holding just the selected columns, so need no projection
+            return (lambda row: row), (lambda rows: rows)
+        return self._references.projectors(row_type)
+
+    def plan(self, sample=None):
+        # Plans the where clause, optionally using a sample of records to measure the selectivity of conditions
+        if self._where_clause is None:
+            return None
+        node = self._lower()
+        if self._joins:
+            # Only the conditions which can't be pushed down to a single source are applied to the joined records
+            node = _push_down(node, self.sources())[1]
+            if node is None:
+                return None
+        return _plan(node, sample)
+
+    def bind(self, schema, strict=0, sample=None, stats=None):
+        # Returns the predicate for records whose fields have the types given by the schema, having checked once that
+        # the schema has every field the SQL references. If strict, every strict'th record is checked against the
+        # schema as it is tested
+        fields = self.referenced_fields()
+        if fields is None:
+            fields = set() if self._plan is None else self._plan.references()
+            if self._ordering is not None:
+                fields |= set(self._ordering.keys)
+        for key in sorted(fields):
+            if key not in schema:
+                raise UnrecognisedReferenceError(f"{{{key}}}")
+        plan = self.plan(sample) if sample else self._plan
+        predicate = self.compile(plan, schema, stats)
+        if strict:
+            predicate = _checked(
+                predicate, [(key, schema[key]) for key in sorted(fields)], strict
+            )
+        return predicate
+
+    def impossible(self):
+        # Returns whether the where clause is false for every record, so that no source need be read
+        return isinstance(self._plan, _Constant) and not self._plan.value
+
+    def _lower(self):
+        # Lowers the where clause into plan nodes, simplified before they are planned
+        return _simplify(self._where_clause.lower())
+
+    @staticmethod
+    def compile(plan, schema=None, stats=None):
+        # Compiles the plan into a single predicate, typed for records bound to a schema, and counting the evaluations
+        # of each condition into the statistics if given
+        if plan is None:
+            return lambda record: True
+        if schema is not None:
+            plan = plan.typed(schema)
+        if stats is not None:
+            plan = plan.counted(stats.counts)
+        return plan.compile()
+
+    def explain(self, source=None, row_type="dict", plan=None, stats=None):
+        # Describes how the SQL is executed, one step per line: reading the source, filtering, then any aggregation,
+        # ordering and limit, and finally the projection. Given the source, says how its records are read. Given the
+        # counted plan and the statistics of running the query with it, says how many records each step handled and
+        # the time taken
+        lines = (
+            self._explain_joins(source) if self._joins else self._explain_scan(source)
+        )
+        if stats is None:
+            plan = self._plan
+        if plan is not None:
+            lines.append("FILTER")
+            lines.extend(plan.explain(1))
+        if self._grouping is not None:
+            lines.append(f"AGGREGATE {self._grouping!r}")
+        wanted = self.wanted()
+        if self._ordering is not None:
+            lines.append(
+                f"SORT {self._ordering!r}"
+                if wanted is None
+                else f"TOP {wanted} BY {self._ordering!r}"
+            )
+        if self._limit is not None or self._offset:
+            window = [] if self._limit is None else [f"LIMIT {self._limit}"]
+            lines.append(
+                " ".join(window + ([f"OFFSET {self._offset}"] if self._offset else []))
+            )
+        selected = (
+            "*"
+            if self._references.all_references
+            else ", ".join(self._references.references)
+        )
+        lines.append(f"PROJECT {selected} AS {row_type}")
+        if stats is not None:
+            lines.append(
+                f"ROWS scanned={stats.rows_scanned} matched={stats.rows_matched} returned={stats.rows_projected}"
+            )
+            lines.append(
+                f"TIME filter={stats.predicate_time:.6f}s projection={stats.projection_time:.6f}s "
+                f"total={stats.elapsed:.6f}s"
+            )
+        return "\n".join(lines)
+
+    def _scanned(self, name):
+        # Describes reading a source, which isn't read at all if the where clause is always false
+        return f"{'NO SCAN' if self.impossible() else 'SCAN'} {{{name}}}"
+
+    def _explain_scan(self, source):
+        return [self._scanned(self.from_ref()) + _access(source, self)]
+
+    def _explain_joins(self, source):
+        # Each source is shown with the conditions pushed down to it, and the fields read from its records
+        if source is None:
+            source = self.joined(dict.fromkeys(self.sources()))
+        lines = []
+        for side, join in zip(source.sides(), [None] + self._joins):
+            access = _access(side.source, side)
+            if join is None:
+                lines.append(self._scanned(side.name) + access)
+            else:
+                lines.append(f"HASH JOIN {join!r}{access}")
+            if side.plan is not None:
+                lines.extend(side.plan.explain(1))
+            if side.fields is not None:
+                fields = ", ".join(
+                    f"{{{side.prefix}{key}}}" for key in sorted(side.fields)
+                )
+                lines.append(f"  PROJECT {fields}")
+        return lines
+
+    def filter_columns(self, columns, masks):
+        lengths = set(len(values) for values in columns.values())
+        if len(lengths) > 1:
+            raise ValueError("Columns to be filtered must all be of the same length")
+        length = lengths.pop() if lengths else 0
+        if self._references.all_references:
+            selected = list(columns.keys())
+        elif self._grouping is not None:
+            selected = self._references.keys
+            for key in self._grouping.fields():
+                if key not in columns:
+                    raise UnrecognisedReferenceError(f"{{{key}}}")
+        else:
+            selected = self._references.keys
+            for reference, key in zip(self._references.references, selected):
+                if key not in columns:
+                    raise UnrecognisedReferenceError(reference)
+        columns = {key: masks.column(values) for key, values in columns.items()}
+        mask = (
+            masks.full(length, True)
+            if self._plan is None
+            else self._plan.mask(columns, masks)
+        )
+        if self._grouping is not None:
+            # Rebuild the matching records from the fields aggregated, then turn the aggregated rows back into columns
+            positions = masks.positions(mask)
+            fields = {
+                key: masks.values(masks.take(columns[key], positions))
+                for key in self._grouping.fields()
+            }
+            records = (
+                {key: values[pos] for key, values in fields.items()}
+                for pos in range(len(positions))
+            )
+            rows = list(self.arrange(self.aggregate(records)))
+            return {key: masks.column([row[key] for row in rows]) for key in selected}
+        rows = slice(self._offset, self.wanted())
+        if self._ordering is None:
+            return {key: masks.select(columns[key], mask)[rows] for key in selected}
+
+        for key in self._ordering.keys:
+            if key not in columns:
+                raise UnrecognisedReferenceError(f"{{{key}}}")
+        order_columns = [columns[key] for key in self._ordering.keys]
+        positions = sorted(
+            masks.positions(mask),
+            key=self._ordering.sort_key(
+                lambda pos: tuple(column[pos] for column in order_columns)
+            ),
+            reverse=self._ordering.reverse,
+        )[rows]
+        return {key: masks.take(columns[key], positions) for key in selected}
+
+    def candidates(self, indexed):
+        # Returns the positions of the records in an IndexedCollection which may satisfy the SQL, or None if all
+        # records must be scanned
+        if self._plan is None:
+            return None
+        return self._plan.candidates(indexed)
+
+    def referenced_fields(self):
+        # Returns the names of all fields referenced by the SQL, or None if all fields are selected
+        if self._references.all_references:
+            return None
+        if self._grouping is not None:
+            # Aggregated rows are ordered by their columns, rather than fields of the records
+            fields = self._grouping.fields()
+        else:
+            fields = set(self._references.keys)
+            if self._ordering is not None:
+                fields |= set(self._ordering.keys)
+        if self._plan is not None:
+            fields |= self._plan.references()
+        return fields
+
+    def required_literals(self, fields):
+        # Returns the string literals which every record satisfying the SQL must have as the value of one of the given
+        # fields, which are known to hold strings. Literals compared with fields of other types are left out, as they
+        # are converted to the type of the value rather than found in its text
+        return _required_literals(self._plan, fields)
+
+    def window(self):
+        # Returns the number of matching records to skip, and the number to return (None for no limit)
+        return self._offset, self._limit
+
+    def wanted(self):
+        # Returns the number of matching records needed to satisfy the LIMIT and OFFSET, or None for no limit
+        return None if self._limit is None else self._offset + self._limit
+
+    def ordered(self):
+        return self._ordering is not None
+
+    def grouping(self):
+        return self._grouping
+
+    def blocking(self):
+        # Returns whether every matching record must be read before the first row can be returned, as when ordering
+        # or aggregating. Matches are then left unprojected until they have been ordered or aggregated
+        return self._ordering is not None or self._grouping is not None
+
+    def aggregate(self, records):
+        # Applies any aggregation to an iterable of matching records, returning a row per group
+        if self._grouping is None:
+            return records
+        return iter(self._grouping.aggregate(records))
+
+    def arrange(self, rows, sort_buffer=DEFAULT_SORT_BUFFER):
+        # Applies the ORDER BY, LIMIT and OFFSET to an iterable of rows. With a LIMIT, only the rows needed are held
+        # while ordering, otherwise the rows are sorted, spilling to temporary files if more than sort_buffer
+        if self._ordering is None:
+            return self.limit(rows)
+        wanted = self.wanted()
+        if wanted is not None:
+            return iter(self._ordering.top(rows, wanted)[self._offset :])
+        return islice(self._ordering.sort(rows, sort_buffer), self._offset, None)
+
+    def limit(self, rows):
+        # Applies the LIMIT and OFFSET to an iterable of rows, lazily so no more rows are read than needed
+        if self._limit is None and not self._offset:
+            return rows
+        return islice(rows, self._offset, self.wanted())
+
     def from_ref(self):
         return clean_outers(self._fromref)
 
+    def sources(self):
+        # Returns the names of the sources of the SQL, the FROM reference followed by any joined
+        return [self.from_ref()] + [join.name for join in self._joins]
+
+    def joined(self, sources, counts_of=None):
+        # Returns a source producing the joined records of the given sources, keyed by name. Each source is read with
+        # the conditions pushed down to it, producing only the fields needed. If counts_of is given, the pushed down
+        # conditions are counted, see _Leaf.counted
+        fields = self.referenced_fields()
+        if fields is not None:
+            for join in self._joins:
+                fields |= set(join.left_keys)
+                fields |= set(f"{join.name}.{key}" for key in join.right_keys)
+        sides = []
+        for name in self.sources():
+            pushed = self._pushed.get(name)
+            if pushed is not None and counts_of is not None:
+                pushed = pushed.counted(counts_of)
+            side_fields = None
+            if fields is not None:
+                prefix = name + "."
+                side_fields = set(
+                    key[len(prefix) :] for key in fields if key.startswith(prefix)
+                )
+                if pushed is not None:
+                    side_fields |= pushed.references()
+            sides.append(_JoinSide(name, sources[name], pushed, side_fields))
+        return _Joined(sides, self._joins)
+
     def _parse(self):
         self.tokeniser.consume(_TokenType.SELECT)
         self._parse_references()
         self.tokeniser.consume(_TokenType.FROM)
         self._fromref = self.tokeniser.consume(_TokenType.REFERENCE).value
+        while self.tokeniser.next_is(_TokenType.JOIN):
+            self.tokeniser.consume(_TokenType.JOIN)
+            self._parse_join()
         if self.tokeniser.next_is(_TokenType.WHERE):
             self.tokeniser.consume(_TokenType.WHERE)
             self._parse_where_clause()
+        group_keys = []
+        if (
+            self.tokeniser.next_is(_TokenType.GROUP)
+            and not self._references.all_references
+        ):
+            self.tokeniser.consume(_TokenType.GROUP)
+            self.tokeniser.consume(_TokenType.BY)
+            group_keys = self._parse_group_list()
+        if group_keys or self._references.aggregated():
+            self._parse_grouping(group_keys)
+        if self.tokeniser.next_is(_TokenType.ORDER):
+            self.tokeniser.consume(_TokenType.ORDER)
+            self.tokeniser.consume(_TokenType.BY)
+            self._parse_order_list()
+        if self.tokeniser.next_is(_TokenType.LIMIT):
+            self.tokeniser.consume(_TokenType.LIMIT)
+            self._limit = self._parse_count()
+            if self.tokeniser.next_is(_TokenType.OFFSET):
+                self.tokeniser.consume(_TokenType.OFFSET)
+                self._offset = self._parse_count()
         if not self.tokeniser.peek_next() is None:
             raise UnexpectedTokenError(self.tokeniser.peek_next())
 
+    def _parse_join(self):
+        token = self.tokeniser.consume(_TokenType.REFERENCE)
+        name = clean_outers(token.value)
+        earlier = self.sources()
+        if name in earlier:
+            raise UnexpectedTokenError(token, "a source not already named")
+        self.tokeniser.consume(_TokenType.ON)
+        left_keys, right_keys, conditions = [], [], []
+        while True:
+            first = self.tokeniser.consume(_TokenType.REFERENCE)
+            equals = self.tokeniser.consume(_TokenType.EQUALS)
+            second = self.tokeniser.consume(_TokenType.REFERENCE)
+            # Either side of the comparison may be the field of the source joined
+            keys = [clean_outers(first.value), clean_outers(second.value)]
+            if not keys[1].startswith(name + "."):
+                keys.reverse()
+            source, _, field = keys[1].partition(".")
+            if source != name or keys[0].partition(".")[0] not in earlier:
+                raise UnexpectedTokenError(
+                    second,
+                    f"a field of {{{name}}} compared with a field of an earlier source",
+                )
+            left_keys.append(keys[0])
+            right_keys.append(field)
+            conditions.append(" ".join([first.value, equals.value, second.value]))
+            if not self.tokeniser.next_is(_TokenType.AND):
+                break
+            self.tokeniser.consume(_TokenType.AND)
+        self._joins.append(_Join(name, left_keys, right_keys, conditions))
+
+    def _parse_group_list(self):
+        keys = [clean_outers(self.tokeniser.consume(_TokenType.REFERENCE).value)]
+        while self.tokeniser.next_is(_TokenType.COMMA):
+            self.tokeniser.consume(_TokenType.COMMA)
+            keys.append(
+                clean_outers(self.tokeniser.consume(_TokenType.REFERENCE).value)
+            )
+        return keys
+
+    def _parse_grouping(self, group_keys):
+        # Fields selected alongside aggregates must be grouped by, so that they have a single value for each group
+        for reference, column in zip(
+            self._references.references, self._references.columns
+        ):
+            if not isinstance(column, _Aggregate) and column not in group_keys:
+                raise UnexpectedTokenError(
+                    _Token(_TokenType.REFERENCE, reference),
+                    "an aggregate function or GROUP BY field",
+                )
+        self._grouping = _Grouping(group_keys, self._references.columns)
+
+    def _parse_order_list(self):
+        keys, descending = [], []
+        while True:
+            keys.append(
+                clean_outers(self.tokeniser.consume(_TokenType.REFERENCE).value)
+            )
+            direction = self.tokeniser.peek_next()
+            if direction and direction.ttype in (_TokenType.ASC, _TokenType.DESC):
+                self.tokeniser.consume()
+            descending.append(bool(direction) and direction.ttype == _TokenType.DESC)
+            if not self.tokeniser.next_is(_TokenType.COMMA):
+                break
+            self.tokeniser.consume(_TokenType.COMMA)
+        self._ordering = _Ordering(keys, descending)
+
+    def _parse_count(self):
+        token = self.tokeniser.consume(_TokenType.NUMBER)
+        if not token.value.isdigit():
+            raise UnexpectedTokenError(token, "a whole number")
+        return int(token.value)
+
     def _parse_references(self):
         self._references.parse(self.tokeniser)
 
@@ -0,0 +1,617 @@
+from functools import reduce
+from time import perf_counter
+
+from .tokeniser import _TokenType
+
+"""
+The parsed where clause mirrors the grammar, with AND and OR as right recursive chains. Before execution it is
+lowered into a plan: a tree of n-ary AND / OR nodes, NOT nodes and leaf conditions. Each node estimates its cost
+(the relative expense of evaluating it for a record) and selectivity (the proportion of records it is expected to
+be true for), and the operands of AND / OR nodes are ordered so that short circuiting pays off as early as possible.
+Selectivity is estimated statically from the condition, or measured against a sample of records if one is given.
+
+Before planning, the lowered tree is simplified: NOTs are pushed down onto the conditions, comparisons of the same field
+with literals combined with AND are merged into a single interval check, and equalities combined with OR into a single
+IN, duplicate operands are dropped, and operands which always have the same result are folded into constant nodes. A
+where clause simplified to a false constant can't match any record, so the source need not be read at all.
+"""
+
+# Static estimates of the proportion of records satisfying a comparison, by operator. IN is estimated per value
+_SELECTIVITY = {
+    _TokenType.EQUALS: 0.1,
+    _TokenType.NE: 0.9,
+    _TokenType.LT: 0.4,
+    _TokenType.LTE: 0.4,
+    _TokenType.GT: 0.4,
+    _TokenType.GTE: 0.4,
+    _TokenType.IN: 0.1,
+    _TokenType.BETWEEN: 0.2,
+    _TokenType.LIKE: 0.2,
+}
+
+# Static estimates of the relative cost of evaluating a comparison
+_LOOKUP_COST = 1.0
+_REFERENCE_COST = 1.0  # Second lookup, and conversion of the value for every record
+_STRING_COST = 0.25  # String comparisons are more expensive than numeric ones
+_PATTERN_COST = 1.0  # Matching a regular expression
+
+
+def _all_of(predicates):
+    # Combines predicates with AND semantics, short circuiting on the first failure
+    if len(predicates) == 1:
+        return predicates[0]
+    if len(predicates) == 2:
+        first, second = predicates
+        return lambda record: first(record) and second(record)
+
+    def predicate(record):
+        for pred in predicates:
+            if not pred(record):
+                return False
+        return True
+
+    return predicate
+
+
+def _any_of(predicates):
+    # Combines predicates with OR semantics, short circuiting on the first success
+    if len(predicates) == 1:
+        return predicates[0]
+    if len(predicates) == 2:
+        first, second = predicates
+        return lambda record: first(record) or second(record)
+
+    def predicate(record):
+        for pred in predicates:
+            if pred(record):
+                return True
+        return False
+
+    return predicate
+
+
+# Characters which may appear in a string literal for it to be found as is in the raw JSON text. Besides those which
+# JSON requires to be escaped, encoders such as Go's escape <, > and & as HTML safe, and some escape the single quote
+_JSON_SAFE = set(chr(code) for code in range(0x20, 0x7F)) - set("\"\\/<>&'")
+
+
+def _describe(node, depth):
+    description = f"{'  ' * depth}{node.label()} [cost={node.cost:.2f} selectivity={node.selectivity:.2f}]"
+    actual = node.actual()
+    if actual is None:
+        return description
+    evaluated, satisfied, time = actual
+    return (
+        f"{description} (actual rows={evaluated} matched={satisfied} time={time:.6f}s)"
+    )
+
+
+def _estimated(node, original):
+    # Gives a copy of a planned node the estimates of the original, so that the copy is explained in the same way
+    node.cost, node.selectivity = original.cost, original.selectivity
+    return node
+
+
+class _Leaf:
+    """
+    Constructs a plan node for a single condition
+    :param condition: Parsed condition to be evaluated
+    """
+
+    def __init__(self, condition):
+        self.condition = condition
+        self.cost = 0.0
+        self.selectivity = 0.0
+
+    def __repr__(self):
+        return repr(self.condition)
+
+    def label(self):
+        return repr(self.condition)
+
+    def explain(self, depth=0):
+        return [_describe(self, depth)]
+
+    def estimate(self, sample=None):
+        condition = self.condition
+        self.cost, self.selectivity = condition.estimate()
+        if sample:
+            predicate = condition.compile()
+            try:
+                self.selectivity = sum(
+                    1 for record in sample if predicate(record)
+                ) / len(sample)
+            except Exception:
+                # Leave errors to be raised when the records are filtered, keeping the static estimate
+                pass
+
+    def compile(self):
+        return self.condition.compile()
+
+    def references(self):
+        return self.condition.references()
+
+    def required(self):
+        return self.condition.required()
+
+    def mask(self, columns, masks):
+        return self.condition.mask(columns, masks)
+
+    def candidates(self, indexed):
+        return self.condition.candidates(indexed)
+
+    def unqualified(self, prefix):
+        return _Leaf(self.condition.unqualified(prefix))
+
+    def typed(self, types):
+        # Copies the node for records whose fields have the given types, see DictFilter's schema
+        return _Leaf(self.condition.typed(types))
+
+    def counted(self, counts_of):
+        # Copies the node to count the records the condition is evaluated for, those satisfying it, and the time taken,
+        # in the object counts_of returns for the text of the condition, see QueryStats
+        return _estimated(_Counted(self.condition, counts_of(repr(self))), self)
+
+    def actual(self):
+        # Returns the number of records the node was evaluated for, the number satisfying it and the time taken, or
+        # None if the node wasn't counted
+        return None
+
+
+class _Counted(_Leaf):
+    """
+    Constructs a plan node for a single condition, counting the records it is evaluated for and those satisfying it
+    :param condition: Parsed condition to be evaluated
+    :param counts: Object whose evaluated, satisfied and time attributes are added to, such as a ConditionStats
+    """
+
+    def __init__(self, condition, counts):
+        super().__init__(condition)
+        self.counts = counts
+
+    def compile(self):
+        predicate, counts = self.condition.compile(), self.counts
+
+        def counted(record):
+            start = perf_counter()
+            result = predicate(record)
+            counts.time += perf_counter() - start
+            counts.evaluated += 1
+            if result:
+                counts.satisfied += 1
+                return True
+            return False
+
+        return counted
+
+    def typed(self, types):
+        # Typed copies share the counts, so a plan may be counted before it is bound to a schema
+        return _estimated(_Counted(self.condition.typed(types), self.counts), self)
+
+    def actual(self):
+        counts = self.counts
+        return counts.evaluated, counts.satisfied, counts.time
+
+
+class _Constant:
+    """
+    Constructs a plan node which has the same result for every record, found when simplifying the where clause
+    :param value: True or False, the result of the node
+    """
+
+    def __init__(self, value):
+        self.value = value
+        self.cost = 0.0
+        self.selectivity = 1.0 if value else 0.0
+
+    def __repr__(self):
+        return "TRUE" if self.value else "FALSE"
+
+    def label(self):
+        return repr(self)
+
+    def explain(self, depth=0):
+        return [_describe(self, depth)]
+
+    def estimate(self, sample=None):
+        pass
+
+    def compile(self):
+        value = self.value
+        return lambda record: value
+
+    def references(self):
+        return set()
+
+    def required(self):
+        return set()
+
+    def mask(self, columns, masks):
+        length = len(next(iter(columns.values()))) if columns else 0
+        return masks.full(length, self.value)
+
+    def candidates(self, indexed):
+        # No record can satisfy a false node, while a true node narrows nothing
+        return None if self.value else set()
+
+    def unqualified(self, prefix):
+        return self
+
+    def typed(self, types):
+        return self
+
+    def counted(self, counts_of):
+        return self
+
+    def actual(self):
+        return None
+
+
+class _Not:
+    """
+    Constructs a plan node negating its operand
+    :param operand: Plan node to be negated
+    """
+
+    def __init__(self, operand):
+        self.operand = operand
+        self.cost = 0.0
+        self.selectivity = 0.0
+
+    def __repr__(self):
+        return f"NOT ( {self.operand!r} )"
+
+    def label(self):
+        return "NOT"
+
+    def explain(self, depth=0):
+        return [_describe(self, depth)] + self.operand.explain(depth + 1)
+
+    def estimate(self, sample=None):
+        self.operand.estimate(sample)
+        self.cost = self.operand.cost
+        self.selectivity = 1.0 - self.operand.selectivity
+
+    def compile(self):
+        operand = self.operand.compile()
+        return lambda record: not operand(record)
+
+    def references(self):
+        return self.operand.references()
+
+    def required(self):
+        return set()
+
+    def mask(self, columns, masks):
+        return masks.not_(self.operand.mask(columns, masks))
+
+    def candidates(self, indexed):
+        return None
+
+    def unqualified(self, prefix):
+        return _Not(self.operand.unqualified(prefix))
+
+    def typed(self, types):
+        return _Not(self.operand.typed(types))
+
+    def counted(self, counts_of):
+        return _estimated(_Not(self.operand.counted(counts_of)), self)
+
+    def actual(self):
+        actual = self.operand.actual()
+        if actual is None:
+            return None
+        evaluated, satisfied, time = actual
+        return evaluated, evaluated - satisfied, time
+
+
+class _And:
+    """
+    Constructs a plan node which is satisfied when all of its operands are
+    :param operands: List of plan nodes
+    """
+
+    def __init__(self, operands):
+        self.operands = operands
+        self.cost = 0.0
+        self.selectivity = 0.0
+
+    @classmethod
+    def of(cls, operands):
+        # Nested ANDs are merged into this node, and a single operand needs no node of its own
+        flattened = []
+        for operand in operands:
+            flattened.extend(
+                operand.operands if isinstance(operand, cls) else [operand]
+            )
+        return flattened[0] if len(flattened) == 1 else cls(flattened)
+
+    def __repr__(self):
+        return " AND ".join(f"( {operand!r} )" for operand in self.operands)
+
+    def label(self):
+        return "AND"
+
+    def explain(self, depth=0):
+        lines = [_describe(self, depth)]
+        for operand in self.operands:
+            lines.extend(operand.explain(depth + 1))
+        return lines
+
+    def estimate(self, sample=None):
+        for operand in self.operands:
+            operand.estimate(sample)
+        # Evaluate first the operands which are cheap and most likely to be false, so rejecting records soonest
+        self.operands.sort(
+            key=lambda operand: (
+                operand.cost / (1.0 - operand.selectivity)
+                if operand.selectivity < 1.0
+                else float("inf")
+            )
+        )
+        self.cost = 0.0
+        self.selectivity = 1.0
+        for operand in self.operands:
+            self.cost += self.selectivity * operand.cost
+            self.selectivity *= operand.selectivity
+
+    def compile(self):
+        return _all_of([operand.compile() for operand in self.operands])
+
+    def references(self):
+        return set().union(*(operand.references() for operand in self.operands))
+
+    def required(self):
+        # Records must satisfy every operand, so must contain the field literals required by any of them
+        return set().union(*(operand.required() for operand in self.operands))
+
+    def mask(self, columns, masks):
+        return reduce(
+            masks.and_, (operand.mask(columns, masks) for operand in self.operands)
+        )
+
+    def candidates(self, indexed):
+        # Records must satisfy every operand, so any operand answered from the indexes narrows the candidates
+        result = None
+        for operand in self.operands:
+            positions = operand.candidates(indexed)
+            if positions is not None:
+                result = positions if result is None else result & positions
+        return result
+
+    def unqualified(self, prefix):
+        # Copies the node for records of a single source of a join, whose fields are named without the prefix
+        return _And([operand.unqualified(prefix) for operand in self.operands])
+
+    def typed(self, types):
+        return _And([operand.typed(types) for operand in self.operands])
+
+    def counted(self, counts_of):
+        return _estimated(
+            _And([operand.counted(counts_of) for operand in self.operands]), self
+        )
+
+    def actual(self):
+        # Every record the node is evaluated for is tested by the first operand, and only those satisfying all of the
+        # others before it reach the last, so the records satisfying the last are those satisfying the node
+        actuals = [operand.actual() for operand in self.operands]
+        if None in actuals:
+            return None
+        return actuals[0][0], actuals[-1][1], sum(actual[2] for actual in actuals)
+
+
+class _Or:
+    """
+    Constructs a plan node which is satisfied when any of its operands are
+    :param operands: List of plan nodes
+    """
+
+    def __init__(self, operands):
+        self.operands = operands
+        self.cost = 0.0
+        self.selectivity = 0.0
+
+    @classmethod
+    def of(cls, operands):
+        # Nested ORs are merged into this node, and a single operand needs no node of its own
+        flattened = []
+        for operand in operands:
+            flattened.extend(
+                operand.operands if isinstance(operand, cls) else [operand]
+            )
+        return flattened[0] if len(flattened) == 1 else cls(flattened)
+
+    def __repr__(self):
+        return " OR ".join(f"( {operand!r} )" for operand in self.operands)
+
+    def label(self):
+        return "OR"
+
+    def explain(self, depth=0):
+        lines = [_describe(self, depth)]
+        for operand in self.operands:
+            lines.extend(operand.explain(depth + 1))
+        return lines
+
+    def estimate(self, sample=None):
+        for operand in self.operands:
+            operand.estimate(sample)
+        # Evaluate first the operands which are cheap and most likely to be true, so accepting records soonest
+        self.operands.sort(
+            key=lambda operand: (
+                operand.cost / operand.selectivity
+                if operand.selectivity > 0.0
+                else float("inf")
+            )
+        )
+        self.cost = 0.0
+        unsatisfied = 1.0
+        for operand in self.operands:
+            self.cost += unsatisfied * operand.cost
+            unsatisfied *= 1.0 - operand.selectivity
+        self.selectivity = 1.0 - unsatisfied
+
+    def compile(self):
+        return _any_of([operand.compile() for operand in self.operands])
+
+    def references(self):
+        return set().union(*(operand.references() for operand in self.operands))
+
+    def required(self):
+        # Records may satisfy any operand, so only field literals required by all of them are required
+        return set.intersection(*(operand.required() for operand in self.operands))
+
+    def mask(self, columns, masks):
+        return reduce(
+            masks.or_, (operand.mask(columns, masks) for operand in self.operands)
+        )
+
+    def candidates(self, indexed):
+        # Records may satisfy any operand, so every operand must be answered from the indexes to avoid a full scan
+        result = set()
+        for operand in self.operands:
+            positions = operand.candidates(indexed)
+            if positions is None:
+                return None
+            result |= positions
+        return result
+
+    def unqualified(self, prefix):
+        return _Or([operand.unqualified(prefix) for operand in self.operands])
+
+    def typed(self, types):
+        return _Or([operand.typed(types) for operand in self.operands])
+
+    def counted(self, counts_of):
+        return _estimated(
+            _Or([operand.counted(counts_of) for operand in self.operands]), self
+        )
+
+    def actual(self):
+        # Only records satisfying none of the operands before it reach the last, so those not satisfying the last are
+        # the records not satisfying the node
+        actuals = [operand.actual() for operand in self.operands]
+        if None in actuals:
+            return None
+        evaluated, rejected = actuals[0][0], actuals[-1][0] - actuals[-1][1]
+        return evaluated, evaluated - rejected, sum(actual[2] for actual in actuals)
+
+
+def _negate(node):
+    # Returns a node which is true when the given one is false, pushing the negation down onto the conditions by
+    # De Morgan's laws. A condition which can't be negated is left wrapped in a NOT node
+    if isinstance(node, _Constant):
+        return _Constant(not node.value)
+    if isinstance(node, _Not):
+        return node.operand
+    if isinstance(node, _And):
+        return _Or([_negate(operand) for operand in node.operands])
+    if isinstance(node, _Or):
+        return _And([_negate(operand) for operand in node.operands])
+    condition = node.condition.negation()
+    return _Not(node) if condition is None else _Leaf(condition)
+
+
+def _merged(node_class, operands):
+    # Merges the conditions on the same field which can be evaluated as one: comparisons with literals combined with
+    # AND into an interval, and equalities combined with OR into an IN. Merged conditions take the place of the first
+    # of those they replace
+    groups = {}
+    for operand in operands:
+        if isinstance(operand, _Leaf):
+            condition = operand.condition
+            parts = (
+                condition.bounds() if node_class is _And else condition.alternatives()
+            )
+            if parts is not None:
+                groups.setdefault(condition.key, []).append(operand)
+    members = {
+        id(leaf): group for group in groups.values() if len(group) > 1 for leaf in group
+    }
+    result = []
+    for operand in operands:
+        group = members.get(id(operand))
+        if group is None:
+            result.append(operand)
+        elif operand is group[0]:
+            conditions = [leaf.condition for leaf in group]
+            if node_class is _And:
+                merged = conditions[0].intersection(
+                    [part for condition in conditions for part in condition.bounds()]
+                )
+            else:
+                merged = conditions[0].union(
+                    [
+                        part
+                        for condition in conditions
+                        for part in condition.alternatives()
+                    ]
+                )
+            constant = merged.constant()
+            result.append(_Leaf(merged) if constant is None else _Constant(constant))
+    return result
+
+
+def _simplify_operands(node_class, operands):
+    # Simplifies the operands of an AND or OR node, which have already been simplified themselves
+    deciding = node_class is _Or  # The result of the whole node if any operand has it
+    unique = {}
+    for operand in operands:
+        for part in operand.operands if isinstance(operand, node_class) else [operand]:
+            if isinstance(part, _Constant):
+                if part.value == deciding:
+                    return _Constant(deciding)
+                continue
+            unique.setdefault(repr(part), part)
+    # A condition alongside its own negation decides the node, for example {a} = 1 AND {a} <> 1
+    for operand in unique.values():
+        if isinstance(operand, _Leaf) and repr(_negate(operand)) in unique:
+            return _Constant(deciding)
+    operands = _merged(node_class, list(unique.values()))
+    if any(
+        isinstance(operand, _Constant) and operand.value == deciding
+        for operand in operands
+    ):
+        return _Constant(deciding)
+    operands = [operand for operand in operands if not isinstance(operand, _Constant)]
+    if not operands:
+        return _Constant(not deciding)
+    return node_class.of(operands)
+
+
+def _simplify(node):
+    """
+    Simplifies a lowered where clause, pushing NOTs down onto the conditions, merging conditions on the same field,
+    dropping duplicate operands and folding operands which always have the same result into constants
+    :param node: Root plan node, as lowered from the where clause
+    :returns: Root node of the simplified plan, which is a _Constant if the where clause always has the same result
+    """
+    if isinstance(node, _Not):
+        negated = _negate(node.operand)
+        return negated if isinstance(negated, _Not) else _simplify(negated)
+    if isinstance(node, (_And, _Or)):
+        return _simplify_operands(
+            type(node), [_simplify(operand) for operand in node.operands]
+        )
+    if isinstance(node, _Leaf):
+        constant = node.condition.constant()
+        return node if constant is None else _Constant(constant)
+    return node
+
+
+def _plan(node, sample=None):
+    """
+    Estimates the cost and selectivity of each node in the lowered where clause, ordering operands accordingly
+    :param node: Root plan node, as lowered from the where clause
+    :param sample: Optional list of records from which to measure the selectivity of each condition
+    :returns: The root plan node
+    """
+    node.estimate(sample)
+    return node
+
+
+def _required_literals(plan, fields):
+    # Returns the string literals which a record satisfying the plan must have as the value of one of the given fields
+    if plan is None:
+        return set()
+    return set(literal for key, literal in plan.required() if key in fields)
@@ -0,0 +1,55 @@
+from collections import namedtuple
+from collections.abc import Mapping
+from operator import itemgetter
+
+ROW_TYPES = ("dict", "view", "tuple")
+
+
+class _RowView(Mapping):
+    """
+    Base class for read only views of the selected fields of a record. Views reference the record rather than copying
+    its values, so are cheap to create. A subclass is created for each query, holding the names of the selected fields
+    :param record: Record being viewed
+    """
+
+    __slots__ = ("_record",)
+    _keys = ()
+    _key_set = frozenset()
+
+    def __init__(self, record):
+        self._record = record
+
+    def __getitem__(self, key):
+        if key in self._key_set:
+            return self._record[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def _view_class(keys):
+    return type(
+        "RowView",
+        (_RowView,),
+        {"__slots__": (), "_keys": tuple(keys), "_key_set": frozenset(keys)},
+    )
+
+
+def _tuple_class(keys):
+    # Field names which are not valid identifiers are replaced by positional names
+    return namedtuple("Row", keys, rename=True)
+
+
+def _tuple_getter(positions):
+    # itemgetter returns a lone value rather than a tuple when given a single position
+    if len(positions) == 1:
+        position = positions[0]
+        return lambda row: (row[position],)
+    return itemgetter(*positions)
@@ -0,0 +1,125 @@
+import heapq
+from itertools import islice
+import pickle
+from tempfile import TemporaryFile
+
+from .exceptions import UnrecognisedReferenceError
+from .rows import _tuple_getter
+
+DEFAULT_SORT_BUFFER = 100000
+
+
+class _MixedKey:
+    """
+    Sort key for orderings mixing ascending and descending fields, comparing each value in the direction required.
+    A subclass is created for each ordering, holding the direction of each field
+    :param values: Tuple of the values being ordered by
+    """
+
+    __slots__ = ("values",)
+    descending = ()
+
+    def __init__(self, values):
+        self.values = values
+
+    def __eq__(self, other):
+        return self.values == other.values
+
+    def __lt__(self, other):
+        for value, other_value, descending in zip(
+            self.values, other.values, self.descending
+        ):
+            if value != other_value:
+                return value > other_value if descending else value < other_value
+        return False
+
+
+class _Ordering:
+    """
+    Constructs an ordering of records by the values of the given fields. Sorting is stable, so records with equal
+    values are kept in the order they were read
+    :param keys: Names of the fields to order by, most significant first
+    :param descending: Whether each field is ordered in descending order
+    """
+
+    def __init__(self, keys, descending):
+        self.keys = keys
+        self.descending = descending
+        # Where all fields are ordered the same way, tuples of values can be compared directly, reversing the order if
+        # need be. Otherwise each value must be compared in its own direction
+        self.reverse = all(descending)
+        if self.reverse or not any(descending):
+            self._wrap = None
+        else:
+            self._wrap = type(
+                "MixedKey",
+                (_MixedKey,),
+                {"__slots__": (), "descending": tuple(descending)},
+            )
+
+    def __repr__(self):
+        return ", ".join(
+            f"{{{key}}} DESC" if descending else f"{{{key}}}"
+            for key, descending in zip(self.keys, self.descending)
+        )
+
+    def sort_key(self, getter=None):
+        # Returns a key function for sorting, given a function returning the tuple of values to order by for an item,
+        # which by default fetches them from a record
+        getter = getter or _tuple_getter(self.keys)
+        wrap = self._wrap
+
+        def key(item):
+            try:
+                values = getter(item)
+            except KeyError as exc:
+                raise UnrecognisedReferenceError(f"{{{exc.args[0]}}}") from None
+            return wrap(values) if wrap else values
+
+        return key
+
+    def top(self, rows, count):
+        # Returns the first count rows in order, holding no more than count rows in memory at once
+        select = heapq.nlargest if self.reverse else heapq.nsmallest
+        return select(count, rows, key=self.sort_key())
+
+    def sort(self, rows, buffer_size=DEFAULT_SORT_BUFFER):
+        # Sorts the rows, in memory if there are no more than buffer_size of them. Otherwise runs of buffer_size rows
+        # are sorted and spilled to temporary files, and the runs merged as they are read back
+        key = self.sort_key()
+        rows = iter(rows)
+        run = list(islice(rows, buffer_size))
+        run.sort(key=key, reverse=self.reverse)
+        following = list(islice(rows, buffer_size))
+        if not following:
+            return iter(run)
+
+        runs = [_spill(run)]
+        while following:
+            following.sort(key=key, reverse=self.reverse)
+            runs.append(_spill(following))
+            following = list(islice(rows, buffer_size))
+        return heapq.merge(
+            *(_unspill(file) for file in runs), key=key, reverse=self.reverse
+        )
+
+
+def _spill(rows):
+    file = TemporaryFile()
+    pickler = pickle.Pickler(file, pickle.HIGHEST_PROTOCOL)
+    for row in rows:
+        pickler.dump(row)
+        # Rows are independent, so there is no need for the pickler to remember those already written
+        pickler.clear_memo()
+    file.seek(0)
+    return file
+
+
+def _unspill(file):
+    with file:
+        unpickler = pickle.Unpickler(file)
+        while True:
+            try:
+                yield unpickler.load()
+            except EOFError:
+                return
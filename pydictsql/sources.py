@@ -0,0 +1,254 @@
+import abc
+from contextlib import nullcontext
+import csv
+from itertools import islice
+import json
+import mmap
+import os
+import re
+from typing import Callable, Iterable, Optional, Union
+
+from .exceptions import UnrecognisedReferenceError
+from .rows import _tuple_getter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DEFAULT_BUFFER_SIZE = 1 << 20
+DEFAULT_CHUNK_SIZE = 10000
+
+
+class Source(abc.ABC):
+    """
+    Base class for sources which produce the records to be filtered, given the parsed SQL they will be filtered with,
+    so that a source may use the SQL to avoid producing records which can't match. Subclasses implement records, which
+    may call parser.referenced_fields() for the names of the fields the SQL needs (None if it selects all fields), and
+    parser.required_literals(fields) for the strings a record must have as the value of one of the given fields, which
+    must be known to hold strings, to match. Subclasses may
+    also implement access, describing for DictFilter.explain() how records are produced for the SQL
+    """
+
+    @abc.abstractmethod
+    def records(self, parser):
+        pass
+
+    def access(self, parser):
+        # Returns a description of how the records are read for the SQL, or None if every record is simply produced
+        return None
+
+
+def _string_fields(prefilter):
+    # Returns the names of the fields declared to hold only strings, given a name or an iterable of names
+    if isinstance(prefilter, bool):
+        raise ValueError("Prefilter must name the fields which hold only strings")
+    return frozenset([prefilter] if isinstance(prefilter, str) else prefilter)
+
+
+def _prefiltered(parser, prefilter):
+    # Describes the string literals lines are searched for before being decoded
+    literals = parser.required_literals(prefilter)
+    if not literals:
+        return ""
+    return " PREFILTERED ON " + ", ".join(repr(literal) for literal in sorted(literals))
+
+
+class NdjsonSource(Source):
+    """
+    Constructs a source of records read from a newline delimited JSON (JSON Lines) file, decoding each line as it is
+    read. Lines are read in blocks of buffer_size bytes, and are decoded with orjson if it is installed.
+    If prefilter names fields which hold only strings, lines which do not contain every string literal that the SQL
+    requires one of those fields to equal are skipped without being decoded. Literals compared with fields of other
+    types are never searched for, as they are converted to the type of the value, so '01' equals the number 1, nor are
+    literals holding characters which encoders may escape, such as quotes, <, >, & or any outside printable ASCII
+    :param file: Path of the file, or a file object opened for reading
+    :param prefilter: Name, or names, of the fields holding only strings, on which lines are prefiltered
+    :param buffer_size: Approximate number of bytes read from the file at a time
+    :raises ValueError: Raised if prefilter is not a name or names of fields
+    """
+
+    def __init__(
+        self,
+        file,
+        prefilter: Union[str, Iterable[str]] = (),
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ):
+        self._file = file
+        self._prefilter = _string_fields(prefilter)
+        self._buffer_size = buffer_size
+
+    def records(self, parser):
+        literals = parser.required_literals(self._prefilter)
+        encoded = set(literal.encode() for literal in literals)
+        loads = orjson.loads if orjson else json.loads
+        with self._open() as file:
+            while lines := file.readlines(self._buffer_size):
+                for line in lines:
+                    if line.isspace():
+                        continue
+                    required = encoded if isinstance(line, bytes) else literals
+                    if required and not all(literal in line for literal in required):
+                        continue
+                    yield loads(line)
+
+    def access(self, parser):
+        return "NDJSON" + _prefiltered(parser, self._prefilter)
+
+    def _open(self):
+        if isinstance(self._file, str) or hasattr(self._file, "__fspath__"):
+            return open(self._file, "rb", buffering=self._buffer_size)
+        # File objects are left open, as they belong to the caller
+        return nullcontext(self._file)
+
+
+# Any character other than whitespace, found to skip blank lines
+_NON_SPACE = re.compile(rb"\S")
+
+
+class MmapNdjsonSource(Source):
+    """
+    Constructs a source of records read from a newline delimited JSON (JSON Lines) file by memory mapping it, so that
+    the file is paged in by the operating system rather than read into Python. Each line is passed to orjson as a
+    slice of the mapped file, without being copied into a bytes object. Without orjson, each line is copied in order
+    to be decoded by json. Prefiltering is as for NdjsonSource, searching each line within the mapped file
+    :param file: Path of the file, or a file object opened in binary mode with a file descriptor
+    :param prefilter: Name, or names, of the fields holding only strings, on which lines are prefiltered
+    :raises ValueError: Raised if prefilter is not a name or names of fields
+    """
+
+    def __init__(self, file, prefilter: Union[str, Iterable[str]] = ()):
+        self._file = file
+        self._prefilter = _string_fields(prefilter)
+
+    def records(self, parser):
+        literals = parser.required_literals(self._prefilter)
+        required = [literal.encode() for literal in literals]
+        loads = orjson.loads if orjson else lambda line: json.loads(bytes(line))
+        with self._open() as file:
+            if not os.fstat(file.fileno()).st_size:
+                # An empty file can't be mapped
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield from self._decode(mapped, required, loads)
+
+    def access(self, parser):
+        return "MEMORY MAPPED NDJSON" + _prefiltered(parser, self._prefilter)
+
+    @staticmethod
+    def _decode(mapped, required, loads):
+        # Slices of the view must all be released before the file is unmapped, so are never held beyond a line
+        find = mapped.find
+        with memoryview(mapped) as view:
+            start, size = 0, len(mapped)
+            while start < size:
+                end = find(b"\n", start)
+                if end < 0:
+                    end = size
+                line, start = start, end + 1
+                if required and not all(
+                    find(literal, line, end) >= 0 for literal in required
+                ):
+                    continue
+                try:
+                    record = loads(view[line:end])
+                except ValueError:
+                    # Blank lines are skipped, which is only checked for lines which fail to decode
+                    if _NON_SPACE.search(mapped, line, end):
+                        raise
+                    continue
+                yield record
+
+    def _open(self):
+        if isinstance(self._file, str) or hasattr(self._file, "__fspath__"):
+            return open(self._file, "rb")
+        return nullcontext(self._file)
+
+
+def _short_row(chunk, read, index):
+    # Describes the first row of a chunk of CSV rows which is too short to hold the column at the given index
+    for number, row in enumerate(chunk, read + 1):
+        if row and len(row) <= index:
+            return f"Row {number} of the CSV file has {len(row)} fields, fewer than its header"
+
+
+class CsvSource(Source):
+    """
+    Constructs a source of records read from a CSV file with a header row. Only the columns referenced by the SQL are
+    read into each record, and values are converted as declared by types, so that numeric columns can be compared as
+    numbers. Rows are read and converted a chunk at a time
+    :param file: Path of the file, or a file object opened for reading in text mode
+    :param types: Mapping of column name to a callable converting the string read from the file, such as int or float.
+    Columns not given are left as strings
+    :param chunksize: Number of rows read and converted at a time
+    :param encoding: Encoding used when opening a path
+    :param fmtparams: Further formatting parameters passed to csv.reader, such as delimiter
+    :raises ValueError: Raised when reading a row which has too few fields to hold a column referenced by the SQL
+    """
+
+    def __init__(
+        self,
+        file,
+        types: Optional[dict[str, Callable]] = None,
+        chunksize: int = DEFAULT_CHUNK_SIZE,
+        encoding: str = "utf-8",
+        **fmtparams,
+    ):
+        self._file = file
+        self._types = types or {}
+        self._chunksize = chunksize
+        self._encoding = encoding
+        self._fmtparams = fmtparams
+
+    def records(self, parser):
+        with self._open() as file:
+            reader = csv.reader(file, **self._fmtparams)
+            header = next(reader, None)
+            if header is None:
+                return
+            fields = parser.referenced_fields()
+            if fields is None:
+                names = header
+            else:
+                for field in fields:
+                    if field not in header:
+                        raise UnrecognisedReferenceError(f"{{{field}}}")
+                names = [name for name in header if name in fields]
+            if not names:
+                # No columns are needed, as for COUNT(*) alone, but each row is still a record
+                yield from ({} for row in reader if row)
+                return
+            indices = [header.index(name) for name in names]
+            getter = _tuple_getter(indices)
+            converters = [self._types.get(name) for name in names]
+
+            # Number of rows read before each chunk, counting the header
+            read = 1
+            while chunk := list(islice(reader, self._chunksize)):
+                # Pick out the columns needed from each row, then convert each column as a whole
+                try:
+                    columns = zip(*map(getter, filter(None, chunk)))
+                except IndexError:
+                    raise ValueError(_short_row(chunk, read, max(indices))) from None
+                read += len(chunk)
+                columns = [
+                    list(map(convert, values)) if convert else values
+                    for convert, values in zip(converters, columns)
+                ]
+                for values in zip(*columns):
+                    yield dict(zip(names, values))
+
+    def access(self, parser):
+        # Only the columns referenced are read, so the projection is pushed down to the file
+        fields = parser.referenced_fields()
+        if fields is None:
+            return "CSV"
+        if not fields:
+            return "CSV READING NO COLUMNS"
+        return "CSV READING " + ", ".join(f"{{{field}}}" for field in sorted(fields))
+
+    def _open(self):
+        if isinstance(self._file, str) or hasattr(self._file, "__fspath__"):
+            return open(self._file, newline="", encoding=self._encoding)
+        # File objects are left open, as they belong to the caller
+        return nullcontext(self._file)
@@ -0,0 +1,158 @@
+from copy import copy
+from time import perf_counter
+
+"""
+Statistics are collected by wrapping the compiled predicate and projections rather than by profiling, so a filter
+which doesn't collect them runs exactly as before. When collected, each condition of the WHERE clause is compiled
+into a predicate counting and timing the records it is evaluated for and those satisfying it, and the predicate as a
+whole and each projection are timed per call. Conditions not evaluated for a record, because an earlier one decided it, are not
+counted, so the counts show how the plan's ordering plays out as well as how selective each condition is.
+"""
+
+# Statistics accumulated over the queries run, rather than set once
+_TOTALS = [
+    "queries",
+    "rows_scanned",
+    "rows_matched",
+    "rows_projected",
+    "predicate_time",
+    "projection_time",
+    "elapsed",
+]
+
+
+class ConditionStats:
+    """
+    Constructs the statistics of a single condition of the WHERE clause
+    :param condition: Text of the condition, as shown by explain()
+    """
+
+    def __init__(self, condition):
+        self.condition = condition
+        self.evaluated = 0
+        self.satisfied = 0
+        self.time = 0.0
+
+    def __repr__(self):
+        return (
+            f"{self.condition} [evaluated={self.evaluated} satisfied={self.satisfied} "
+            f"time={self.time:.6f}]"
+        )
+
+    @property
+    def true_rate(self):
+        # Proportion of the records the condition was evaluated for which satisfied it, or None if it wasn't evaluated
+        return self.satisfied / self.evaluated if self.evaluated else None
+
+
+class QueryStats:
+    """
+    Constructs the statistics of the queries run by a filter, see DictFilter's stats parameter. Times are in seconds
+    :param sql: SQL of the filter
+    """
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.queries = 0
+        self.rows_scanned = 0
+        self.rows_matched = 0
+        self.rows_projected = 0
+        self.parse_time = 0.0
+        self.predicate_time = 0.0
+        self.projection_time = 0.0
+        self.elapsed = 0.0
+        self.conditions = {}
+
+    def __repr__(self):
+        return (
+            f"QueryStats(queries={self.queries}, rows_scanned={self.rows_scanned}, rows_matched={self.rows_matched}, "
+            f"rows_projected={self.rows_projected}, parse_time={self.parse_time:.6f}, "
+            f"predicate_time={self.predicate_time:.6f}, projection_time={self.projection_time:.6f}, "
+            f"elapsed={self.elapsed:.6f})"
+        )
+
+    def as_dict(self):
+        """
+        Returns the statistics as a dict of plain values, for example to be logged as JSON
+        :returns: Dict of each statistic, with conditions as a list of dicts
+        """
+        result = {
+            key: value for key, value in vars(self).items() if key != "conditions"
+        }
+        result["conditions"] = [
+            {
+                "condition": counts.condition,
+                "evaluated": counts.evaluated,
+                "satisfied": counts.satisfied,
+                "true_rate": counts.true_rate,
+                "time": counts.time,
+            }
+            for counts in self.conditions.values()
+        ]
+        return result
+
+    def copy(self):
+        result = copy(self)
+        result.conditions = {
+            key: copy(counts) for key, counts in self.conditions.items()
+        }
+        return result
+
+    def since(self, earlier):
+        # Returns the statistics gathered since the earlier copy was taken, that is those of a single query
+        result = self.copy()
+        for key in _TOTALS:
+            setattr(result, key, getattr(self, key) - getattr(earlier, key))
+        for key, counts in result.conditions.items():
+            before = earlier.conditions.get(key)
+            if before is not None:
+                counts.evaluated -= before.evaluated
+                counts.satisfied -= before.satisfied
+                counts.time -= before.time
+        return result
+
+    def counts(self, condition):
+        # Returns the statistics of the condition with the given text, shared by every plan compiled for the filter
+        counts = self.conditions.get(condition)
+        if counts is None:
+            counts = self.conditions[condition] = ConditionStats(condition)
+        return counts
+
+    def timed(self, predicate):
+        # Wraps the predicate to count the records scanned and matched, and the time spent testing them
+        stats = self
+
+        def timed_predicate(record):
+            start = perf_counter()
+            result = predicate(record)
+            stats.predicate_time += perf_counter() - start
+            stats.rows_scanned += 1
+            if result:
+                stats.rows_matched += 1
+            return result
+
+        return timed_predicate
+
+    def timed_projection(self, project):
+        stats = self
+
+        def timed_project(record):
+            start = perf_counter()
+            result = project(record)
+            stats.projection_time += perf_counter() - start
+            stats.rows_projected += 1
+            return result
+
+        return timed_project
+
+    def timed_batch_projection(self, project_batch):
+        stats = self
+
+        def timed_project_batch(records):
+            start = perf_counter()
+            result = project_batch(records)
+            stats.projection_time += perf_counter() - start
+            stats.rows_projected += len(records)
+            return result
+
+        return timed_project_batch
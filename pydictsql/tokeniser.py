@@ -1,7 +1,6 @@
 from collections import namedtuple
 from enum import Enum
 import re
-from string import ascii_letters, digits
 import typing
 
 from pydictsql.exceptions import InvalidTokenError, UnexpectedTokenError
@@ -9,7 +8,21 @@ from pydictsql.exceptions import InvalidTokenError, UnexpectedTokenError
 REFERENCE_PAT = re.compile(r"{[^}]*}")
 NUMBER_PAT = re.compile(r"-?[0-9]+(\.[-0-9]+)?")
 STRING_PAT = re.compile(r"(['\"])[^'\"]*\1")
-SYMBOLS = "=<>(),*"
+
+# Single pattern recognising every token, so that the SQL is tokenised in one pass. Alternatives are tried in order,
+# so anything not otherwise recognised falls through to INVALID, which collects the bad token to be reported
+TOKEN_PAT = re.compile(
+    r"""
+    (?P<SPACE>\s+)
+    | (?P<REFERENCE>{[^}]*})
+    | (?P<STRING>'[^'"]*'|"[^'"]*")
+    | (?P<SYMBOL><=|>=|<>|[=<>(),*])
+    | (?P<NUMBER>-?[0-9]+(?:\.[0-9]+)?(?![A-Za-z0-9_.]))
+    | (?P<WORD>[A-Za-z_][A-Za-z0-9_.]*)
+    | (?P<INVALID>'[^']*'?|"[^"]*"?|{[^}]*|\S[A-Za-z0-9_.]*)
+    """,
+    re.VERBOSE,
+)
 
 _Token = namedtuple("Token", ["ttype", "value"])
 
@@ -25,10 +38,10 @@ class _TokenType(Enum):
     GT = -7
     GTE = -8
     NE = -9
-    LPAREN = -7
-    RPAREN = -8
-    COMMA = -9
-    ASTERISK = -10
+    LPAREN = -10
+    RPAREN = -11
+    COMMA = -12
+    ASTERISK = -13
 
     SELECT = 1
     FROM = 2
@@ -36,32 +49,30 @@ class _TokenType(Enum):
     AND = 4
     OR = 5
     NOT = 6
+    LIMIT = 7
+    OFFSET = 8
+    ORDER = 9
+    BY = 10
+    ASC = 11
+    DESC = 12
+    GROUP = 13
+    COUNT = 14
+    SUM = 15
+    MIN = 16
+    MAX = 17
+    AVG = 18
+    JOIN = 19
+    ON = 20
+    IN = 21
+    BETWEEN = 22
+    LIKE = 23
 
     @classmethod
     def get_token(cls, val):
-        try:
-            # First off, see if we have a valid match to a known keyword
-            result = cls[val.upper()]
-            if result.value > 0:
-                return result
-        except:
-            pass
-
-        # Lets see if its a symbol
-        for ttype, expected in [
-            (cls.EQUALS, "="),
-            (cls.LT, "<"),
-            (cls.LTE, "<="),
-            (cls.GT, ">"),
-            (cls.GTE, ">="),
-            (cls.NE, "<>"),
-            (cls.LPAREN, "("),
-            (cls.RPAREN, ")"),
-            (cls.COMMA, ","),
-            (cls.ASTERISK, "*"),
-        ]:
-            if val == expected:
-                return ttype
+        # First off, see if we have a valid match to a known keyword or symbol
+        ttype = _KEYWORDS.get(val.upper()) or _SYMBOL_TYPES.get(val)
+        if ttype:
+            return ttype
 
         # Not a valid keyword, so lets see if it is another valid construct
         for ttype, pat in [
@@ -83,6 +94,31 @@ class _TokenType(Enum):
     def rvalues(cls):
         return set([cls.REFERENCE, cls.STRING, cls.NUMBER])
 
+    @classmethod
+    def literals(cls):
+        return set([cls.STRING, cls.NUMBER])
+
+    @classmethod
+    def aggregates(cls):
+        return set([cls.COUNT, cls.SUM, cls.MIN, cls.MAX, cls.AVG])
+
+
+# Keywords are those token types with positive values, looked up by upper case name
+_KEYWORDS = {ttype.name: ttype for ttype in _TokenType if ttype.value > 0}
+
+_SYMBOL_TYPES = {
+    "=": _TokenType.EQUALS,
+    "<": _TokenType.LT,
+    "<=": _TokenType.LTE,
+    ">": _TokenType.GT,
+    ">=": _TokenType.GTE,
+    "<>": _TokenType.NE,
+    "(": _TokenType.LPAREN,
+    ")": _TokenType.RPAREN,
+    ",": _TokenType.COMMA,
+    "*": _TokenType.ASTERISK,
+}
+
 
 class _Tokeniser:
     """
@@ -93,11 +129,9 @@ class _Tokeniser:
 
     def __init__(self, sql: str):
         self._sql = sql
-        self._pos = 0  # Use this for tokenising to start with
-        self._tokens = [
-            t for t in self._tokenise()
-        ]  # Note that we tokenise up front rather than using the generator directly to support look ahead
-        self._pos = 0  # Then reuse for managing the consumption of tokens
+        # Note that we tokenise up front rather than using the generator directly to support look ahead
+        self._tokens = list(self._tokenise())
+        self._pos = 0
 
     """
     Consume and return a Token, either simply returning the Token or validating that it is of the expected type. If not, a ValueError is raised
@@ -121,11 +155,13 @@ class _Tokeniser:
 
     """
     Return the next Token without consuming it, so that the parser can determine the appropriate action
-    :returns: Next Token that will be consumed
+    :param ahead: Number of tokens to look beyond the next
+    :returns: Next Token that will be consumed, or the token the given number of tokens after it
     """
 
-    def peek_next(self):
-        return self._tokens[self._pos] if self._pos < len(self._tokens) else None
+    def peek_next(self, ahead: int = 0):
+        pos = self._pos + ahead
+        return self._tokens[pos] if pos < len(self._tokens) else None
 
     """
     Returns whether the next token is of a given type. Like peek_next, does not consume the token
@@ -136,63 +172,24 @@ class _Tokeniser:
         next = self.peek_next()
         return next and next.ttype == ttype
 
-    def _curr_char(self):
-        return self._sql[self._pos]
-
     def _tokenise(self):
-        self._pos = 0
-        while self._pos < len(self._sql):
-            token = ""
-            curr = self._curr_char()
-            if curr.isspace():
-                self._pos += 1
-            elif curr == "{":
-                # This is a reference, so collect up to and including the closing brace
-                token = self._collect("}")
-            elif curr in "'\"":
-                # This is a string, so collect up to and including the closing matching quote
-                token = self._collect(self._sql[self._pos])
-            elif curr in SYMBOLS:
-                # This is an operator - either a single character or compound comparator, collect the whole operator
-                token = self._collect_operator()
-            else:
-                # Probably a keyword, collect until we hit a separator
-                token = self._collect()
-
-            if token:
-                ttype = _TokenType.get_token(token)
-                if ttype:
-                    yield _Token(ttype, token)
-                else:
-                    raise InvalidTokenError(token)
-
-    def _collect(self, separator=None):
-        result = self._sql[self._pos]
-        self._pos += 1
-
-        if separator:
-            sep_hit = lambda x: x == separator
-        else:
-            sep_hit = lambda x: x not in ascii_letters + digits + "_."
-
-        while self._pos < len(self._sql) and not sep_hit(self._sql[self._pos]):
-            result += self._sql[self._pos]
-            self._pos += 1
-        if (
-            separator
-            and self._pos < len(self._sql)
-            and self._sql[self._pos] == separator
-        ):
-            result += separator
-            self._pos += 1
-
-        return result
-
-    def _collect_operator(self):
-        check = self._sql[self._pos : self._pos + 2]
-        if check in [">=", "<=", "<>"]:
-            self._pos += 2
-            return check
-        curr = self._curr_char()
-        self._pos += 1
-        return curr
+        for match in TOKEN_PAT.finditer(self._sql):
+            kind, token = match.lastgroup, match.group()
+            match kind:
+                case "SPACE":
+                    continue
+                case "REFERENCE":
+                    ttype = _TokenType.REFERENCE
+                case "STRING":
+                    ttype = _TokenType.STRING
+                case "NUMBER":
+                    ttype = _TokenType.NUMBER
+                case "SYMBOL":
+                    ttype = _SYMBOL_TYPES[token]
+                case "WORD":
+                    ttype = _KEYWORDS.get(token.upper())
+                case _:
+                    ttype = None
+            if ttype is None:
+                raise InvalidTokenError(token)
+            yield _Token(ttype, token)
@@ -0,0 +1,89 @@
+import pytest
+
+from pydictsql.aggregates import _Aggregate, _Grouping
+from pydictsql.exceptions import UnrecognisedReferenceError
+from pydictsql.tokeniser import _TokenType
+
+RECORDS = [
+    {"team": "a", "value": 3},
+    {"team": "b", "value": None},
+    {"team": "a", "value": 1},
+    {"team": "b", "value": 4},
+    {"team": "c", "value": None},
+]
+
+
+def test_aggregate_names():
+    assert _Aggregate(_TokenType.COUNT, None).name == "COUNT(*)"
+    assert _Aggregate(_TokenType.AVG, "value").name == "AVG(value)"
+
+
+def test_grouping():
+    functions = sorted(_TokenType.aggregates(), key=lambda ttype: ttype.value)
+    grouping = _Grouping(
+        ["team"],
+        ["team"]
+        + [_Aggregate(function, "value") for function in functions]
+        + [_Aggregate(_TokenType.COUNT, None)],
+    )
+    assert grouping.fields() == {"team", "value"}
+    assert grouping.aggregate(RECORDS) == [
+        {
+            "team": "a",
+            "COUNT(value)": 2,
+            "SUM(value)": 4,
+            "MIN(value)": 1,
+            "MAX(value)": 3,
+            "AVG(value)": 2.0,
+            "COUNT(*)": 2,
+        },
+        {
+            "team": "b",
+            "COUNT(value)": 1,
+            "SUM(value)": 4,
+            "MIN(value)": 4,
+            "MAX(value)": 4,
+            "AVG(value)": 4.0,
+            "COUNT(*)": 2,
+        },
+        # Values of None are ignored, other than by COUNT(*)
+        {
+            "team": "c",
+            "COUNT(value)": 0,
+            "SUM(value)": None,
+            "MIN(value)": None,
+            "MAX(value)": None,
+            "AVG(value)": None,
+            "COUNT(*)": 1,
+        },
+    ]
+
+
+def test_grouping_incremental():
+    grouping = _Grouping(["team"], ["team", _Aggregate(_TokenType.SUM, "value")])
+    groups = grouping.start()
+    for record in RECORDS:
+        grouping.update(groups, [record])
+    assert grouping.results(groups) == grouping.aggregate(RECORDS)
+
+
+def test_grouping_empty():
+    count = _Aggregate(_TokenType.COUNT, None)
+    assert _Grouping([], [count]).aggregate([]) == [{"COUNT(*)": 0}]
+    assert _Grouping(["team"], [count]).aggregate([]) == []
+
+
+def test_grouping_missing_field():
+    grouping = _Grouping(["city"], [_Aggregate(_TokenType.COUNT, None)])
+    with pytest.raises(UnrecognisedReferenceError):
+        grouping.aggregate(RECORDS)
+    grouping = _Grouping([], [_Aggregate(_TokenType.MAX, "sales")])
+    with pytest.raises(UnrecognisedReferenceError):
+        grouping.aggregate(RECORDS)
+
+
+def test_sum_strings():
+    for function in [_TokenType.SUM, _TokenType.AVG]:
+        grouping = _Grouping([], [_Aggregate(function, "a")])
+        with pytest.raises(TypeError):
+            grouping.aggregate([{"a": "1"}, {"a": "2"}])
@@ -0,0 +1,107 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+import pydictsql
+
+from pydictsql.exceptions import UnrecognisedReferenceError
+
+SOURCE_DATA = [{"id": i, "value": i % 5} for i in range(250)]
+SQL = "SELECT {id} FROM {source} WHERE {value} = 0"
+EXPECTED = [{"id": i} for i in range(0, 250, 5)]
+
+
+async def async_source(records):
+    for record in records:
+        await asyncio.sleep(0)
+        yield record
+
+
+def test_afilter():
+    filter = pydictsql.DictFilter(SQL)
+    result = asyncio.run(filter.afilter(batch_size=7, source=async_source(SOURCE_DATA)))
+    assert result == EXPECTED
+
+
+def test_afiltergen():
+    async def collect():
+        filter = pydictsql.DictFilter(SQL)
+        return [
+            record
+            async for record in filter.afiltergen(source=async_source(SOURCE_DATA))
+        ]
+
+    assert asyncio.run(collect()) == EXPECTED
+
+
+def test_afilter_sync_source():
+    filter = pydictsql.DictFilter(SQL)
+    assert asyncio.run(filter.afilter(batch_size=10, source=SOURCE_DATA)) == EXPECTED
+
+
+def test_afilter_executors():
+    filter = pydictsql.DictFilter(SQL)
+    for executor in [ThreadPoolExecutor(2), ProcessPoolExecutor(2)]:
+        with executor:
+            result = asyncio.run(
+                filter.afilter(
+                    batch_size=50, executor=executor, source=async_source(SOURCE_DATA)
+                )
+            )
+        assert result == EXPECTED
+
+
+def test_afilter_process_row_type():
+    filter = pydictsql.DictFilter(
+        SQL, row_type="tuple", schema={"id": int, "value": int}
+    )
+    with ProcessPoolExecutor(2) as executor:
+        result = asyncio.run(
+            filter.afilter(batch_size=50, executor=executor, source=SOURCE_DATA)
+        )
+    assert result == [(row["id"],) for row in EXPECTED]
+    assert all(isinstance(row, tuple) and row.id == row[0] for row in result)
+
+
+def test_afilter_invalid():
+    filter = pydictsql.DictFilter(SQL)
+    with pytest.raises(ValueError):
+        asyncio.run(filter.afilter(source2=SOURCE_DATA))
+    with pytest.raises(ValueError):
+        asyncio.run(filter.afilter(source=7))
+    with pytest.raises(ValueError):
+        asyncio.run(filter.afilter(batch_size=0, source=SOURCE_DATA))
+    with pytest.raises(UnrecognisedReferenceError):
+        asyncio.run(filter.afilter(source=async_source([{"id": 1}])))
+
+
+def test_afilter_limit():
+    consumed = []
+
+    async def counting_source():
+        async for record in async_source(SOURCE_DATA):
+            consumed.append(record)
+            yield record
+
+    filter = pydictsql.DictFilter(SQL + " LIMIT 3 OFFSET 1")
+    result = asyncio.run(filter.afilter(batch_size=10, source=counting_source()))
+    assert result == EXPECTED[1:4]
+    assert len(consumed) == 20
+
+
+def test_afilter_order_by():
+    filter = pydictsql.DictFilter(
+        "SELECT {id} FROM {source} WHERE {value} = 0 ORDER BY {id} DESC LIMIT 3"
+    )
+    result = asyncio.run(filter.afilter(batch_size=7, source=async_source(SOURCE_DATA)))
+    assert result == [{"id": 245}, {"id": 240}, {"id": 235}]
+
+
+def test_afilter_group_by():
+    filter = pydictsql.DictFilter(
+        "SELECT {value}, COUNT(*), MAX({id}) FROM {source} GROUP BY {value} ORDER BY {value}"
+    )
+    result = asyncio.run(filter.afilter(batch_size=7, source=async_source(SOURCE_DATA)))
+    assert result == [
+        {"value": value, "COUNT(*)": 50, "MAX(id)": 245 + value} for value in range(5)
+    ]
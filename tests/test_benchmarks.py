@@ -0,0 +1,57 @@
+import pytest
+
+from benchmarks.compare import compare
+from benchmarks.datasets import dataset, records, selecting, size_of
+
+import pydictsql
+
+
+def test_datasets_reproducible():
+    assert dataset(100, extra_fields=2) == dataset(100, extra_fields=2)
+    assert dataset(100, seed=1) != dataset(100, seed=2)
+    record = next(records(1, extra_fields=2))
+    assert list(record.keys()) == [
+        "id",
+        "value",
+        "category",
+        "amount",
+        "name",
+        "field0",
+        "field1",
+    ]
+    assert size_of("1M") == 1_000_000
+    assert size_of("250") == 250
+    with pytest.raises(ValueError):
+        size_of("0")
+
+
+def test_selectivity():
+    data = dataset(10000)
+    filter = pydictsql.DictFilter(
+        f"SELECT {{id}} FROM {{source}} WHERE {selecting(0.1)}"
+    )
+    assert 900 < len(filter.filter(source=data)) < 1100
+
+
+def test_compare():
+    def run(*timings):
+        return {
+            "results": [
+                {
+                    "name": name,
+                    "size": 10,
+                    "params": {"selectivity": 0.1},
+                    "min": timing,
+                }
+                for name, timing in timings
+            ]
+        }
+
+    rows = compare(
+        run(("filter", 1.0), ("where", 1.0)), run(("where", 1.5), ("new", 1.0)), 0.1
+    )
+    assert len(rows) == 1
+    (key, before, after, ratio, regressed) = rows[0]
+    assert key == ("where", 10, '{"selectivity": 0.1}')
+    assert (before, after, ratio, regressed) == (1.0, 1.5, 1.5, True)
+    assert not compare(run(("where", 1.0)), run(("where", 1.05)), 0.1)[0][4]
@@ -0,0 +1,71 @@
+import pytest
+import pydictsql
+
+from pydictsql.cache import _QueryCache, DEFAULT_CACHE_SIZE
+from pydictsql.exceptions import UnexpectedTokenError
+
+
+def test_hit_and_miss():
+    cache = _QueryCache(4)
+    parser = cache.get("SELECT * FROM {source}")
+    assert cache.get("SELECT * FROM {source}") is parser
+    info = cache.info()
+    assert info.hits == 1
+    assert info.misses == 1
+    assert info.evictions == 0
+    assert info.currsize == 1
+
+
+def test_eviction():
+    cache = _QueryCache(2)
+    first = cache.get("SELECT {a} FROM {source}")
+    cache.get("SELECT {b} FROM {source}")
+    cache.get("SELECT {a} FROM {source}")
+    cache.get("SELECT {c} FROM {source}")
+    info = cache.info()
+    assert info.evictions == 1
+    assert info.currsize == 2
+    # {b} was least recently used so was evicted, {a} remains
+    assert cache.get("SELECT {a} FROM {source}") is first
+    cache.get("SELECT {b} FROM {source}")
+    assert cache.info().misses == 4
+
+
+def test_disabled():
+    cache = _QueryCache(0)
+    assert cache.get("SELECT * FROM {source}") is not cache.get(
+        "SELECT * FROM {source}"
+    )
+    assert cache.info().currsize == 0
+
+
+def test_resize_and_clear():
+    cache = _QueryCache(4)
+    for ref in "abcd":
+        cache.get(f"SELECT {{{ref}}} FROM {{source}}")
+    cache.resize(1)
+    assert cache.info().currsize == 1
+    assert cache.info().evictions == 3
+    cache.clear()
+    assert cache.info() == (0, 0, 0, 1, 0)
+    with pytest.raises(ValueError):
+        cache.resize(-1)
+
+
+def test_invalid_sql_not_cached():
+    cache = _QueryCache(4)
+    with pytest.raises(UnexpectedTokenError):
+        cache.get("SELECT")
+    assert cache.info().currsize == 0
+
+
+def test_module_api():
+    pydictsql.clear_cache()
+    pydictsql.DictFilter("SELECT {name} FROM {source}")
+    pydictsql.DictFilter("SELECT {name} FROM {source}")
+    info = pydictsql.cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
+    pydictsql.set_cache_size(DEFAULT_CACHE_SIZE)
+    pydictsql.clear_cache()
+    assert pydictsql.cache_info().currsize == 0
@@ -0,0 +1,96 @@
+import pytest
+
+from pydictsql.columnar import _ListMasks, _NumpyMasks
+from pydictsql.exceptions import UnrecognisedReferenceError
+from pydictsql.parser import _Parser
+
+COLUMNS = {
+    "name": ["Adam", "Bob", "Charles", "David", "Edward"],
+    "city": ["London", "London", "Birmingham", "London", "Cardiff"],
+    "sales": [100, 400, 350, 290, 180],
+    "target": [150, 300, 350, 300, 200],
+}
+
+
+def backends():
+    yield _ListMasks
+    try:
+        import numpy
+    except ImportError:
+        return
+    yield _NumpyMasks
+
+
+def as_list(values):
+    return [value.item() if hasattr(value, "item") else value for value in values]
+
+
+def test_no_where():
+    parser = _Parser("SELECT {name} FROM {source}")
+    for masks in backends():
+        result = parser.filter_columns(COLUMNS, masks)
+        assert as_list(result["name"]) == COLUMNS["name"]
+
+
+def test_select_all():
+    parser = _Parser("SELECT * FROM {source} WHERE {sales} > 300")
+    for masks in backends():
+        result = parser.filter_columns(COLUMNS, masks)
+        assert set(result.keys()) == set(COLUMNS.keys())
+        assert as_list(result["sales"]) == [400, 350]
+
+
+def test_conditions():
+    parser = _Parser(
+        "SELECT {name}, {sales} FROM {source} WHERE ({city} = 'London' AND NOT {sales} < 200) OR {sales} >= {target}"
+    )
+    for masks in backends():
+        result = parser.filter_columns(COLUMNS, masks)
+        assert as_list(result["name"]) == ["Bob", "Charles", "David"]
+        assert as_list(result["sales"]) == [400, 350, 290]
+
+
+def test_matches_records():
+    sql = "SELECT {name} FROM {source} WHERE {city} <> 'London' OR {sales} <= 290 AND {target} = 300"
+    parser = _Parser(sql)
+    records = [dict(zip(COLUMNS.keys(), values)) for values in zip(*COLUMNS.values())]
+    expected = [record["name"] for record in records if parser.satisfied(record)]
+    for masks in backends():
+        assert as_list(parser.filter_columns(COLUMNS, masks)["name"]) == expected
+
+
+def test_unrecognised_reference():
+    for sql in [
+        "SELECT {missing} FROM {source}",
+        "SELECT {name} FROM {source} WHERE {missing} = 1",
+        "SELECT {name} FROM {source} WHERE {sales} = {missing}",
+    ]:
+        parser = _Parser(sql)
+        for masks in backends():
+            with pytest.raises(UnrecognisedReferenceError):
+                parser.filter_columns(COLUMNS, masks)
+
+
+def test_mismatched_lengths():
+    parser = _Parser("SELECT * FROM {source}")
+    for masks in backends():
+        with pytest.raises(ValueError):
+            parser.filter_columns({"a": [1, 2], "b": [1]}, masks)
+
+
+def test_keyword_conditions():
+    sql = (
+        "SELECT {name} FROM {source} WHERE {city} IN ('London', 'Cardiff') "
+        "AND {sales} NOT BETWEEN 150 AND 300 OR {name} LIKE '_h%'"
+    )
+    parser = _Parser(sql)
+    for masks in backends():
+        assert as_list(parser.filter_columns(COLUMNS, masks)["name"]) == [
+            "Adam",
+            "Bob",
+            "Charles",
+        ]
+        result = _Parser(
+            "SELECT {sales} FROM {source} WHERE {sales} IN (100, '350', 500)"
+        ).filter_columns(COLUMNS, masks)
+        assert as_list(result["sales"]) == [100, 350]
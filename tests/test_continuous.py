@@ -0,0 +1,115 @@
+import pytest
+import pydictsql
+
+from pydictsql.exceptions import UnrecognisedReferenceError
+
+SQL = "SELECT {message} FROM {log} WHERE {level} = 'ERROR'"
+
+
+def entry(level, message):
+    return {"level": level, "message": message}
+
+
+def test_update_reads_new_records():
+    log = [entry("ERROR", "a"), entry("INFO", "b")]
+    query = pydictsql.ContinuousQuery(SQL)
+    assert query.update(log=log) == [{"message": "a"}]
+    assert query.position() == 2
+    assert query.update(log=log) == []
+    log.extend([entry("INFO", "c"), entry("ERROR", "d")])
+    assert query.update(log=log) == [{"message": "d"}]
+    assert query.position() == 4
+
+
+def test_only_new_records_read():
+    class Log(list):
+        # Records which fail to be read once the query has passed them
+        def __getitem__(self, item):
+            assert isinstance(item, slice) and (item.start or 0) >= read[0]
+            return super().__getitem__(item)
+
+    read = [0]
+    log = Log(entry("ERROR", str(n)) for n in range(5))
+    query = pydictsql.ContinuousQuery(SQL)
+    assert len(query.update(log=log)) == 5
+    read[0] = 5
+    log.append(entry("ERROR", "5"))
+    assert query.update(log=log) == [{"message": "5"}]
+
+
+def test_callbacks():
+    updates = []
+    added = []
+    log = [entry("INFO", "a")]
+    query = pydictsql.ContinuousQuery(SQL, callbacks=[updates.append])
+    query.add_callback(added.append)
+    query.update(log=log)
+    assert updates == []
+    log.extend([entry("ERROR", "b"), entry("ERROR", "c")])
+    query.update(log=log)
+    query.update(log=log)
+    assert updates == added == [[{"message": "b"}, {"message": "c"}]]
+
+
+def test_aggregates_maintained():
+    log = [entry("ERROR", "a"), entry("INFO", "b")]
+    query = pydictsql.ContinuousQuery(
+        "SELECT {level}, COUNT(*) FROM {log} GROUP BY {level} ORDER BY {COUNT(*)} DESC, {level}"
+    )
+    assert query.update(log=log) == [
+        {"level": "ERROR", "COUNT(*)": 1},
+        {"level": "INFO", "COUNT(*)": 1},
+    ]
+    log.extend([entry("INFO", "c"), entry("INFO", "d")])
+    expected = [{"level": "INFO", "COUNT(*)": 3}, {"level": "ERROR", "COUNT(*)": 1}]
+    assert query.update(log=log) == expected
+    assert query.update(log=log) == expected
+    assert query.filter(log=log) == expected
+
+
+def test_limit_across_updates():
+    log = [entry("ERROR", str(n)) for n in range(3)]
+    query = pydictsql.ContinuousQuery(f"{SQL} LIMIT 3 OFFSET 1")
+    assert query.update(log=log) == [{"message": "1"}, {"message": "2"}]
+    log.extend(entry("ERROR", str(n)) for n in range(3, 6))
+    assert query.update(log=log) == [{"message": "3"}]
+    log.append(entry("ERROR", "6"))
+    assert query.update(log=log) == []
+
+
+def test_reset():
+    log = [entry("ERROR", "a"), entry("ERROR", "b")]
+    query = pydictsql.ContinuousQuery(SQL)
+    query.update(log=log)
+    del log[1]
+    with pytest.raises(ValueError):
+        query.update(log=log)
+    query.reset()
+    assert query.position() == 0
+    assert query.update(log=log) == [{"message": "a"}]
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        pydictsql.ContinuousQuery("SELECT * FROM {log} ORDER BY {time}")
+    with pytest.raises(ValueError):
+        pydictsql.ContinuousQuery("SELECT * FROM {a} JOIN {b} ON {a.id} = {b.id}")
+    query = pydictsql.ContinuousQuery(SQL, row_type="tuple")
+    with pytest.raises(ValueError):
+        query.update(log=(record for record in [entry("ERROR", "a")]))
+    with pytest.raises(ValueError):
+        query.update(other=[])
+    with pytest.raises(UnrecognisedReferenceError):
+        query.update(log=[{"message": "a"}])
+    assert query.update(log=[entry("ERROR", "a")]) == [("a",)]
+
+
+def test_stats():
+    query = pydictsql.ContinuousQuery(SQL, stats=True)
+    log = [entry("ERROR", "a"), entry("INFO", "b")]
+    query.update(log=log)
+    log.append(entry("ERROR", "c"))
+    query.update(log=log)
+    assert query.stats.queries == 2
+    assert query.stats.rows_scanned == 3
+    assert query.stats.rows_matched == 2
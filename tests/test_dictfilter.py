@@ -1,6 +1,12 @@
+import csv
+import io
+from itertools import chain
+
 import pytest
 import pydictsql
 
+from pydictsql.exceptions import SchemaMismatchError, UnrecognisedReferenceError
+
 
 def test_missing_collection():
     filter = pydictsql.DictFilter("SELECT * FROM {collection}")
@@ -32,6 +38,26 @@ def test_invalid_collections():
         filter.filter(collection=7)
 
 
+def test_iterable_collections():
+    records = [{"a": 1}, {"a": 2}, {"a": 3}]
+    filter = pydictsql.DictFilter("SELECT * FROM {collection} WHERE {a} > 1")
+    expected = [{"a": 2}, {"a": 3}]
+    assert filter.filter(collection=map(dict, records)) == expected
+    assert filter.filter(collection=chain(records[:1], records[1:])) == expected
+    assert (
+        filter.filter(collection={"x": records[1], "y": records[2]}.values())
+        == expected
+    )
+    assert filter.filter(collection=iter(records)) == expected
+    reader = csv.DictReader(io.StringIO("a,b\n1,x\n3,y\n"))
+    assert pydictsql.DictFilter("SELECT {b} FROM {collection} WHERE {a} = '3'").filter(
+        collection=reader
+    ) == [{"b": "y"}]
+    for invalid in ["abc", b"abc", bytearray(b"abc"), frozenset(), {}.keys()]:
+        with pytest.raises(ValueError):
+            filter.filter(collection=invalid)
+
+
 def test_invalid_collections_gen():
     filter = pydictsql.DictFilter("SELECT * FROM {collection}")
     with pytest.raises(ValueError):
@@ -112,3 +138,305 @@ def test_filter_gen():
         "John",
     ]:
         assert expected in names
+
+
+def test_filter_columns():
+    filter = pydictsql.DictFilter(
+        "SELECT {name}, {city} FROM {sales_data} WHERE {sales} > 250"
+    )
+    result = filter.filter_columns(
+        sales_data={"name": NAMES, "city": CITIES, "sales": SALES}
+    )
+    assert list(result["name"]) == [
+        "Bob",
+        "Charles",
+        "David",
+        "Frank",
+        "Geoff",
+        "Hugh",
+        "Ian",
+        "John",
+    ]
+    assert len(result["city"]) == 8
+
+
+def test_filter_columns_invalid():
+    filter = pydictsql.DictFilter("SELECT * FROM {collection}")
+    with pytest.raises(ValueError):
+        filter.filter_columns(collection=[])
+    with pytest.raises(ValueError):
+        filter.filter_columns(collection2={})
+
+
+def test_filter_batches():
+    filter = pydictsql.DictFilter(
+        "SELECT {name}, {sales} FROM {sales_data} WHERE {sales} > 250"
+    )
+    batches = list(filter.filter_batches(batch_size=3, sales_data=SOURCE_DATA_LIST))
+    assert [len(batch) for batch in batches] == [3, 3, 2]
+    assert [record for batch in batches for record in batch] == filter.filter(
+        sales_data=SOURCE_DATA_LIST
+    )
+    assert list(filter.filter_batches(sales_data=source_gen())) == [
+        filter.filter(sales_data=SOURCE_DATA_LIST)
+    ]
+
+
+def test_filter_batches_invalid():
+    filter = pydictsql.DictFilter("SELECT * FROM {collection}")
+    with pytest.raises(ValueError):
+        list(filter.filter_batches(batch_size=0, collection=[]))
+    with pytest.raises(ValueError):
+        list(filter.filter_batches(collection=7))
+    assert list(filter.filter_batches(collection=[])) == []
+
+
+def test_limit():
+    filter = pydictsql.DictFilter(
+        "SELECT {name} FROM {sales_data} WHERE {sales} > 250 LIMIT 3 OFFSET 2"
+    )
+    expected = [{"name": "David"}, {"name": "Frank"}, {"name": "Geoff"}]
+    assert filter.filter(sales_data=SOURCE_DATA_LIST) == expected
+    assert filter.filter(sales_data=tuple(SOURCE_DATA_LIST)) == tuple(expected)
+    assert list(filter.filtergen(sales_data=source_gen())) == expected
+    assert list(filter.filter_batches(batch_size=2, sales_data=SOURCE_DATA_LIST)) == [
+        expected[:2],
+        expected[2:],
+    ]
+    assert list(
+        filter.filter_columns(sales_data={"name": NAMES, "sales": SALES})["name"]
+    ) == ["David", "Frank", "Geoff"]
+
+
+def test_limit_stops_reading():
+    consumed = []
+
+    def counting_gen():
+        for record in source_gen():
+            consumed.append(record)
+            yield record
+
+    filter = pydictsql.DictFilter(
+        "SELECT {name} FROM {sales_data} WHERE {sales} > 250 LIMIT 2"
+    )
+    assert len(list(filter.filtergen(sales_data=counting_gen()))) == 2
+    # Bob and Charles are the first two matches, so David onwards are never read
+    assert len(consumed) == 3
+
+
+def test_limit_zero():
+    filter = pydictsql.DictFilter("SELECT * FROM {sales_data} LIMIT 0")
+    assert filter.filter(sales_data=SOURCE_DATA_LIST) == []
+
+
+def test_order_by():
+    filter = pydictsql.DictFilter(
+        "SELECT {name} FROM {sales_data} WHERE {sales} > 250 ORDER BY {sales} DESC"
+    )
+    expected = [
+        {"name": name}
+        for name in ["Geoff", "John", "Bob", "Hugh", "Charles", "Ian", "Frank", "David"]
+    ]
+    assert filter.filter(sales_data=SOURCE_DATA_LIST) == expected
+    assert filter.filter(sales_data=tuple(SOURCE_DATA_LIST)) == tuple(expected)
+    assert list(filter.filtergen(sales_data=source_gen())) == expected
+    assert list(filter.filter_batches(batch_size=3, sales_data=source_gen())) == [
+        expected[:3],
+        expected[3:6],
+        expected[6:],
+    ]
+    assert list(
+        filter.filter_columns(sales_data={"name": NAMES, "sales": SALES})["name"]
+    ) == [record["name"] for record in expected]
+
+
+def test_order_by_mixed():
+    filter = pydictsql.DictFilter(
+        "SELECT {name} FROM {sales_data} ORDER BY {city}, {sales} DESC, {name}"
+    )
+    records = SOURCE_DATA_LIST + [{"name": "Alan", "city": "Cardiff", "sales": 500}]
+    expected = sorted(
+        records, key=lambda record: (record["city"], -record["sales"], record["name"])
+    )
+    assert filter.filter(sales_data=records) == [
+        {"name": record["name"]} for record in expected
+    ]
+
+
+def test_order_by_limit():
+    filter = pydictsql.DictFilter(
+        "SELECT * FROM {sales_data} ORDER BY {sales} ASC LIMIT 3 OFFSET 1"
+    )
+    assert [record["name"] for record in filter.filter(sales_data=source_gen())] == [
+        "Edward",
+        "David",
+        "Frank",
+    ]
+
+
+def test_order_by_spills():
+    records = [{"id": i, "value": (i * 7919) % 1000} for i in range(1000)]
+    filter = pydictsql.DictFilter(
+        "SELECT {id} FROM {source} WHERE {value} <> 3 ORDER BY {value} DESC, {id}",
+        sort_buffer=64,
+    )
+    expected = sorted(
+        (record for record in records if record["value"] != 3),
+        key=lambda record: (-record["value"], record["id"]),
+    )
+    assert filter.filter(source=records) == [
+        {"id": record["id"]} for record in expected
+    ]
+
+
+def test_order_by_unrecognised():
+    filter = pydictsql.DictFilter("SELECT {name} FROM {sales_data} ORDER BY {age}")
+    with pytest.raises(UnrecognisedReferenceError):
+        filter.filter(sales_data=SOURCE_DATA_LIST)
+    with pytest.raises(UnrecognisedReferenceError):
+        filter.filter_columns(sales_data={"name": NAMES})
+
+
+def test_invalid_sort_buffer():
+    with pytest.raises(ValueError):
+        pydictsql.DictFilter("SELECT * FROM {sales_data}", sort_buffer=0)
+
+
+def test_group_by():
+    filter = pydictsql.DictFilter(
+        "SELECT {city}, COUNT(*), SUM({sales}), AVG({sales}) FROM {sales_data} "
+        "WHERE {sales} > 250 GROUP BY {city} ORDER BY {SUM(sales)} DESC LIMIT 3"
+    )
+    expected = [
+        {
+            "city": "Birmingham",
+            "COUNT(*)": 3,
+            "SUM(sales)": 1160,
+            "AVG(sales)": 1160 / 3,
+        },
+        {"city": "London", "COUNT(*)": 3, "SUM(sales)": 1070, "AVG(sales)": 1070 / 3},
+        {"city": "Cardiff", "COUNT(*)": 1, "SUM(sales)": 500, "AVG(sales)": 500.0},
+    ]
+    assert filter.filter(sales_data=SOURCE_DATA_LIST) == expected
+    assert filter.filter(sales_data=tuple(SOURCE_DATA_LIST)) == tuple(expected)
+    assert list(filter.filtergen(sales_data=source_gen())) == expected
+    assert list(filter.filter_batches(batch_size=2, sales_data=source_gen())) == [
+        expected[:2],
+        expected[2:],
+    ]
+    columns = filter.filter_columns(
+        sales_data={"city": CITIES, "sales": SALES, "name": NAMES}
+    )
+    assert list(columns["city"]) == [row["city"] for row in expected]
+    assert list(columns["COUNT(*)"]) == [row["COUNT(*)"] for row in expected]
+
+
+def test_aggregate_without_group_by():
+    filter = pydictsql.DictFilter(
+        "SELECT COUNT(*), MIN({sales}), MAX({name}) FROM {sales_data} WHERE {city} = 'London'"
+    )
+    assert filter.filter(sales_data=source_gen()) == [
+        {"COUNT(*)": 4, "MIN(sales)": 100, "MAX(name)": "Hugh"}
+    ]
+    filter = pydictsql.DictFilter(
+        "SELECT COUNT(*) FROM {sales_data} WHERE {city} = 'Paris'"
+    )
+    assert filter.filter(sales_data=SOURCE_DATA_LIST) == [{"COUNT(*)": 0}]
+
+
+def test_group_by_row_types():
+    sql = "SELECT {city}, COUNT(*) FROM {sales_data} GROUP BY {city} ORDER BY {city}"
+    filter = pydictsql.DictFilter(sql, row_type="tuple")
+    rows = filter.filter(sales_data=SOURCE_DATA_LIST)
+    assert [tuple(row) for row in rows] == [
+        ("Birmingham", 3),
+        ("Cardiff", 2),
+        ("Glasgow", 1),
+        ("London", 4),
+    ]
+    filter = pydictsql.DictFilter(sql, row_type="view")
+    rows = filter.filter(sales_data=SOURCE_DATA_LIST)
+    assert dict(rows[0]) == {"city": "Birmingham", "COUNT(*)": 3}
+
+
+def test_group_by_unrecognised():
+    filter = pydictsql.DictFilter("SELECT COUNT(*) FROM {sales_data} GROUP BY {age}")
+    with pytest.raises(UnrecognisedReferenceError):
+        filter.filter(sales_data=SOURCE_DATA_LIST)
+    with pytest.raises(UnrecognisedReferenceError):
+        filter.filter_columns(sales_data={"name": NAMES})
+
+
+def test_schema():
+    data = [
+        {"name": "a", "sales": 50, "city": "London", "target": 40},
+        {"name": "b", "sales": 150, "city": "Paris", "target": 200},
+        {"name": "c", "sales": 120, "city": "London", "target": 100},
+    ]
+    sql = "SELECT {name} FROM {source} WHERE {sales} > '100' AND {city} IN ('London', 'Rome') OR {sales} < {target}"
+    expected = pydictsql.DictFilter(sql).filter(source=data)
+    assert expected == [{"name": "b"}, {"name": "c"}]
+    schema = {"name": str, "sales": int, "city": str, "target": int}
+    assert pydictsql.DictFilter(sql, schema=schema).filter(source=data) == expected
+    assert pydictsql.DictFilter(sql).bind(data[0]).filter(source=data) == expected
+    assert (
+        pydictsql.DictFilter(sql, sample_size=2, schema=schema, strict=1).filter(
+            source=data
+        )
+        == expected
+    )
+    between = pydictsql.DictFilter(
+        "SELECT {name} FROM {source} WHERE {sales} BETWEEN 100 AND 150 AND {sales} <> 150"
+    ).bind(data[0])
+    assert between.filter(source=data) == [{"name": "c"}]
+
+
+def test_schema_references():
+    with pytest.raises(UnrecognisedReferenceError):
+        pydictsql.DictFilter(
+            "SELECT {a} FROM {source} WHERE {b} = 1", schema={"a": int}
+        )
+    with pytest.raises(UnrecognisedReferenceError):
+        pydictsql.DictFilter("SELECT * FROM {source} ORDER BY {b}").bind({"a": 1})
+    with pytest.raises(ValueError):
+        pydictsql.DictFilter("SELECT * FROM {source}", schema={"a": 1})
+    with pytest.raises(ValueError):
+        pydictsql.DictFilter("SELECT * FROM {source}", strict=-1)
+    with pytest.raises(ValueError):
+        pydictsql.DictFilter(
+            "SELECT * FROM {a} JOIN {b} ON {b.id} = {a.id}", schema={"a.id": int}
+        )
+
+
+def test_schema_unconvertible_literal():
+    # Literals which can't be converted to the type of the field raise as without a schema, when compared
+    filter = pydictsql.DictFilter(
+        "SELECT * FROM {source} WHERE {a} > 'x'", schema={"a": int}
+    )
+    assert filter.filter(source=[]) == []
+    with pytest.raises(ValueError):
+        filter.filter(source=[{"a": 2}])
+
+
+def test_schema_strict():
+    filter = pydictsql.DictFilter(
+        "SELECT * FROM {source} WHERE {a} > 1", schema={"a": int, "b": None}, strict=2
+    )
+    # Only every other record is checked
+    assert filter.filter(source=[{"a": 2}, {"a": 2.5}, {"a": 3}]) == [
+        {"a": 2},
+        {"a": 2.5},
+        {"a": 3},
+    ]
+    with pytest.raises(SchemaMismatchError):
+        filter.filter(source=[{"a": 2}, {"a": 3}, {"a": 4.5}])
+    with pytest.raises(UnrecognisedReferenceError):
+        filter.filter(source=[{"b": 2}])
+    # Fields of unknown type are only checked for, and are compared as without a schema
+    filter = pydictsql.DictFilter("SELECT * FROM {source} WHERE {b} = 1").bind(
+        {"b": None}
+    )
+    assert filter.filter(source=[{"b": 1}, {"b": "1"}, {"b": 1.5}]) == [
+        {"b": 1},
+        {"b": "1"},
+    ]
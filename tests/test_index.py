@@ -0,0 +1,130 @@
+import operator
+
+import pytest
+import pydictsql
+
+from pydictsql.exceptions import UnrecognisedReferenceError
+from pydictsql.index import IndexedCollection
+from pydictsql.parser import _Parser
+
+SOURCE_DATA = [
+    {"id": i, "city": ["London", "Cardiff", "Glasgow"][i % 3], "sales": (i * 37) % 500}
+    for i in range(300)
+]
+
+
+def test_lookup_equals():
+    indexed = IndexedCollection(SOURCE_DATA, "city")
+    positions = indexed.lookup("city", operator.eq, "Cardiff")
+    assert positions == set(range(1, 300, 3))
+    assert indexed.lookup("city", operator.eq, "Paris") == set()
+
+
+def test_lookup_ranges():
+    indexed = IndexedCollection(SOURCE_DATA, ["sales"])
+    for op in [operator.lt, operator.le, operator.gt, operator.ge]:
+        positions = indexed.lookup("sales", op, "400")
+        assert positions == set(
+            pos for pos, record in enumerate(SOURCE_DATA) if op(record["sales"], 400)
+        )
+    assert indexed.lookup("sales", operator.ne, "400") is None
+
+
+def test_lookup_unindexed():
+    indexed = IndexedCollection(SOURCE_DATA, "city")
+    assert indexed.lookup("sales", operator.eq, "100") is None
+
+
+def test_candidates():
+    indexed = IndexedCollection(SOURCE_DATA, ["city", "sales"])
+    for sql, scanned in [
+        ("SELECT * FROM {source} WHERE {city} = 'London' AND {sales} > 400", True),
+        ("SELECT * FROM {source} WHERE {city} = 'London' OR {sales} > 400", True),
+        ("SELECT * FROM {source} WHERE {city} = 'London' OR {id} > 400", False),
+        ("SELECT * FROM {source} WHERE NOT {city} = 'London'", False),
+        ("SELECT * FROM {source} WHERE {sales} = {id}", False),
+        ("SELECT * FROM {source}", False),
+    ]:
+        parser = _Parser(sql)
+        assert (parser.candidates(indexed) is not None) == scanned
+
+
+def test_explain_index():
+    indexed = IndexedCollection(SOURCE_DATA, ["city", "sales"])
+    filter = pydictsql.DictFilter(
+        "SELECT {id} FROM {source} WHERE {city} = 'London' AND {sales} > 400 AND {id} < 100"
+    )
+    expected = len(list(indexed.records(filter._parser)))
+    assert filter.explain(source=indexed).splitlines()[0] == (
+        f"SCAN {{source}} USING INDEX ON {{city}}, {{sales}} ({expected} of 300 records)"
+    )
+    filter = pydictsql.DictFilter("SELECT {id} FROM {source} WHERE {id} < 100")
+    assert filter.explain(source=indexed).splitlines()[0] == "SCAN {source}"
+
+
+def test_filter_matches_unindexed():
+    indexed = IndexedCollection(SOURCE_DATA, ["city", "sales"])
+    for sql in [
+        "SELECT {id} FROM {source} WHERE {city} = 'London' AND {sales} > 400",
+        "SELECT {id} FROM {source} WHERE {city} = 'Glasgow' OR {sales} <= 20",
+        "SELECT {id} FROM {source} WHERE ({sales} >= 100 AND {sales} < 150) AND {id} > 100",
+        "SELECT {id} FROM {source} WHERE NOT {city} = 'London'",
+    ]:
+        filter = pydictsql.DictFilter(sql)
+        assert filter.filter(source=indexed) == filter.filter(source=SOURCE_DATA)
+        assert list(filter.filtergen(source=indexed)) == filter.filter(
+            source=SOURCE_DATA
+        )
+
+
+def test_missing_field():
+    indexed = IndexedCollection(SOURCE_DATA + [{"id": 300}], "city")
+    filter = pydictsql.DictFilter("SELECT * FROM {source} WHERE {city} = 'London'")
+    with pytest.raises(UnrecognisedReferenceError):
+        filter.filter(source=indexed)
+
+
+def test_mixed_types():
+    data = [{"value": 1}, {"value": "1"}, {"value": 2.0}, {"value": [1]}]
+    indexed = IndexedCollection(data, "value")
+    assert indexed.lookup("value", operator.gt, "0") is None
+    assert indexed.lookup("value", operator.eq, "1") is None
+
+
+def test_nan_values():
+    nan = float("nan")
+    data = [{"x": x} for x in [3.0, nan, 1.0, 5.0, nan, 2.0]]
+    indexed = IndexedCollection(data, "x")
+    for sql in [
+        "SELECT {x} FROM {source} WHERE {x} > 1.5",
+        "SELECT {x} FROM {source} WHERE {x} BETWEEN 2 AND 4",
+        "SELECT {x} FROM {source} WHERE {x} <= 'nan'",
+    ]:
+        filter = pydictsql.DictFilter(sql)
+        assert filter.filter(source=indexed) == filter.filter(source=data)
+
+
+def test_sequence():
+    indexed = IndexedCollection(iter(SOURCE_DATA), "city")
+    assert len(indexed) == len(SOURCE_DATA)
+    assert indexed[5] == SOURCE_DATA[5]
+    assert indexed.indexed_fields() == {"city"}
+
+
+def test_keyword_candidates():
+    indexed = IndexedCollection(SOURCE_DATA, ["city", "sales"])
+    for sql, scanned in [
+        ("SELECT * FROM {source} WHERE {city} IN ('London', 'Paris')", True),
+        ("SELECT * FROM {source} WHERE {city} NOT IN ('London')", False),
+        ("SELECT * FROM {source} WHERE {sales} BETWEEN 100 AND 200", True),
+        ("SELECT * FROM {source} WHERE {sales} NOT BETWEEN 100 AND 400", True),
+        ("SELECT * FROM {source} WHERE {city} LIKE 'Lon%'", True),
+        ("SELECT * FROM {source} WHERE {city} LIKE 'Cardiff'", True),
+        ("SELECT * FROM {source} WHERE {city} LIKE '%don'", False),
+        ("SELECT * FROM {source} WHERE {city} NOT LIKE 'Lon%'", False),
+    ]:
+        parser = _Parser(sql)
+        assert (parser.candidates(indexed) is not None) == scanned
+        expected = [record for record in SOURCE_DATA if parser.satisfied(record)]
+        records = indexed.records(parser)
+        assert [record for record in records if parser.satisfied(record)] == expected
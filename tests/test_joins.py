@@ -0,0 +1,183 @@
+import asyncio
+import io
+
+import pytest
+import pydictsql
+
+from pydictsql.exceptions import UnexpectedTokenError, UnrecognisedReferenceError
+from pydictsql.index import IndexedCollection
+from pydictsql.joins import _push_down
+from pydictsql.parser import _Parser
+from pydictsql.sources import CsvSource
+
+TEAMS = [
+    {"id": 1, "city": "London"},
+    {"id": 2, "city": "Cardiff"},
+    {"id": 3, "city": "Glasgow"},
+    {"id": None, "city": "Nowhere"},
+]
+
+SALES = [
+    {"team": team, "amount": amount, "region": region}
+    for team, amount, region in [
+        (1, 100, "north"),
+        (2, 250, "south"),
+        (1, 300, "south"),
+        (3, 50, "north"),
+        (4, 75, "north"),
+        (None, 20, "north"),
+        (2, 400, "north"),
+    ]
+]
+
+SQL = (
+    "SELECT {t.city}, {s.amount} FROM {t} JOIN {s} ON {t.id} = {s.team} "
+    "WHERE {s.amount} > 60 AND {t.city} <> 'Glasgow'"
+)
+
+EXPECTED = [
+    {"t.city": "London", "s.amount": 100},
+    {"t.city": "London", "s.amount": 300},
+    {"t.city": "Cardiff", "s.amount": 250},
+    {"t.city": "Cardiff", "s.amount": 400},
+]
+
+
+def by_amount(rows):
+    return sorted(rows, key=lambda row: row["s.amount"])
+
+
+def test_join():
+    filter = pydictsql.DictFilter(SQL)
+    # The order of joined records depends on which source the hash table is built from
+    assert by_amount(filter.filter(t=TEAMS, s=SALES)) == by_amount(EXPECTED)
+    assert by_amount(filter.filtergen(s=(r for r in SALES), t=TEAMS)) == by_amount(
+        EXPECTED
+    )
+    assert by_amount(filter.filter(t=(r for r in TEAMS), s=SALES)) == by_amount(
+        EXPECTED
+    )
+
+
+def test_join_all_fields():
+    filter = pydictsql.DictFilter(
+        "SELECT * FROM {t} JOIN {s} ON {s.team} = {t.id} WHERE {s.region} = 'south'"
+    )
+    cardiff, london = by_amount(filter.filter(t=TEAMS, s=SALES))
+    assert cardiff == {
+        "t.id": 2,
+        "t.city": "Cardiff",
+        "s.team": 2,
+        "s.amount": 250,
+        "s.region": "south",
+    }
+    assert london["t.city"] == "London" and london["s.amount"] == 300
+
+
+def test_join_build_side():
+    filter = pydictsql.DictFilter(SQL)
+    # Built from the smaller list of teams, the sales are streamed through in order
+    assert filter.filter(t=TEAMS, s=SALES) == by_amount(EXPECTED)
+    # Built from the sales, as the size of a generator isn't known, so the teams are streamed through in order
+    assert filter.filter(t=(r for r in TEAMS), s=SALES) == EXPECTED
+    assert filter.filter(t=TEAMS, s=(r for r in SALES)) == by_amount(EXPECTED)
+
+
+def test_join_residual_and_aggregate():
+    filter = pydictsql.DictFilter(
+        "SELECT {t.city}, COUNT(*), SUM({s.amount}) FROM {t} JOIN {s} ON {t.id} = {s.team} "
+        "WHERE {s.amount} > 60 OR {t.city} = 'Glasgow' GROUP BY {t.city} ORDER BY {t.city}"
+    )
+    assert filter.filter(t=TEAMS, s=SALES) == [
+        {"t.city": "Cardiff", "COUNT(*)": 2, "SUM(s.amount)": 650},
+        {"t.city": "Glasgow", "COUNT(*)": 1, "SUM(s.amount)": 50},
+        {"t.city": "London", "COUNT(*)": 2, "SUM(s.amount)": 400},
+    ]
+
+
+def test_join_chain():
+    regions = [
+        {"name": "north", "manager": "Ann"},
+        {"name": "south", "manager": "Bill"},
+    ]
+    filter = pydictsql.DictFilter(
+        "SELECT {t.city}, {r.manager} FROM {t} JOIN {s} ON {t.id} = {s.team} "
+        "JOIN {r} ON {r.name} = {s.region} WHERE {s.amount} >= 300"
+    )
+    assert filter.filter(t=TEAMS, s=SALES, r=regions) == [
+        {"t.city": "London", "r.manager": "Bill"},
+        {"t.city": "Cardiff", "r.manager": "Ann"},
+    ]
+
+
+def test_join_push_down():
+    parser = _Parser(SQL)
+    pushed, remaining = _push_down(parser._where_clause.lower(), ["t", "s"])
+    assert remaining is None
+    assert pushed["s"].references() == {"amount"}
+    assert pushed["t"].references() == {"city"}
+    assert parser.explain().splitlines() == [
+        "SCAN {t}",
+        "  {t.city} <> 'Glasgow' [cost=1.25 selectivity=0.90]",
+        "  PROJECT {t.city}, {t.id}",
+        "HASH JOIN {s} ON {t.id} = {s.team}",
+        "  {s.amount} > 60 [cost=1.00 selectivity=0.40]",
+        "  PROJECT {s.amount}, {s.team}",
+        "PROJECT {t.city}, {s.amount} AS dict",
+    ]
+
+
+def test_join_sources():
+    csv_file = io.StringIO(
+        "team,amount,region,notes\n"
+        + "".join(f"{r['team']},{r['amount']},{r['region']},x\n" for r in SALES[:5])
+    )
+    sales = CsvSource(csv_file, types={"team": int, "amount": int})
+    teams = IndexedCollection(TEAMS, "city")
+    filter = pydictsql.DictFilter(SQL)
+    assert by_amount(filter.filter(t=teams, s=sales)) == by_amount(EXPECTED[:3])
+
+
+def test_join_unrecognised():
+    filter = pydictsql.DictFilter(
+        "SELECT {t.city} FROM {t} JOIN {s} ON {t.id} = {s.missing}"
+    )
+    with pytest.raises(UnrecognisedReferenceError, match="s.missing"):
+        filter.filter(t=TEAMS, s=SALES)
+    filter = pydictsql.DictFilter(
+        "SELECT {t.name} FROM {t} JOIN {s} ON {t.id} = {s.team}"
+    )
+    with pytest.raises(UnrecognisedReferenceError, match="t.name"):
+        filter.filter(t=TEAMS, s=SALES)
+
+
+def test_join_invalid_sources():
+    filter = pydictsql.DictFilter(SQL)
+    with pytest.raises(ValueError):
+        filter.filter(t=TEAMS)
+    with pytest.raises(ValueError):
+        filter.filter(t=TEAMS, s=SALES, x=[])
+    with pytest.raises(ValueError):
+        filter.filter(t=TEAMS, s=7)
+    with pytest.raises(ValueError):
+        filter.filter_columns(t={"id": [1]}, s={"team": [1]})
+
+
+def test_invalid_join():
+    for sql in [
+        "SELECT * FROM {t} JOIN {s}",
+        "SELECT * FROM {t} JOIN {s} ON {t.id}",
+        "SELECT * FROM {t} JOIN {s} ON {t.id} < {s.team}",
+        "SELECT * FROM {t} JOIN {s} ON {t.id} = {t.team}",
+        "SELECT * FROM {t} JOIN {s} ON {x.id} = {s.team}",
+        "SELECT * FROM {t} JOIN {t} ON {t.id} = {t.id}",
+        "SELECT * FROM {t} JOIN {s} ON {t.id} = {s.team} AND",
+    ]:
+        with pytest.raises(UnexpectedTokenError):
+            _Parser(sql)
+
+
+def test_afilter_join():
+    filter = pydictsql.DictFilter(SQL)
+    result = asyncio.run(filter.afilter(batch_size=2, t=TEAMS, s=SALES))
+    assert result == by_amount(EXPECTED)
@@ -0,0 +1,88 @@
+import pytest
+import pydictsql
+
+SOURCE_DATA = [{"id": i, "value": i % 7} for i in range(1000)]
+
+
+def test_parallel_matches_serial():
+    sql = "SELECT {id} FROM {source} WHERE {value} > 3 OR {id} < 10"
+    serial = pydictsql.DictFilter(sql).filter(source=SOURCE_DATA)
+    parallel = pydictsql.ParallelDictFilter(sql, workers=2, chunksize=64).filter(
+        source=SOURCE_DATA
+    )
+    assert parallel == serial
+
+
+def test_parallel_tuple():
+    filter = pydictsql.ParallelDictFilter(
+        "SELECT * FROM {source} WHERE {value} = 0", workers=2, chunksize=100
+    )
+    result = filter.filter(source=tuple(SOURCE_DATA))
+    assert isinstance(result, tuple)
+    assert [record["id"] for record in result] == list(range(0, 1000, 7))
+
+
+def test_parallel_generator():
+    filter = pydictsql.ParallelDictFilter(
+        "SELECT * FROM {source} WHERE {value} = 0", workers=2, chunksize=100
+    )
+    result = filter.filter(source=(record for record in SOURCE_DATA))
+    assert len(result) == 143
+
+
+def test_parallel_options():
+    sql = "SELECT {id} FROM {source} WHERE {value} > 3 OR {id} < 10"
+    serial = pydictsql.DictFilter(sql).filter(source=SOURCE_DATA)
+    queries = []
+    filter = pydictsql.ParallelDictFilter(
+        sql,
+        workers=2,
+        chunksize=64,
+        stats=True,
+        hooks=[queries.append],
+        row_type="tuple",
+        schema={"id": int, "value": int},
+    )
+    result = filter.filter(source=SOURCE_DATA)
+    assert result == [(row["id"],) for row in serial]
+    assert filter.stats.queries == 1
+    assert filter.stats.rows_scanned == len(SOURCE_DATA)
+    assert filter.stats.rows_matched == filter.stats.rows_projected == len(serial)
+    assert queries[0].rows_matched == len(serial)
+
+
+def test_parallel_invalid_options():
+    with pytest.raises(ValueError):
+        pydictsql.ParallelDictFilter("SELECT * FROM {source}", workers=0)
+    with pytest.raises(ValueError):
+        pydictsql.ParallelDictFilter("SELECT * FROM {source}", chunksize=0)
+
+
+def test_parallel_limit():
+    sql = "SELECT {id} FROM {source} WHERE {value} > 3 LIMIT 100 OFFSET 50"
+    serial = pydictsql.DictFilter(sql).filter(source=SOURCE_DATA)
+    parallel = pydictsql.ParallelDictFilter(sql, workers=2, chunksize=64).filter(
+        source=SOURCE_DATA
+    )
+    assert len(parallel) == 100
+    assert parallel == serial
+
+
+def test_parallel_order_by():
+    sql = "SELECT {id} FROM {source} WHERE {value} > 3 ORDER BY {value} DESC, {id} LIMIT 20"
+    serial = pydictsql.DictFilter(sql).filter(source=SOURCE_DATA)
+    parallel = pydictsql.ParallelDictFilter(sql, workers=2, chunksize=64).filter(
+        source=SOURCE_DATA
+    )
+    assert parallel == serial
+    assert parallel == [{"id": i} for i in range(6, 1000, 7)][:20]
+
+
+def test_parallel_group_by():
+    sql = "SELECT {value}, COUNT(*), SUM({id}) FROM {source} WHERE {id} > 10 GROUP BY {value}"
+    serial = pydictsql.DictFilter(sql).filter(source=SOURCE_DATA)
+    parallel = pydictsql.ParallelDictFilter(sql, workers=2, chunksize=64).filter(
+        source=SOURCE_DATA
+    )
+    assert parallel == serial
+    assert sum(row["COUNT(*)"] for row in parallel) == 989
@@ -262,3 +262,232 @@ def test_ne():
     assert len(result) == 3
     for record in result:
         assert record["val1"] != 2
+
+
+def test_compiled_matches_tree():
+    parser = _Parser(
+        "SELECT * FROM {source} WHERE NOT ({val1} > 2 and {val2} = 3) or ({val2} = 1 and {val3} <> 1) or {val1} = 0"
+    )
+    data = [
+        {"val1": val1, "val2": val2, "val3": val3}
+        for val1 in range(0, 4)
+        for val2 in range(0, 4)
+        for val3 in range(0, 4)
+    ]
+    for record in data:
+        assert parser.predicate(record) == parser._where_clause.satisfied(record)
+
+
+def test_compiled_long_chain():
+    parser = _Parser(
+        "SELECT * FROM {source} WHERE "
+        + " OR ".join(f"{{val1}} = {i}" for i in range(0, 100, 2))
+    )
+    data = [{"val1": val} for val in range(0, 100)]
+    result = [record for record in data if parser.satisfied(record)]
+    assert len(result) == 50
+
+
+def test_resolved_condition():
+    parser = _Parser("SELECT {val1} FROM {source} WHERE {val1} >= 'abc'")
+    condition = parser._where_clause.where_term.where_factor.where_primary.condition
+    assert condition.key == "val1"
+    assert condition.rkey is None
+    assert condition.literal == "abc"
+    assert parser._references.keys == ["val1"]
+
+
+def test_mixed_value_types():
+    parser = _Parser("SELECT * FROM {source} WHERE {val1} = 2")
+    data = [{"val1": 2}, {"val1": 2.0}, {"val1": "2"}, {"val1": 3}, {"val1": "3"}]
+    result = [record for record in data if parser.satisfied(record)]
+    assert result == [{"val1": 2}, {"val1": 2.0}, {"val1": "2"}]
+
+
+def test_comma_not_comparator():
+    with pytest.raises(UnexpectedTokenError):
+        _Parser("SELECT * FROM {source} WHERE {val1} , 1")
+
+
+def test_referencefilter_batch():
+    for sql, keys in [
+        ("SELECT {val1}, {val3} FROM {source}", ["val1", "val3"]),
+        ("SELECT {val2} FROM {source}", ["val2"]),
+    ]:
+        parser = _Parser(sql)
+        source = [{f"val{i}": f"Value {i}{j}" for i in range(1, 11)} for j in range(3)]
+        assert parser.filter_batch(source) == [
+            {key: record[key] for key in keys} for record in source
+        ]
+    parser = _Parser("SELECT * FROM {source}")
+    assert parser.filter_batch(source) == source
+
+
+def test_limit_offset():
+    parser = _Parser("SELECT * FROM {source} WHERE {val1} > 1 LIMIT 10 OFFSET 5")
+    assert parser.window() == (5, 10)
+    assert parser.wanted() == 15
+    assert list(parser.limit(range(100))) == list(range(5, 15))
+
+    parser = _Parser("SELECT * FROM {source} limit 3")
+    assert parser.window() == (0, 3)
+    parser = _Parser("SELECT * FROM {source}")
+    assert parser.window() == (0, None)
+    assert parser.wanted() is None
+
+
+def test_invalid_limit():
+    for sql in [
+        "SELECT * FROM {source} LIMIT",
+        "SELECT * FROM {source} LIMIT -1",
+        "SELECT * FROM {source} LIMIT 1.5",
+        "SELECT * FROM {source} LIMIT 1 OFFSET",
+        "SELECT * FROM {source} OFFSET 1",
+        "SELECT * FROM {source} LIMIT 1 WHERE {val1} = 1",
+    ]:
+        with pytest.raises(UnexpectedTokenError):
+            _Parser(sql)
+
+
+def test_order_by():
+    parser = _Parser("SELECT {val1} FROM {source} ORDER BY {val2} DESC, {val3} LIMIT 5")
+    assert parser.ordered()
+    assert parser.referenced_fields() == {"val1", "val2", "val3"}
+    rows = [{"val2": i % 3, "val3": -i} for i in range(10)]
+    assert (
+        list(parser.arrange(rows))
+        == sorted(rows, key=lambda row: (-row["val2"], row["val3"]))[:5]
+    )
+    assert not _Parser("SELECT * FROM {source}").ordered()
+
+
+def test_invalid_order_by():
+    for sql in [
+        "SELECT * FROM {source} ORDER {val1}",
+        "SELECT * FROM {source} ORDER BY",
+        "SELECT * FROM {source} ORDER BY {val1},",
+        "SELECT * FROM {source} ORDER BY 'val1'",
+        "SELECT * FROM {source} ORDER BY {val1} DESC ASC",
+        "SELECT * FROM {source} LIMIT 1 ORDER BY {val1}",
+    ]:
+        with pytest.raises(UnexpectedTokenError):
+            _Parser(sql)
+
+
+def test_group_by():
+    parser = _Parser(
+        "SELECT {city}, COUNT(*), sum({sales}) FROM {source} WHERE {val1} > 1 GROUP BY {city}, {team}"
+    )
+    assert parser.grouping().group_keys == ["city", "team"]
+    assert parser.blocking()
+    assert parser.referenced_fields() == {"city", "team", "sales", "val1"}
+    assert not _Parser("SELECT {city} FROM {source}").blocking()
+    assert _Parser("SELECT COUNT({city}) FROM {source}").grouping().group_keys == []
+
+
+def test_invalid_group_by():
+    for sql in [
+        "SELECT {city}, COUNT(*) FROM {source}",
+        "SELECT {name} FROM {source} GROUP BY {city}",
+        "SELECT * FROM {source} GROUP BY {city}",
+        "SELECT SUM(*) FROM {source}",
+        "SELECT COUNT() FROM {source}",
+        "SELECT COUNT({city} FROM {source}",
+        "SELECT {city} FROM {source} GROUP {city}",
+        "SELECT {city} FROM {source} GROUP BY",
+        "SELECT {city} FROM {source} ORDER BY {city} GROUP BY {city}",
+    ]:
+        with pytest.raises(UnexpectedTokenError):
+            _Parser(sql)
+
+
+def test_in():
+    parser = _Parser("SELECT * FROM {source} WHERE {val1} IN (1, 3, '5')")
+    assert repr(parser._where_clause) == "{val1} IN ( 1, 3, '5' )"
+    # As with comparisons, the literals are converted to the type of the value
+    values = [0, 1, 2, 3, 5, 5.0, "1", "x"]
+    assert [val for val in values if parser.satisfied({"val1": val})] == [
+        1,
+        3,
+        5,
+        5.0,
+        "1",
+    ]
+    parser = _Parser("SELECT * FROM {source} WHERE {val1} NOT IN (1, 3)")
+    assert [val for val in range(5) if parser.satisfied({"val1": val})] == [0, 2, 4]
+
+
+def test_between():
+    parser = _Parser(
+        "SELECT * FROM {source} WHERE {val1} BETWEEN 2 AND 4 AND {val2} = 1"
+    )
+    assert repr(parser._where_clause) == "{val1} BETWEEN 2 AND 4 AND {val2} = 1"
+    assert [val for val in range(6) if parser.satisfied({"val1": val, "val2": 1})] == [
+        2,
+        3,
+        4,
+    ]
+    parser = _Parser("SELECT * FROM {source} WHERE NOT {val1} NOT BETWEEN 2.5 AND 4")
+    assert [val for val in [2.0, 2.5, 3.0, 4.5] if parser.satisfied({"val1": val})] == [
+        2.5,
+        3.0,
+    ]
+
+
+def test_like():
+    parser = _Parser("SELECT * FROM {source} WHERE {val1} LIKE 'a_c%'")
+    matches = ["abc", "aXcdef", "a_c.*"]
+    for val in matches + ["ab", "xabc", "abdc", "ABC", 123, None]:
+        assert parser.satisfied({"val1": val}) == (val in matches)
+    parser = _Parser("SELECT * FROM {source} WHERE {val1} NOT LIKE '%.txt'")
+    assert parser.satisfied({"val1": "a.csv"})
+    assert not parser.satisfied({"val1": "a.txt"})
+    assert parser.satisfied({"val1": "a-txt"})
+
+
+def test_keyword_conditions_unrecognised():
+    for sql in [
+        "SELECT * FROM {source} WHERE {val2} IN (1)",
+        "SELECT * FROM {source} WHERE {val2} NOT BETWEEN 1 AND 2",
+        "SELECT * FROM {source} WHERE {val2} LIKE 'a'",
+    ]:
+        with pytest.raises(UnrecognisedReferenceError):
+            _Parser(sql).satisfied({"val1": 1})
+
+
+def test_invalid_keyword_conditions():
+    for sql in [
+        "SELECT * FROM {source} WHERE {val1} IN ()",
+        "SELECT * FROM {source} WHERE {val1} IN 1, 2",
+        "SELECT * FROM {source} WHERE {val1} IN (1, {val2})",
+        "SELECT * FROM {source} WHERE {val1} BETWEEN 1",
+        "SELECT * FROM {source} WHERE {val1} BETWEEN 1 OR 2",
+        "SELECT * FROM {source} WHERE {val1} LIKE 1",
+        "SELECT * FROM {source} WHERE {val1} NOT = 1",
+        "SELECT * FROM {source} WHERE {val1} NOT",
+    ]:
+        with pytest.raises(UnexpectedTokenError):
+            _Parser(sql)
+
+
+def test_deep_chains():
+    # Chains far longer than the recursion limit are parsed and evaluated without recursing
+    parser = _Parser(
+        "SELECT * FROM {source} WHERE "
+        + " OR ".join(f"{{val1}} = {i} AND {{val2}} <> {i}" for i in range(5000))
+    )
+    assert parser.satisfied({"val1": 4999, "val2": 0})
+    assert parser._where_clause.satisfied({"val1": 4999, "val2": 0})
+    assert not parser.satisfied({"val1": 5000, "val2": 0})
+    assert repr(parser._where_clause).startswith("{val1} = 0 AND {val2} <> 0 OR")
+
+
+def test_keyword_required_literals():
+    for sql, literals in [
+        ("SELECT * FROM {source} WHERE {val1} IN ('abc')", {"abc"}),
+        ("SELECT * FROM {source} WHERE {val1} IN ('abc', 'def')", set()),
+        ("SELECT * FROM {source} WHERE {val1} LIKE 'Lon%d_n'", {"Lon", "d", "n"}),
+        ("SELECT * FROM {source} WHERE {val1} NOT LIKE 'Lon%'", set()),
+        ("SELECT * FROM {source} WHERE {val1} BETWEEN 'a' AND 'b'", set()),
+    ]:
+        assert _Parser(sql).required_literals({"val1"}) == literals
@@ -0,0 +1,283 @@
+import pytest
+import pydictsql
+
+from pydictsql.parser import _Parser
+from pydictsql.dictfilter import DictFilter
+from pydictsql.exceptions import UnrecognisedReferenceError
+from pydictsql.planner import _And, _Constant, _Leaf, _Not, _Or
+
+
+def test_flatten():
+    parser = _Parser(
+        "SELECT * FROM {source} WHERE {a} = 1 AND ({b} = 2 AND {c} = 3) AND NOT ({d} = 4 OR ({e} = 5 OR {f} = 6))"
+    )
+    plan = parser._where_clause.lower()
+    assert isinstance(plan, _And)
+    assert len(plan.operands) == 4
+    negated = [operand for operand in plan.operands if isinstance(operand, _Not)]
+    assert len(negated) == 1
+    assert isinstance(negated[0].operand, _Or)
+    assert len(negated[0].operand.operands) == 3
+
+
+def test_single_condition():
+    parser = _Parser("SELECT * FROM {source} WHERE ({a} = 1)")
+    assert isinstance(parser._plan, _Leaf)
+
+
+def test_static_order():
+    parser = _Parser(
+        "SELECT * FROM {source} WHERE {a} <> {b} AND {c} <> 1 AND {d} = 'x' AND {e} = 1"
+    )
+    assert [repr(operand) for operand in parser._plan.operands] == [
+        "{e} = 1",
+        "{d} = 'x'",
+        "{c} <> 1",
+        "{a} <> {b}",
+    ]
+    parser = _Parser("SELECT * FROM {source} WHERE {a} = 1 OR {b} <> 1")
+    assert [repr(operand) for operand in parser._plan.operands] == [
+        "{b} <> 1",
+        "{a} = 1",
+    ]
+
+
+def test_sampled_order():
+    sample = [{"a": i, "b": i % 2} for i in range(100)]
+    parser = _Parser("SELECT * FROM {source} WHERE {b} = 1 AND {a} < 10")
+    plan = parser.plan(sample)
+    assert [repr(operand) for operand in plan.operands] == ["{a} < 10", "{b} = 1"]
+    assert plan.operands[0].selectivity == 0.1
+    assert plan.operands[1].selectivity == 0.5
+    assert abs(plan.selectivity - 0.05) < 1e-9
+
+
+def test_sampled_errors_ignored():
+    parser = _Parser("SELECT * FROM {source} WHERE {missing} = 1 AND {a} < 10")
+    plan = parser.plan([{"a": 1}])
+    assert len(plan.operands) == 2
+
+
+def test_filter_with_sample():
+    data = [{"a": i, "b": i % 2} for i in range(100)]
+    sql = "SELECT {a} FROM {source} WHERE {b} = 1 AND {a} < 10 OR {a} = 50"
+    expected = [{"a": a} for a in [1, 3, 5, 7, 9, 50]]
+    filter = pydictsql.DictFilter(sql, sample_size=20)
+    assert filter.filter(source=data) == expected
+    assert list(filter.filtergen(source=(record for record in data))) == expected
+
+
+def test_explain():
+    parser = _Parser("SELECT * FROM {source} WHERE {a} = 1 AND NOT {b} > 2")
+    assert parser.explain().splitlines() == [
+        "SCAN {source}",
+        "FILTER",
+        "  AND [cost=1.10 selectivity=0.04]",
+        "    {a} = 1 [cost=1.00 selectivity=0.10]",
+        "    {b} <= 2 [cost=1.00 selectivity=0.40]",
+        "PROJECT * AS dict",
+    ]
+    assert pydictsql.DictFilter("SELECT * FROM {source}").explain().splitlines() == [
+        "SCAN {source}",
+        "PROJECT * AS dict",
+    ]
+
+
+def test_explain_steps():
+    filter = DictFilter(
+        "SELECT {b}, COUNT(*) FROM {source} WHERE {a} > 1 GROUP BY {b} ORDER BY {COUNT(*)} DESC, {b} LIMIT 2",
+        row_type="view",
+    )
+    assert filter.explain().splitlines() == [
+        "SCAN {source}",
+        "FILTER",
+        "  {a} > 1 [cost=1.00 selectivity=0.40]",
+        "AGGREGATE COUNT(*) GROUP BY {b}",
+        "TOP 2 BY {COUNT(*)} DESC, {b}",
+        "LIMIT 2",
+        "PROJECT {b}, COUNT(*) AS view",
+    ]
+    filter = DictFilter("SELECT {a} FROM {source} ORDER BY {a}")
+    assert filter.explain().splitlines()[1:] == ["SORT {a}", "PROJECT {a} AS dict"]
+    filter = DictFilter("SELECT {a} FROM {source} LIMIT 5 OFFSET 3")
+    assert filter.explain().splitlines()[1:] == [
+        "LIMIT 5 OFFSET 3",
+        "PROJECT {a} AS dict",
+    ]
+
+
+def test_explain_analyze():
+    data = [{"a": i, "b": i % 4} for i in range(100)]
+    filter = DictFilter(
+        "SELECT {a} FROM {source} WHERE {b} = 1 AND {a} < 50 OR {a} = 99", stats=True
+    )
+    lines = filter.explain(analyze=True, source=data).splitlines()
+    assert lines[:2] == ["SCAN {source}", "FILTER"]
+    actuals = [line.split(" time=")[0] for line in lines[2:7]]
+    assert actuals == [
+        "  OR [cost=1.99 selectivity=0.14] (actual rows=100 matched=14",
+        "    {a} = 99 [cost=1.00 selectivity=0.10] (actual rows=100 matched=1",
+        "    AND [cost=1.10 selectivity=0.04] (actual rows=99 matched=13",
+        "      {b} = 1 [cost=1.00 selectivity=0.10] (actual rows=99 matched=25",
+        "      {a} < 50 [cost=1.00 selectivity=0.40] (actual rows=25 matched=13",
+    ]
+    assert lines[-2] == "ROWS scanned=100 matched=14 returned=14"
+    assert lines[-1].startswith("TIME filter=")
+    # Analyzing doesn't add to the statistics of the filter
+    assert filter.stats.queries == 0
+    with pytest.raises(ValueError):
+        filter.explain(analyze=True)
+    with pytest.raises(UnrecognisedReferenceError):
+        filter.explain(analyze=True, source=[{"c": 1}])
+
+
+def test_explain_analyze_counts_nodes():
+    # Each node is counted on its own, even where the same condition appears in several places
+    data = [{"a": i % 2, "b": i % 3, "c": i % 5} for i in range(30)]
+    filter = DictFilter(
+        "SELECT * FROM {source} WHERE ({a} = 1 AND {b} = 1) OR ({a} = 1 AND {c} = 1)",
+        schema={"a": int, "b": int, "c": int},
+    )
+    expected = sum(1 for r in data if r["a"] == 1 and (r["b"] == 1 or r["c"] == 1))
+    lines = filter.explain(analyze=True, source=data).splitlines()
+    assert f"(actual rows=30 matched={expected} " in lines[2]
+    assert f"ROWS scanned=30 matched={expected} returned={expected}" in lines
+
+
+def test_not_pushed_down():
+    parser = _Parser(
+        "SELECT * FROM {source} WHERE NOT ({a} = 1 OR NOT {b} < 2) AND NOT {c} IN (1, 2) AND NOT (NOT {d} LIKE 'x%')"
+    )
+    assert isinstance(parser._plan, _And)
+    assert sorted(repr(operand) for operand in parser._plan.operands) == [
+        "{a} <> 1",
+        "{b} < 2",
+        "{c} NOT IN ( 1, 2 )",
+        "{d} LIKE 'x%'",
+    ]
+    parser = _Parser("SELECT * FROM {source} WHERE NOT ({a} = 1 AND {b} >= 2)")
+    assert isinstance(parser._plan, _Or)
+    assert sorted(repr(operand) for operand in parser._plan.operands) == [
+        "{a} <> 1",
+        "{b} < 2",
+    ]
+
+
+def test_duplicates_dropped():
+    parser = _Parser(
+        "SELECT * FROM {source} WHERE {a} = {b} AND ({a} = {b} OR {a} = {b})"
+    )
+    assert isinstance(parser._plan, _Leaf)
+    assert repr(parser._plan) == "{a} = {b}"
+
+
+def test_ranges_merged():
+    parser = _Parser(
+        "SELECT * FROM {source} WHERE {a} > 5 AND {b} = 1 AND {a} <= '10' AND {a} BETWEEN 1 AND 8"
+    )
+    operands = [repr(operand) for operand in parser._plan.operands]
+    assert sorted(operands) == [
+        "{a} > 5 AND {a} <= '10' AND {a} >= 1 AND {a} <= 8",
+        "{b} = 1",
+    ]
+    # The tightest bounds depend on the type the literals are converted to, and as strings no value is both above '5'
+    # and no more than '10'
+    data = [{"a": value, "b": 1} for value in [5, 6, 8, 9, 5.5, "6", "7", "9", "10"]]
+    assert DictFilter(
+        "SELECT * FROM {source} WHERE {a} > 5 AND {b} = 1 AND {a} <= '10' AND {a} BETWEEN 1 AND 8"
+    ).filter(source=data) == [{"a": value, "b": 1} for value in [6, 8, 5.5]]
+    assert DictFilter("SELECT * FROM {source} WHERE {a} >= 6 AND {a} <= 6").filter(
+        source=data
+    ) == [{"a": 6, "b": 1}, {"a": "6", "b": 1}]
+
+
+def test_equalities_merged():
+    parser = _Parser(
+        "SELECT * FROM {source} WHERE {a} = 1 OR {a} = '3' OR {a} IN (2, 1)"
+    )
+    assert repr(parser._plan) == "{a} IN ( 1, '3', 2 )"
+    data = [{"a": value} for value in [1, 2, 3, 4, "3", "1"]]
+    assert DictFilter(
+        "SELECT * FROM {source} WHERE {a} = 1 OR {a} = '3' OR {a} = 2"
+    ).filter(source=data) == [{"a": 1}, {"a": 2}, {"a": 3}, {"a": "3"}, {"a": "1"}]
+
+
+def test_merged_unconvertible_literals():
+    # As before merging, a literal which can't be converted only raises once a value is compared with it
+    data = [{"a": 1}, {"a": "x"}]
+    assert (
+        DictFilter("SELECT * FROM {source} WHERE {a} = 1 OR {a} = 'x'").filter(
+            source=data
+        )
+        == data
+    )
+    assert (
+        DictFilter(
+            "SELECT * FROM {source} WHERE {a} > 1 AND {a} < 'x'", schema={"a": int}
+        ).filter(source=[{"a": 0}, {"a": 1}])
+        == []
+    )
+    with pytest.raises(ValueError):
+        DictFilter("SELECT * FROM {source} WHERE {a} = 1 OR {a} = 'x'").filter(
+            source=[{"a": 2}]
+        )
+    with pytest.raises(ValueError):
+        DictFilter("SELECT * FROM {source} WHERE {a} > 1 AND {a} < 'x'").filter(
+            source=[{"a": 2}]
+        )
+
+
+def test_constants():
+    for where, value in [
+        ("{a} = 1 AND {a} <> 1", False),
+        ("{a} = 1 OR NOT {a} = 1", True),
+        ("{a} > 1 AND {b} = 2 AND {a} < 1", False),
+        ("{a} >= 'x' AND {a} < 'x'", False),
+        ("{a} = {a}", True),
+        ("{a} < {a} OR {b} > {b}", False),
+        ("{b} = 2 AND ({a} <> {a} OR {c} = 1 AND NOT {c} = 1)", False),
+        ("NOT ({a} IN (1, 2) AND {a} NOT IN (1, 2))", True),
+    ]:
+        plan = _Parser(f"SELECT * FROM {{source}} WHERE {where}")._plan
+        assert isinstance(plan, _Constant)
+        assert plan.value is value
+    # Bounds with different literals may or may not be satisfiable, depending on the type of value
+    plan = _Parser("SELECT * FROM {source} WHERE {a} > 9 AND {a} < 10")._plan
+    assert not isinstance(plan, _Constant)
+    assert (
+        DictFilter("SELECT * FROM {source} WHERE {a} = 9 AND {a} = 10").filter(
+            source=[{"a": 9}, {"a": 10}]
+        )
+        == []
+    )
+
+
+def test_impossible_not_scanned():
+    def records():
+        raise AssertionError("Source should not be read")
+        yield
+
+    filter = DictFilter("SELECT * FROM {source} WHERE {a} = 1 AND NOT {a} = 1")
+    assert filter.explain().splitlines() == [
+        "NO SCAN {source}",
+        "FILTER",
+        "  FALSE [cost=0.00 selectivity=0.00]",
+        "PROJECT * AS dict",
+    ]
+    assert filter.filter(source=records()) == []
+    assert list(filter.filtergen(source=records())) == []
+    # Errors for missing fields aren't raised, as no record is read
+    assert filter.filter(source=[{"b": 1}]) == []
+    assert DictFilter("SELECT COUNT(*) FROM {source} WHERE {a} > 1 AND {a} < 1").filter(
+        source=records()
+    ) == [{"COUNT(*)": 0}]
+    columns = DictFilter(
+        "SELECT {a} FROM {source} WHERE {a} = 1 AND {a} <> 1"
+    ).filter_columns(source={"a": [1, 2]})
+    assert list(columns["a"]) == []
+    try:
+        DictFilter("SELECT * FROM {source} WHERE {a} = 1 OR {a} <> 1").filter(
+            source=[{"a": 1}, {"b": 1}]
+        )
+    except UnrecognisedReferenceError:
+        assert False, "Always true where clause should not read fields"
@@ -0,0 +1,59 @@
+import pytest
+import pydictsql
+
+from pydictsql.rows import _tuple_getter, _view_class
+
+SOURCE_DATA = [
+    {"name": "Adam", "city": "London", "sales": 100, "first name": "A"},
+    {"name": "Bob", "city": "Cardiff", "sales": 400, "first name": "B"},
+]
+
+
+def test_view():
+    view = _view_class(["name", "sales"])(SOURCE_DATA[0])
+    assert view == {"name": "Adam", "sales": 100}
+    assert list(view) == ["name", "sales"]
+    assert len(view) == 2
+    assert view["sales"] == 100
+    with pytest.raises(KeyError):
+        view["city"]
+    assert not hasattr(view, "__dict__")
+
+
+def test_tuple_getter():
+    assert _tuple_getter(["a"])({"a": 1, "b": 2}) == (1,)
+    assert _tuple_getter(["b", "a"])({"a": 1, "b": 2}) == (2, 1)
+
+
+def test_filter_views():
+    filter = pydictsql.DictFilter(
+        "SELECT {name}, {sales} FROM {source} WHERE {sales} > 200", row_type="view"
+    )
+    result = filter.filter(source=SOURCE_DATA)
+    assert result == [{"name": "Bob", "sales": 400}]
+    assert result[0]._record is SOURCE_DATA[1]
+    assert list(filter.filtergen(source=SOURCE_DATA)) == result
+
+    filter = pydictsql.DictFilter("SELECT * FROM {source}", row_type="view")
+    assert filter.filter(source=SOURCE_DATA)[0] is SOURCE_DATA[0]
+
+
+def test_filter_tuples():
+    filter = pydictsql.DictFilter(
+        "SELECT {name}, {first name} FROM {source}", row_type="tuple"
+    )
+    result = filter.filter(source=SOURCE_DATA)
+    assert result == [("Adam", "A"), ("Bob", "B")]
+    assert result[0].name == "Adam"
+    filter = pydictsql.DictFilter("SELECT {city} FROM {source}", row_type="tuple")
+    assert [row.city for row in filter.filtergen(source=SOURCE_DATA)] == [
+        "London",
+        "Cardiff",
+    ]
+
+
+def test_invalid_row_type():
+    with pytest.raises(ValueError):
+        pydictsql.DictFilter("SELECT {name} FROM {source}", row_type="list")
+    with pytest.raises(ValueError):
+        pydictsql.DictFilter("SELECT * FROM {source}", row_type="tuple")
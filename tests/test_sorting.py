@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+from pydictsql.exceptions import UnrecognisedReferenceError
+from pydictsql.sorting import _Ordering
+
+
+def test_sort_in_memory():
+    rows = [{"a": i % 4, "b": i} for i in range(20)]
+    ordering = _Ordering(["a", "b"], [False, True])
+    assert list(ordering.sort(rows)) == sorted(
+        rows, key=lambda row: (row["a"], -row["b"])
+    )
+
+
+def test_sort_spills():
+    random.seed(7)
+    rows = [{"a": random.randrange(50), "b": i} for i in range(500)]
+    for descending in ([False], [True]):
+        ordering = _Ordering(["a"], descending)
+        result = list(ordering.sort(rows, buffer_size=32))
+        # Sorting is stable, so equal values keep the order they were read in, spilling or not
+        assert result == sorted(rows, key=lambda row: row["a"], reverse=descending[0])
+        assert result == list(ordering.sort(rows))
+
+
+def test_top():
+    rows = [{"a": i % 10, "b": i} for i in range(100)]
+    ordering = _Ordering(["a", "b"], [True, False])
+    assert ordering.top(rows, 3) == [
+        {"a": 9, "b": 9},
+        {"a": 9, "b": 19},
+        {"a": 9, "b": 29},
+    ]
+
+
+def test_missing_key():
+    ordering = _Ordering(["c"], [False])
+    with pytest.raises(UnrecognisedReferenceError):
+        list(ordering.sort([{"a": 1}, {"a": 2}]))
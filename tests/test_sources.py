@@ -0,0 +1,264 @@
+import io
+import json
+
+import pytest
+import pydictsql
+
+from pydictsql.exceptions import UnrecognisedReferenceError
+from pydictsql.parser import _Parser
+from pydictsql.sources import CsvSource, MmapNdjsonSource, NdjsonSource, Source
+
+RECORDS = [
+    {"name": "Adam", "city": "London", "sales": 100},
+    {"name": "Bob", "city": "London", "sales": 400},
+    {"name": "Charles", "city": "Birmingham", "sales": 350},
+    {"name": "David", "city": "London", "sales": 290},
+    {"name": "Edward", "city": "Cardiff", "sales": 180},
+]
+
+
+def write_ndjson(path):
+    path.write_text("\n".join(json.dumps(record) for record in RECORDS) + "\n\n")
+    return path
+
+
+def test_ndjson_path(tmp_path):
+    path = write_ndjson(tmp_path / "data.ndjson")
+    filter = pydictsql.DictFilter("SELECT {name} FROM {source} WHERE {sales} > 200")
+    assert filter.filter(source=NdjsonSource(path)) == [
+        {"name": "Bob"},
+        {"name": "Charles"},
+        {"name": "David"},
+    ]
+    assert list(filter.filtergen(source=NdjsonSource(str(path), buffer_size=16))) == [
+        {"name": "Bob"},
+        {"name": "Charles"},
+        {"name": "David"},
+    ]
+
+
+def test_ndjson_file_objects():
+    text = "\n".join(json.dumps(record) for record in RECORDS)
+    filter = pydictsql.DictFilter(
+        "SELECT {name} FROM {source} WHERE {city} = 'Cardiff'"
+    )
+    for file in [io.StringIO(text), io.BytesIO(text.encode())]:
+        assert filter.filter(source=NdjsonSource(file, prefilter="city")) == [
+            {"name": "Edward"}
+        ]
+        assert not file.closed
+
+
+def test_required_literals():
+    for sql, expected in [
+        ("SELECT * FROM {s}", set()),
+        ("SELECT * FROM {s} WHERE {a} = 'x'", {"x"}),
+        ("SELECT * FROM {s} WHERE {a} = 'x' AND {b} = 'y'", {"x", "y"}),
+        ("SELECT * FROM {s} WHERE {a} = 'x' AND ({b} = 'y' OR {b} = 'z')", {"x"}),
+        ("SELECT * FROM {s} WHERE ({a} = 'x' AND {b} = 'y') OR {a} = 'x'", {"x"}),
+        ("SELECT * FROM {s} WHERE NOT {a} = 'x'", set()),
+        ("SELECT * FROM {s} WHERE {a} <> 'x' AND {b} = 1", set()),
+        ("SELECT * FROM {s} WHERE {a} = 'a/b'", set()),
+        ("SELECT * FROM {s} WHERE {a} = 'x' AND {c} = 'y'", {"x"}),
+    ]:
+        assert _Parser(sql).required_literals({"a", "b"}) == expected
+
+
+def test_prefilter_skips_decoding(tmp_path):
+    path = tmp_path / "data.ndjson"
+    lines = [json.dumps(record) for record in RECORDS]
+    # A line which isn't valid JSON, but would be skipped by the prefilter as it can't match
+    lines.insert(2, "not json")
+    path.write_text("\n".join(lines))
+    filter = pydictsql.DictFilter("SELECT {name} FROM {source} WHERE {city} = 'London'")
+    assert len(filter.filter(source=NdjsonSource(path, prefilter=["city"]))) == 3
+
+
+def test_prefilter_only_string_fields(tmp_path):
+    path = tmp_path / "data.ndjson"
+    path.write_text('{"n": 1, "b": true, "s": "x"}\n{"n": 2, "b": false, "s": "y"}')
+    # Literals are converted to the type of the value, so neither is found in the text of the matching line
+    filter = pydictsql.DictFilter(
+        "SELECT {s} FROM {source} WHERE {n} = '01' AND {b} = 'True'"
+    )
+    for source in [
+        NdjsonSource(path, prefilter="s"),
+        MmapNdjsonSource(path, prefilter="s"),
+    ]:
+        assert filter.filter(source=source) == [{"s": "x"}]
+    filter = pydictsql.DictFilter("SELECT {n} FROM {source} WHERE {s} = 'y'")
+    assert filter.explain(source=NdjsonSource(path, prefilter="s")).splitlines()[0] == (
+        "SCAN {source} USING NDJSON PREFILTERED ON 'y'"
+    )
+    assert filter.filter(source=NdjsonSource(path, prefilter="s")) == [{"n": 2}]
+    with pytest.raises(ValueError):
+        NdjsonSource(path, prefilter=True)
+
+
+def test_prefilter_escaped_characters(tmp_path):
+    path = tmp_path / "data.ndjson"
+    # As encoded by Go's encoding/json, which escapes <, > and & by default
+    path.write_text('{"s": "a\\u003cb", "n": 1}\n{"s": "a\\u0026b", "n": 2}\n')
+    filter = pydictsql.DictFilter("SELECT {n} FROM {source} WHERE {s} = 'a<b'")
+    for source in [
+        NdjsonSource(path, prefilter="s"),
+        MmapNdjsonSource(path, prefilter="s"),
+    ]:
+        assert filter.filter(source=source) == [{"n": 1}]
+    assert filter.explain(source=NdjsonSource(path, prefilter="s")).splitlines()[0] == (
+        "SCAN {source} USING NDJSON"
+    )
+
+
+def test_mmap_ndjson(tmp_path):
+    path = write_ndjson(tmp_path / "data.ndjson")
+    filter = pydictsql.DictFilter("SELECT {name} FROM {source} WHERE {sales} > 200")
+    expected = [{"name": "Bob"}, {"name": "Charles"}, {"name": "David"}]
+    assert filter.filter(source=MmapNdjsonSource(path)) == expected
+    with open(path, "rb") as file:
+        assert filter.filter(source=MmapNdjsonSource(file)) == expected
+        assert not file.closed
+    # Stopping early releases the mapping
+    limited = pydictsql.DictFilter("SELECT {name} FROM {source} LIMIT 1")
+    assert limited.filter(source=MmapNdjsonSource(str(path))) == [{"name": "Adam"}]
+
+
+def test_mmap_ndjson_lines(tmp_path):
+    path = tmp_path / "data.ndjson"
+    lines = [json.dumps(record) for record in RECORDS]
+    lines.insert(2, "not json")
+    path.write_text("\n  \n".join(lines))
+    filter = pydictsql.DictFilter("SELECT {name} FROM {source} WHERE {city} = 'London'")
+    assert len(filter.filter(source=MmapNdjsonSource(path, prefilter="city"))) == 3
+    path.write_text("")
+    assert filter.filter(source=MmapNdjsonSource(path)) == []
+
+
+def test_custom_source():
+    class Squares(Source):
+        def __init__(self, count):
+            self.count = count
+            self.fields = None
+
+        def records(self, parser):
+            self.fields = parser.referenced_fields()
+            return ({"n": n, "square": n * n} for n in range(self.count))
+
+    source = Squares(10)
+    filter = pydictsql.DictFilter("SELECT {n} FROM {source} WHERE {square} > 50")
+    assert filter.filter(source=source) == [{"n": n} for n in [8, 9]]
+    assert source.fields == {"n", "square"}
+
+    class Incomplete(Source):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+CSV_TEXT = "name,city,sales,notes\n" + "".join(
+    f"{record['name']},{record['city']},{record['sales']},note\n" for record in RECORDS
+)
+
+
+def test_referenced_fields():
+    assert _Parser("SELECT * FROM {s} WHERE {a} = 1").referenced_fields() is None
+    assert _Parser("SELECT {a} FROM {s}").referenced_fields() == {"a"}
+    assert _Parser(
+        "SELECT {a}, {b} FROM {s} WHERE {c} = 1 OR NOT {d} > {e}"
+    ).referenced_fields() == {"a", "b", "c", "d", "e"}
+
+
+def test_csv_typed():
+    filter = pydictsql.DictFilter(
+        "SELECT {name}, {sales} FROM {source} WHERE {sales} > 200"
+    )
+    source = CsvSource(io.StringIO(CSV_TEXT), types={"sales": int}, chunksize=2)
+    assert filter.filter(source=source) == [
+        {"name": "Bob", "sales": 400},
+        {"name": "Charles", "sales": 350},
+        {"name": "David", "sales": 290},
+    ]
+
+
+def test_csv_projection(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text(CSV_TEXT)
+    filter = pydictsql.DictFilter("SELECT * FROM {source} WHERE {city} = 'London'")
+    result = filter.filter(source=CsvSource(path))
+    assert len(result) == 3
+    assert result[0] == {
+        "name": "Adam",
+        "city": "London",
+        "sales": "100",
+        "notes": "note",
+    }
+
+    parser = _Parser("SELECT {name} FROM {source} WHERE {city} = 'London'")
+    records = list(CsvSource(path).records(parser))
+    assert records[0] == {"name": "Adam", "city": "London"}
+
+
+def test_explain_access(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text(CSV_TEXT)
+    filter = pydictsql.DictFilter("SELECT {name} FROM {source} WHERE {city} = 'London'")
+    assert filter.explain(source=CsvSource(path)).splitlines()[0] == (
+        "SCAN {source} USING CSV READING {city}, {name}"
+    )
+    assert filter.explain(source=NdjsonSource(path, prefilter="city")).splitlines()[
+        0
+    ] == ("SCAN {source} USING NDJSON PREFILTERED ON 'London'")
+    assert filter.explain(source=MmapNdjsonSource(path)).splitlines()[0] == (
+        "SCAN {source} USING MEMORY MAPPED NDJSON"
+    )
+    assert filter.explain(source=RECORDS).splitlines()[0] == "SCAN {source}"
+
+
+def test_csv_single_column():
+    parser = _Parser("SELECT {sales} FROM {source}")
+    source = CsvSource(io.StringIO(CSV_TEXT + "\n"), types={"sales": float})
+    assert [record["sales"] for record in source.records(parser)] == [
+        100.0,
+        400.0,
+        350.0,
+        290.0,
+        180.0,
+    ]
+
+
+def test_csv_unrecognised():
+    filter = pydictsql.DictFilter("SELECT {name} FROM {source} WHERE {missing} = 1")
+    with pytest.raises(UnrecognisedReferenceError):
+        filter.filter(source=CsvSource(io.StringIO(CSV_TEXT)))
+
+
+def test_csv_short_row():
+    text = CSV_TEXT + "\nFrank,Leeds\n"
+    filter = pydictsql.DictFilter("SELECT {name} FROM {source} WHERE {city} = 'Leeds'")
+    assert filter.filter(source=CsvSource(io.StringIO(text), chunksize=2)) == [
+        {"name": "Frank"}
+    ]
+    filter = pydictsql.DictFilter("SELECT {name} FROM {source} WHERE {sales} > 200")
+    with pytest.raises(ValueError, match="Row 8 "):
+        filter.filter(source=CsvSource(io.StringIO(text), chunksize=2))
+
+
+def test_csv_no_columns():
+    filter = pydictsql.DictFilter("SELECT COUNT(*) FROM {source}")
+    source = CsvSource(io.StringIO(CSV_TEXT + "\n"), chunksize=2)
+    assert filter.filter(source=source) == [{"COUNT(*)": len(RECORDS)}]
+    assert filter.explain(source=source).splitlines()[0] == (
+        "SCAN {source} USING CSV READING NO COLUMNS"
+    )
+
+
+def test_csv_empty():
+    filter = pydictsql.DictFilter("SELECT * FROM {source}")
+    assert filter.filter(source=CsvSource(io.StringIO(""))) == []
+
+
+def test_csv_delimiter():
+    filter = pydictsql.DictFilter("SELECT {b} FROM {source} WHERE {a} = 2")
+    source = CsvSource(io.StringIO("a;b\n1;x\n2;y\n"), types={"a": int}, delimiter=";")
+    assert filter.filter(source=source) == [{"b": "y"}]
@@ -0,0 +1,83 @@
+import pytest
+import pydictsql
+
+RECORDS = [{"a": n, "b": "x" if n % 2 else "y"} for n in range(10)]
+SQL = "SELECT {a} FROM {source} WHERE {a} > 1 AND {b} = 'x'"
+
+
+def test_stats_not_collected():
+    filter = pydictsql.DictFilter(SQL)
+    assert filter.stats is None
+    assert filter.filter(source=RECORDS) == [{"a": a} for a in [3, 5, 7, 9]]
+
+
+def test_stats_rows():
+    filter = pydictsql.DictFilter(SQL, stats=True)
+    filter.filter(source=RECORDS)
+    list(filter.filtergen(source=RECORDS))
+    stats = filter.stats
+    assert stats.queries == 2
+    assert stats.rows_scanned == 20
+    assert stats.rows_matched == 8
+    assert stats.rows_projected == 8
+    assert stats.parse_time >= 0
+    assert stats.elapsed >= stats.predicate_time > 0
+
+
+def test_stats_conditions():
+    filter = pydictsql.DictFilter(SQL, stats=True)
+    filter.filter(source=RECORDS)
+    conditions = filter.stats.conditions
+    assert set(conditions) == {"{a} > 1", "{b} = 'x'"}
+    # Whichever condition is evaluated first sees every record, the second only those the first didn't reject
+    evaluated = sorted(counts.evaluated for counts in conditions.values())
+    assert evaluated[1] == 10
+    assert evaluated[0] < 10
+    assert conditions["{b} = 'x'"].true_rate == pytest.approx(
+        conditions["{b} = 'x'"].satisfied / conditions["{b} = 'x'"].evaluated
+    )
+
+
+def test_stats_limit():
+    filter = pydictsql.DictFilter(
+        "SELECT {a} FROM {source} WHERE {a} > 1 LIMIT 2", stats=True
+    )
+    assert filter.filter(source=RECORDS) == [{"a": 2}, {"a": 3}]
+    assert filter.stats.rows_scanned == 4
+    assert filter.stats.rows_projected == 2
+
+
+def test_stats_schema_and_sample():
+    filter = pydictsql.DictFilter(
+        SQL, schema={"a": int, "b": str}, sample_size=5, stats=True
+    )
+    filter.filter(source=RECORDS)
+    assert filter.stats.rows_scanned == 10
+    assert sum(counts.evaluated for counts in filter.stats.conditions.values()) > 10
+
+
+def test_hooks():
+    queries = []
+    filter = pydictsql.DictFilter(SQL, hooks=[queries.append])
+    assert filter.stats is not None
+    filter.filter(source=RECORDS)
+    filter.filter(source=RECORDS[:4])
+    assert [query.queries for query in queries] == [1, 1]
+    assert [query.rows_scanned for query in queries] == [10, 4]
+    assert [query.rows_matched for query in queries] == [4, 1]
+    assert filter.stats.rows_scanned == 14
+    assert queries[1].as_dict()["sql"] == SQL
+    assert sum(
+        condition["evaluated"] for condition in queries[1].as_dict()["conditions"]
+    ) < sum(condition["evaluated"] for condition in queries[0].as_dict()["conditions"])
+
+
+def test_hooks_generator_closed():
+    queries = []
+    filter = pydictsql.DictFilter(SQL, hooks=[queries.append])
+    rows = filter.filtergen(source=RECORDS)
+    next(rows)
+    assert queries == []
+    rows.close()
+    assert len(queries) == 1
+    assert queries[0].rows_projected == 1
@@ -1,5 +1,6 @@
 import pytest
 
+from pydictsql.exceptions import InvalidTokenError
 from pydictsql.tokeniser import _TokenType, _Tokeniser, _Token
 
 
@@ -84,3 +85,17 @@ def test_realistic_grammar():
         assert tokeniser.consume() == item
     assert tokeniser.peek_next() == None
     assert tokeniser.consume() == None
+
+
+def test_invalid_tokens():
+    for sql in ["SELECT ?", "SELECT 1dc", "{unfinished", "'unfinished", "WRONG"]:
+        with pytest.raises(InvalidTokenError):
+            _Tokeniser(sql)
+
+
+def test_long_sql():
+    sql = "SELECT * FROM {data} WHERE " + " OR ".join(
+        f"{{value{i}}} = 'value {i}'" for i in range(500)
+    )
+    tokeniser = _Tokeniser(sql)
+    assert len(tokeniser._tokens) == 5 + 500 * 3 + 499
@@ -73,3 +73,8 @@ def test_tokentype_operators():
 def test_tokentype_invalid():
     for val in ["1dc", "?", "$", "'unfinished", '"unfinished']:
         assert _TokenType.get_token(val) == None
+
+
+def test_tokentype_distinct():
+    # Each token type must have its own value, otherwise enum members silently become aliases of one another
+    assert len(set(ttype.value for ttype in _TokenType)) == len(_TokenType.__members__)